@@ -1,11 +1,18 @@
 # /zenyth/agent.py
-from typing import TypedDict, Optional, List
-from langgraph.graph import StateGraph, END
-from langchain_core.messages import BaseMessage
+import operator
+import threading
+from typing import Annotated, Any, TypedDict, Optional, List
 from dotenv import load_dotenv
-from tools import extract_id_tool, get_transcript_tool, summarize_text_tool, translate_text_tool
+from tools import extract_id_tool, get_transcript_tool, summarize_text_tool, derive_summary_tool, translate_text_tool
+from config import Config
+from src.cache import get_summary_cache, make_summary_key, make_summary_languages_key
+from src.summarize import get_prompt_version, get_richer_lengths
+from src.language_detection import detect_language, normalize_language
+from src.translation import record_translation_check
+from src.streaming import token_sink
+from src.dedup import dedup_report
+from src.metrics import CACHE_LOOKUPS, instrument_node, timing_breakdown
 # from config import tavily_tool, youtube_search # Commenté pour le débogage
-from pydantic import BaseModel, Field
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,120 +27,315 @@ class GraphState(TypedDict):
     intermediate_summary: Optional[str]  # Clé pour le résumé partiel
     summary: Optional[str]               # Clé pour le résumé final
     error_message: Optional[str]
-    log: List[str]
+    # Réducteurs : chaque nœud ne renvoie que ses nouvelles entrées, LangGraph les ajoute à la suite
+    log: Annotated[List[str], operator.add]
     status_message: str
     current_step: str
-    step_progress: List[dict]
+    step_progress: Annotated[List[dict], operator.add]
+    cache_key: Optional[str]
+    cache_hit: bool
+    translation_skipped: Optional[bool]
+    derived_from: Optional[str]                        # longueur du résumé en cache dont ce résumé est dérivé
+    translated_from: Optional[str]                     # langue du résumé en cache dont ce résumé est traduit
+    node_timings: Annotated[List[dict], operator.add]  # une entrée par nœud exécuté (voir src/metrics.py)
+    timings: Optional[dict]                            # détail des temps de la requête, envoyé à la fin
 
 # 2. Définition des nœuds
-def node_extract_id(state: GraphState) -> dict:
+def _stream_tokens_to(node_name: str):
+    """Relie le streaming des tokens de la requête en cours au flux « custom » du graphe (événements `delta`)."""
+    from langgraph.config import get_stream_writer
+
+    writer = get_stream_writer()
+    return token_sink.set(lambda stage, delta: writer({"node": node_name, "stage": stage, "delta": delta}))
+
+async def node_extract_id(state: GraphState) -> dict:
     print("---NODE: ID EXTRACTION---")
-    current_log = state.get("log", [])
     current_step = "ID Extraction"
-    step_progress = state.get("step_progress", [])
     
     url = state.get('youtube_url', '')
+    # Extraction purement locale (aucune E/S) : un appel synchrone suffit
     video_id = extract_id_tool.invoke({"youtube_url": url})
     
     if not video_id:
         error_message = "Invalid YouTube URL or ID not found."
         return {
             "error_message": error_message,
-            "log": current_log + [f"❌ {error_message}"],
+            "log": [f"❌ {error_message}"],
             "status_message": "❌ Failed to extract ID.",
             "current_step": current_step,
-            "step_progress": step_progress + [{"step": current_step, "status": "error", "message": error_message}]
+            "step_progress": [{"step": current_step, "status": "error", "message": error_message}]
         }
     
     success_message = f"Video ID found: {video_id}"
     return {
         "video_id": video_id,
-        "log": current_log + [success_message],
+        "log": [success_message],
         "status_message": "📝 Fetching transcript...",
         "current_step": current_step,
-        "step_progress": step_progress + [{"step": current_step, "status": "success", "message": success_message}]
+        "step_progress": [{"step": current_step, "status": "success", "message": success_message}]
+    }
+
+async def node_check_cache(state: GraphState) -> dict:
+    """Court-circuite le graphe si ce résumé (vidéo, langue, longueur, modèle, prompts) est déjà en cache."""
+    print("---NODE: CACHE LOOKUP---")
+
+    cache = get_summary_cache()
+    if cache is None:
+        return {"cache_hit": False}
+
+    summary_length = state.get('summary_length', 'standard')
+    cache_key = make_summary_key(
+        state.get('video_id', ''),
+        state.get('language', 'english'),
+        summary_length,
+        Config.DEFAULT_MODEL_NAME,
+        get_prompt_version(),
+    )
+    cached = cache.get(cache_key)
+    CACHE_LOOKUPS.labels("summary", "hit" if cached else "miss").inc()
+    if not cached:
+        return {"cache_key": cache_key, "cache_hit": False, **(_find_richer_summary(cache, state) or _find_other_language_summary(cache, state))}
+
+    transcript = cached.get("transcript") or ""
+    # On rejoue les étapes habituelles pour que le frontend affiche la même progression.
+    cached_steps = [
+        {"step": "Transcript Retrieval", "status": "success", "message": f"Transcript loaded from cache ({len(transcript):,} characters)."},
+        {"step": "Summary Creation", "status": "success", "message": f"Loaded {summary_length} summary from cache."},
+        {"step": "Language Check", "status": "success", "message": f"Summary language: '{state.get('language', 'english')}'."},
+    ]
+    return {
+        "cache_key": cache_key,
+        "cache_hit": True,
+        "transcript": transcript,
+        "intermediate_summary": cached["summary"],
+        "summary": cached["summary"],
+        "log": ["⚡ Summary served from cache."],
+        "status_message": "✅ Summary successfully completed!",
+        "current_step": "Language Check",
+        "step_progress": cached_steps,
     }
 
-def node_get_transcript(state: GraphState) -> dict:
+def _find_richer_summary(cache, state: GraphState) -> dict:
+    """
+    Cherche en cache un résumé plus détaillé de la même vidéo, dans la même langue, pour les longueurs
+    qui peuvent en être dérivées (ex. « brief » après « detailed »). Retourne la mise à jour de l'état, ou {}.
+    """
+    summary_length = state.get('summary_length', 'standard')
+    if summary_length not in Config.DERIVED_SUMMARY_LENGTHS:
+        return {}
+    for source_length in get_richer_lengths(summary_length)[1:]:
+        source_key = make_summary_key(
+            state.get('video_id', ''),
+            state.get('language', 'english'),
+            source_length,
+            Config.DEFAULT_MODEL_NAME,
+            get_prompt_version(),
+        )
+        source = cache.get(source_key)
+        if source:
+            CACHE_LOOKUPS.labels("summary", "derive").inc()
+            transcript = source.get("transcript") or ""
+            return {
+                "derived_from": source_length,
+                "transcript": transcript,
+                "intermediate_summary": source["summary"],
+                "log": [f"⚡ Cached {source_length} summary found, deriving the {summary_length} summary from it."],
+                "status_message": f"🧠 Condensing the {source_length} summary...",
+                "current_step": "Transcript Retrieval",
+                "step_progress": [{"step": "Transcript Retrieval", "status": "success", "message": f"Transcript loaded from cache ({len(transcript):,} characters)."}],
+            }
+    return {}
+
+def _languages_key(state: GraphState) -> str:
+    return make_summary_languages_key(
+        state.get('video_id', ''), state.get('summary_length', 'standard'), Config.DEFAULT_MODEL_NAME, get_prompt_version()
+    )
+
+def _remember_summary_language(cache, state: GraphState) -> None:
+    """
+    Ajoute la langue de ce résumé à l'index (vidéo, longueur) : les autres langues pourront le traduire.
+    Les résumés d'origine passent avant les traductions (on évite de traduire une traduction).
+    """
+    key = _languages_key(state)
+    language = state.get('language', 'english').strip().lower()
+    languages = [known for known in (cache.get(key) or {}).get("languages", []) if known != language]
+    languages = languages + [language] if state.get("translated_from") else [language] + languages
+    cache.set(key, {"languages": languages})
+
+def _find_other_language_summary(cache, state: GraphState) -> dict:
+    """
+    Cherche en cache le même résumé (vidéo, longueur) dans une autre langue : il suffit alors de le traduire
+    (un appel LLM court) au lieu de récupérer la transcription et de relancer le Map-Reduce.
+    Retourne la mise à jour de l'état, ou {}.
+    """
+    target_language = state.get('language', 'english').strip().lower()
+    summary_length = state.get('summary_length', 'standard')
+    for source_language in (cache.get(_languages_key(state)) or {}).get("languages", []):
+        if source_language == target_language:
+            continue
+        source = cache.get(make_summary_key(
+            state.get('video_id', ''), source_language, summary_length, Config.DEFAULT_MODEL_NAME, get_prompt_version()
+        ))
+        if not source:
+            continue
+        CACHE_LOOKUPS.labels("summary", "translate").inc()
+        transcript = source.get("transcript") or ""
+        message = f"Reused the cached {summary_length} summary in '{source_language}', translating it instead of summarizing again."
+        return {
+            "translated_from": source_language,
+            "transcript": transcript,
+            "intermediate_summary": source["summary"],
+            "log": [f"⚡ {message}"],
+            "status_message": f"🌍 Translating the '{source_language}' summary...",
+            "current_step": "Summary Creation",
+            "step_progress": [
+                {"step": "Transcript Retrieval", "status": "success", "message": f"Transcript loaded from cache ({len(transcript):,} characters)."},
+                {"step": "Summary Creation", "status": "success", "message": message},
+            ],
+        }
+    return {}
+
+async def node_derive_summary(state: GraphState) -> dict:
+    """Produit un résumé court à partir du résumé plus détaillé trouvé en cache (un seul appel LLM)."""
+    print("---NODE: SUMMARY DERIVATION---")
+    current_step = "Summary Creation"
+
+    summary_length = state.get('summary_length', 'standard')
+    source_length = state.get('derived_from')
+    sink_token = _stream_tokens_to("derive_summary")
+    try:
+        summary, error = await derive_summary_tool.ainvoke({
+            "source_summary": state.get('intermediate_summary', ''),
+            "language": state.get('language', 'english'),
+            "summary_length": summary_length,
+        })
+    finally:
+        token_sink.reset(sink_token)
+
+    if error:
+        # Pas d'échec pour l'utilisateur : on repasse par le pipeline complet
+        warning_message = f"⚠️ Could not derive from the {source_length} summary ({error}), summarizing the transcript instead."
+        print(warning_message)
+        return {"derived_from": None, "intermediate_summary": None, "log": [warning_message]}
+
+    success_message = f"Created {summary_length} summary from the cached {source_length} summary."
+    return {
+        "intermediate_summary": summary,
+        "log": [success_message],
+        "status_message": f"🚀 Finalizing {summary_length} summary...",
+        "current_step": current_step,
+        "step_progress": [{"step": current_step, "status": "success", "message": success_message}]
+    }
+
+async def node_get_transcript(state: GraphState) -> dict:
     print("---NODE: TRANSCRIPT RETRIEVAL---")
-    current_log = state.get("log", [])
     current_step = "Transcript Retrieval"
-    step_progress = state.get("step_progress", [])
     
     video_id = state.get('video_id', '')
-    transcript, error = get_transcript_tool.invoke({"video_id": video_id})
+    transcript, error = await get_transcript_tool.ainvoke({"video_id": video_id})
     
     if error:
         return {
             "error_message": error,
-            "log": current_log + [f"❌ {error}"],
+            "log": [f"❌ {error}"],
             "status_message": f"❌ Failed: {error}",
             "current_step": current_step,
-            "step_progress": step_progress + [{"step": current_step, "status": "error", "message": error}]
+            "step_progress": [{"step": current_step, "status": "error", "message": error}]
         }
     
     success_message = f"Transcript fetched successfully ({len(transcript):,} characters)."
     return {
         "transcript": transcript,
-        "log": current_log + [success_message],
+        "log": [success_message],
         "status_message": "🧠 Creating the summary...",
         "current_step": current_step,
-        "step_progress": step_progress + [{"step": current_step, "status": "success", "message": success_message}]
+        "step_progress": [{"step": current_step, "status": "success", "message": success_message}]
     }
 
-def node_summarize(state: GraphState) -> dict:
+async def node_summarize(state: GraphState) -> dict:
     print("---NODE: SUMMARY CREATION---")
-    current_log = state.get("log", [])
     current_step = "Summary Creation"
-    step_progress = state.get("step_progress", [])
     
     transcript = state.get('transcript', '')
     language = state.get('language', 'english')
     summary_length = state.get('summary_length', 'standard')
     
     print(f"Starting {summary_length} summary in '{language}'...")
-    summary, error = summarize_text_tool.invoke({
-        "transcript": transcript,
-        "language": language,
-        "summary_length": summary_length
-    })
+    sink_token = _stream_tokens_to("summarize")
+    dedup = {}
+    dedup_token = dedup_report.set(dedup)
+    try:
+        summary, error = await summarize_text_tool.ainvoke({
+            "transcript": transcript,
+            "language": language,
+            "summary_length": summary_length,
+            "video_id": state.get('video_id')
+        })
+    finally:
+        dedup_report.reset(dedup_token)
+        token_sink.reset(sink_token)
     
     if error:
         return {
             "error_message": error,
-            "log": current_log + [f"❌ {error}"],
+            "log": [f"❌ {error}"],
             "status_message": f"❌ Failed to create the summary: {error}",
             "current_step": current_step,
-            "step_progress": step_progress + [{"step": current_step, "status": "error", "message": error}]
+            "step_progress": [{"step": current_step, "status": "error", "message": error}]
         }
     
     success_message = f"Created {summary_length} summary."
+    if dedup.get("tokens_saved"):
+        success_message += (
+            f" Skipped {dedup['skipped_chunks']} duplicate chunk(s) and "
+            f"{dedup['repeated_units'] + dedup['boilerplate_units']} repeated or boilerplate line(s) "
+            f"(~{dedup['tokens_saved']:,} tokens)."
+        )
+    if dedup.get("extractive_tokens_in"):
+        success_message += (
+            f" Condensed the transcript locally from ~{dedup['extractive_tokens_in']:,} "
+            f"to ~{dedup['extractive_tokens_out']:,} tokens of key passages."
+        )
     # === MODIFICATION CORRIGÉE ===
     # On stocke le résultat dans 'intermediate_summary' et PAS dans 'summary'
     return {
         "intermediate_summary": summary,
-        "log": current_log + [success_message],
+        "log": [success_message],
         "status_message": f"🚀 Finalizing {summary_length} summary...",
         "current_step": current_step,
-        "step_progress": step_progress + [{"step": current_step, "status": "success", "message": success_message}]
+        "step_progress": [{"step": current_step, "status": "success", "message": success_message}]
     }
 
-def node_translate_summary(state: GraphState) -> dict:
+async def node_translate_summary(state: GraphState) -> dict:
     """Nœud qui assure que le résumé est dans la langue demandée (qualité)."""
     print("---NODE: SUMMARY LANGUAGE CHECK---")
-    current_log = state.get("log", [])
     current_step = "Language Check"
-    step_progress = state.get("step_progress", [])
     
     # === MODIFICATION CORRIGÉE ===
     # On lit depuis 'intermediate_summary'
     summary_to_translate = state.get('intermediate_summary', '')
     target_language = state.get('language', 'english')
     
-    final_summary, error = translate_text_tool.invoke({
-        "text": summary_to_translate,
-        "target_language": target_language
-    })
+    # Détection locale de la langue : on ne relance le LLM que si le résumé n'est pas déjà dans la bonne langue
+    detected_language, confidence = detect_language(summary_to_translate)
+    translation_skipped = (
+        detected_language is not None
+        and detected_language == normalize_language(target_language)
+        and confidence >= Config.LANGUAGE_DETECTION_MIN_CONFIDENCE
+    )
+    record_translation_check(translation_skipped)
+    if translation_skipped:
+        final_summary, error = summary_to_translate, None
+        print(f"Summary already in '{target_language}' (detected '{detected_language}', confidence {confidence:.2f}), skipping translation.")
+    else:
+        sink_token = _stream_tokens_to("translate_summary")
+        try:
+            final_summary, error = await translate_text_tool.ainvoke({
+                "text": summary_to_translate,
+                "target_language": target_language
+            })
+        finally:
+            token_sink.reset(sink_token)
     
     if error:
         warning_message = f"⚠️ Final language check failed ({error}), using the original summary."
@@ -141,58 +343,129 @@ def node_translate_summary(state: GraphState) -> dict:
         # On remplit 'summary' avec la version intermédiaire en cas d'échec de la traduction
         return {
             "summary": summary_to_translate, 
-            "log": current_log + [warning_message],
+            "translation_skipped": False,
+            "log": [warning_message],
             "status_message": "✅ Summary completed (with a warning)."
         }
     
-    success_message = f"Summary language: '{target_language}'."
+    if translation_skipped:
+        success_message = f"Summary language: '{target_language}' (already in the target language, translation skipped)."
+    elif state.get("translated_from"):
+        success_message = f"Summary language: '{target_language}' (translated from the cached '{state['translated_from']}' summary)."
+    else:
+        success_message = f"Summary language: '{target_language}'."
+    cache = get_summary_cache()
+    if cache is not None and state.get("cache_key"):
+        cache.set(state["cache_key"], {"summary": final_summary, "transcript": state.get("transcript") or ""})
+        _remember_summary_language(cache, state)
     # On remplit enfin 'summary' avec le résultat final.
     return {
         "summary": final_summary, 
-        "log": current_log + [success_message],
+        "translation_skipped": translation_skipped,
+        "log": [success_message],
         "status_message": "✅ Summary successfully completed!",
         "current_step": current_step,
-        "step_progress": step_progress + [{"step": current_step, "status": "success", "message": success_message}]
+        "step_progress": [{"step": current_step, "status": "success", "message": success_message}]
     }
 
-def node_final_step(state: GraphState) -> dict:
+async def node_final_step(state: GraphState) -> dict:
     print("---NŒUD: ÉTAPE FINALE---")
-    return dict(state)
-
-# 3. Construction et compilation du graphe
-workflow = StateGraph(GraphState)
-
-workflow.add_node("extract_id", node_extract_id)
-workflow.add_node("get_transcript", node_get_transcript)
-workflow.add_node("summarize", node_summarize)
-workflow.add_node("translate_summary", node_translate_summary)
-workflow.add_node("final_step", node_final_step)
-
-workflow.set_entry_point("extract_id")
+    # L'état complet (dont la transcription brute) n'est plus renvoyé : seules les mises à jour circulent
+    return {"current_step": "Done", "timings": timing_breakdown(state.get("node_timings"))}
 
 def check_for_error(state: GraphState) -> str:
     if state.get("error_message"):
         return "error"
     return "continue"
 
-# Arêtes conditionnelles
-workflow.add_conditional_edges("extract_id", check_for_error, {"continue": "get_transcript", "error": "final_step"})
-workflow.add_conditional_edges("get_transcript", check_for_error, {"continue": "summarize", "error": "final_step"})
-workflow.add_conditional_edges("summarize", check_for_error, {"continue": "translate_summary", "error": "final_step"})
-
-# Arête finale
-workflow.add_edge("translate_summary", "final_step")
-workflow.add_edge("final_step", END)
-
-# Compilation
-app = workflow.compile()
-
-# Visualisation du graphe
-try:
-    graph = app.get_graph()
-    image_bytes = graph.draw_mermaid_png()
-    with open("agent_workflow.png", "wb") as f:
-        f.write(image_bytes)
-    print("\nGraph visualization saved in the directory as agent_workflow.png\n")
-except Exception as e:
-    print(f"\nUnable to generate visualization. Run 'pip install playwright' and 'playwright install'. Error: {e}\n")
\ No newline at end of file
+def check_for_cache_hit(state: GraphState) -> str:
+    if state.get("cache_hit"):
+        return "hit"
+    if state.get("derived_from"):
+        return "derive"
+    return "translate" if state.get("translated_from") else "miss"
+
+def check_for_derived_summary(state: GraphState) -> str:
+    return "derived" if state.get("derived_from") else "failed"
+
+# 3. Construction et compilation du graphe
+# LangGraph coûte à lui seul plus de la moitié du temps d'import de l'API : le graphe n'est construit qu'au
+# premier usage (l'API le prépare en arrière-plan au démarrage, sans retarder l'ouverture du port)
+def build_graph():
+    from langgraph.graph import StateGraph, END
+
+    workflow = StateGraph(GraphState)
+
+    # Chaque nœud est instrumenté (latence, appels LLM) ; l'étape finale ne fait qu'assembler le détail des temps
+    workflow.add_node("extract_id", instrument_node("extract_id", node_extract_id))
+    workflow.add_node("check_cache", instrument_node("check_cache", node_check_cache))
+    workflow.add_node("get_transcript", instrument_node("get_transcript", node_get_transcript))
+    workflow.add_node("summarize", instrument_node("summarize", node_summarize))
+    workflow.add_node("derive_summary", instrument_node("derive_summary", node_derive_summary))
+    workflow.add_node("translate_summary", instrument_node("translate_summary", node_translate_summary))
+    workflow.add_node("final_step", node_final_step)
+
+    workflow.set_entry_point("extract_id")
+
+    # Arêtes conditionnelles
+    workflow.add_conditional_edges("extract_id", check_for_error, {"continue": "check_cache", "error": "final_step"})
+    workflow.add_conditional_edges("check_cache", check_for_cache_hit, {"miss": "get_transcript", "derive": "derive_summary", "translate": "translate_summary", "hit": "final_step"})
+    workflow.add_conditional_edges("derive_summary", check_for_derived_summary, {"derived": "translate_summary", "failed": "get_transcript"})
+    workflow.add_conditional_edges("get_transcript", check_for_error, {"continue": "summarize", "error": "final_step"})
+    workflow.add_conditional_edges("summarize", check_for_error, {"continue": "translate_summary", "error": "final_step"})
+
+    # Arête finale
+    workflow.add_edge("translate_summary", "final_step")
+    workflow.add_edge("final_step", END)
+
+    # Compilation
+    return workflow.compile()
+
+_graph = None
+_graph_lock = threading.Lock()
+
+def get_graph():
+    """Graphe compilé, construit une seule fois par processus (thread-safe)."""
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = build_graph()
+    return _graph
+
+def __getattr__(name: str) -> Any:
+    # `from agent import app` reste possible : le graphe est alors construit à ce moment-là
+    if name == "app":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Visualisation du graphe : uniquement à la demande, jamais à l'import (rendu réseau/playwright coûteux)
+def draw_graph(output_path: str = "agent_workflow.png", output_format: str = "png") -> str:
+    """Écrit la visualisation du graphe (PNG via mermaid.ink, ou source Mermaid) et retourne le chemin."""
+    graph = get_graph().get_graph()
+    if output_format == "mermaid":
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(graph.draw_mermaid())
+    else:
+        with open(output_path, "wb") as f:
+            f.write(graph.draw_mermaid_png())
+    return output_path
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Zenyth agent utilities.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    draw_parser = subparsers.add_parser("draw", help="Render the workflow graph.")
+    draw_parser.add_argument("--output", "-o", default="agent_workflow.png")
+    draw_parser.add_argument("--format", choices=["png", "mermaid"], default="png",
+                             help="'png' needs network access to mermaid.ink (or playwright); 'mermaid' writes the source offline.")
+    args = parser.parse_args()
+
+    if args.command == "draw":
+        try:
+            path = draw_graph(args.output, args.format)
+            print(f"\nGraph visualization saved as {path}\n")
+        except Exception as e:
+            print(f"\nUnable to generate visualization. Run 'pip install playwright' and 'playwright install', or use --format mermaid. Error: {e}\n")
+            raise SystemExit(1)
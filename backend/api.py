@@ -6,36 +6,118 @@ dotenv_path = os.path.join(project_root, '.env')
 load_dotenv(dotenv_path=dotenv_path, override=True)
 print(f"Attempting to load .env from: {dotenv_path}")
 
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Dict, List, Optional
 from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from agent import app as agent_graph, GraphState
+from src.video_tools import extract_playlist_id, extract_video_id, get_playlist_video_ids, get_video_segments
+from src.admission import AdmissionController, AdmissionRejected, AdmissionTicket
+from src.concurrency import get_loop_semaphore
+from src.singleflight import InFlightRegistry
+from src.shared_state import PROCESS_ID, SharedRunLog
+from src.jobs import JobQueue, JobQueueFull, JobStore, parse_event_id
+from src.metrics import CANCELLATION_STATS, CONTENT_TYPE_LATEST, METRICS_ENABLED, generate_latest
+from src.cache import get_map_cache, get_summary_cache
+from config import Config, key_scheduler, llm_pool
+import src.video_tools as video_tools
 import json
 import asyncio
+import hashlib
+import math
+import time
+import weakref
+
+if TYPE_CHECKING:
+    from agent import GraphState
+
+
+try:
+    import orjson
+
+    def dumps(data) -> bytes:
+        return orjson.dumps(data)
+except ImportError:  # orjson est optionnel : on se rabat sur json
+    def dumps(data) -> bytes:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
 
 
 class SummarizeRequest(BaseModel):
     youtube_url: str
     language: str = "english"
     summary_length: str = "standard"
+    include_transcript: bool = False
+    include_timings: bool = False
 
-app = FastAPI()
-
-# Le reste du fichier est inchangé
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+# Les requêtes identiques (vidéo, langue, longueur) en cours partagent une seule exécution du graphe.
+inflight_runs = InFlightRegistry(
+    "summarize",
+    # Plusieurs workers : une requête identique servie par un autre worker suit le même journal d'événements
+    shared=SharedRunLog(Config.SHARED_STATE_DB_PATH, stale_after=Config.SHARED_RUN_STALE_SECONDS) if Config.SHARED_STATE_ENABLED else None,
+    # Tous les clients d'une exécution partis : on l'annule (appels LLM en cours et morceaux en attente)
+    cancel_after=Config.CANCEL_GRACE_SECONDS if Config.CANCEL_ON_DISCONNECT else None,
 )
 
-async def stream_generator(req):
-    youtube_url = req["youtube_url"] if isinstance(req, dict) else req.youtube_url
-    language = req["language"] if isinstance(req, dict) else req.language
-    summary_length = req.get("summary_length", "standard") if isinstance(req, dict) else getattr(req, "summary_length", "standard")
-    inputs: GraphState = {
+def get_graph():
+    """Graphe compilé. `agent` (LangGraph, outils LangChain) n'est importé qu'ici, hors du démarrage de l'API."""
+    from agent import get_graph as get_agent_graph
+
+    return get_agent_graph()
+
+async def run_graph(inputs: "GraphState"):
+    """
+    Exécute le graphe et produit un événement {"node", "data"} par nœud terminé,
+    ainsi que des événements {"node", "stage", "delta"} pendant la génération finale.
+    """
+    # Déjà construit par le démarrage en général ; sinon la construction ne bloque pas la boucle
+    agent_graph = await asyncio.to_thread(get_graph)
+    async for mode, chunk in agent_graph.astream(inputs, stream_mode=["updates", "custom"]):
+        if mode == "custom":
+            yield chunk
+            continue
+        for key, value in chunk.items():
+            if isinstance(value, dict):
+                yield {"node": key, "data": value}
+
+# Champs de l'état envoyés au client. Les champs internes (résumé intermédiaire, clé de cache)
+# et la transcription brute (sauf demande explicite) ne circulent pas.
+PUBLIC_FIELDS = frozenset({
+    "video_id", "summary", "error_message", "log", "status_message",
+    "current_step", "step_progress", "cache_hit", "translation_skipped", "derived_from", "translated_from",
+    "queue_position",
+})
+
+def public_event(event: dict, include_transcript: bool = False, include_timings: bool = False) -> dict:
+    """Ne garde d'un événement du graphe que les champs destinés au client."""
+    if "data" in event:
+        fields = PUBLIC_FIELDS | {"transcript"} if include_transcript else PUBLIC_FIELDS
+        if include_timings:
+            fields = fields | {"timings"}
+        data = {key: value for key, value in event["data"].items() if key in fields and value is not None}
+        event = {"node": event["node"], "data": data}
+    return event
+
+def encode_event(event: dict, include_transcript: bool = False, include_timings: bool = False) -> bytes:
+    """Sérialise un événement du graphe en trame SSE compacte (uniquement les nouveautés du nœud)."""
+    return b"data: " + dumps(public_event(event, include_transcript, include_timings)) + b"\n\n"
+
+def _field(req, name: str, default=None):
+    return req.get(name, default) if isinstance(req, dict) else getattr(req, name, default)
+
+def summary_run_key(req) -> Optional[tuple]:
+    """Clé des exécutions partagées (vidéo, langue, longueur), ou None si l'URL n'a pas d'identifiant de vidéo."""
+    video_id = extract_video_id(_field(req, "youtube_url") or "")
+    if not video_id:
+        return None
+    return (video_id, _field(req, "language", "english").strip().lower(), _field(req, "summary_length", "standard"))
+
+def graph_events(req):
+    """Événements du graphe pour une requête de résumé (partagés avec les requêtes identiques en cours)."""
+    youtube_url = _field(req, "youtube_url")
+    language = _field(req, "language", "english")
+    summary_length = _field(req, "summary_length", "standard")
+    inputs: "GraphState" = {
         "youtube_url": youtube_url,
         "language": language,
         "summary_length": summary_length,
@@ -47,15 +129,160 @@ async def stream_generator(req):
         "log": [],
         "status_message": "API: Starting...",
         "step_progress": [],
-        "current_step": "Initialization"
+        "current_step": "Initialization",
+        "cache_key": None,
+        "cache_hit": False,
+        "translation_skipped": None,
+        "derived_from": None,
+        "translated_from": None,
+        "node_timings": [],
+        "timings": None
     }
 
-    async for chunk in agent_graph.astream(inputs):
-        for key, value in chunk.items():
-            if isinstance(value, dict):
-                data_to_send = {"node": key, "data": value}
-                yield f"data: {json.dumps(data_to_send)}\n\n"
+    run_key = summary_run_key(req)
+    if run_key is not None:
+        return inflight_runs.stream(run_key, lambda: run_graph(inputs))
+    return run_graph(inputs)
+
+# --- Contrôle d'admission : débit par client, capacité globale pondérée, file d'attente bornée ---
+
+admission = AdmissionController(
+    # Capacité répartie entre les workers : ils se partagent les mêmes clés API
+    capacity=Config.ADMISSION_UNITS_PER_KEY * max(1, len(Config.GROQ_API_KEYS)) // max(1, Config.WEB_CONCURRENCY),
+    max_queue=Config.ADMISSION_QUEUE_MAX,
+    rate_per_minute=Config.ADMISSION_RATE_PER_MINUTE,
+    burst=Config.ADMISSION_BURST,
+)
+
+# Empreintes des jetons connus : un jeton inventé ne doit pas donner un nouveau seau de débit à chaque requête
+_CLIENT_TOKENS = {hashlib.sha256(token.encode("utf-8")).hexdigest() for token in Config.ADMISSION_CLIENT_TOKENS}
+
+def client_identity(req: Request) -> str:
+    """
+    Client à qui s'applique la limite de débit : son jeton (`Authorization: Bearer`) s'il fait partie de
+    ADMISSION_CLIENT_TOKENS, sinon son adresse IP. Derrière Nginx et Next.js, l'adresse vue est celle du dernier
+    proxy : on lit celle du client dans X-Forwarded-For, à TRUSTED_PROXY_HOPS entrées de la fin (les précédentes
+    sont falsifiables).
+    """
+    authorization = req.headers.get("authorization", "")
+    if _CLIENT_TOKENS and authorization.lower().startswith("bearer "):
+        digest = hashlib.sha256(authorization[7:].strip().encode("utf-8")).hexdigest()
+        if digest in _CLIENT_TOKENS:
+            return "token:" + digest[:16]
+    forwarded = [address.strip() for address in req.headers.get("x-forwarded-for", "").split(",") if address.strip()]
+    if forwarded and Config.TRUSTED_PROXY_HOPS > 0:
+        return "ip:" + forwarded[max(0, len(forwarded) - Config.TRUSTED_PROXY_HOPS)]
+    return "ip:" + (req.client.host if req.client else "unknown")
+
+async def admission_units(req) -> int:
+    """
+    Poids d'une requête : 0 si elle rejoint une exécution en cours (aucun travail en plus), sinon selon la
+    taille de sa transcription quand elle est déjà stockée (lue hors de la boucle), ADMISSION_DEFAULT_UNITS sinon.
+    """
+    run_key = summary_run_key(req)
+    if run_key is None:
+        return Config.ADMISSION_DEFAULT_UNITS
+    if run_key in inflight_runs:
+        return 0
+    stored = await asyncio.to_thread(get_video_segments, run_key[0])
+    if stored is None:
+        return Config.ADMISSION_DEFAULT_UNITS
+    return max(1, math.ceil(len(stored.text) / Config.ADMISSION_UNIT_CHARS))
+
+@asynccontextmanager
+async def admitted(request: dict):
+    """
+    Capacité globale pour un travail de fond (vidéo d'un lot, job) : il attend son tour dans la même file que
+    /summarize, sans délai maximal ni refus (le débit du client est compté à la soumission).
+    """
+    ticket = None
+    while Config.ADMISSION_ENABLED and ticket is None:
+        try:
+            ticket = admission.enter(None, admission.weight_for(await admission_units(request)))
+        except AdmissionRejected as e:
+            await asyncio.sleep(e.retry_after)
+    try:
+        while ticket is not None and not await admission.wait(ticket, 60):
+            pass
+        yield
+    finally:
+        if ticket is not None:
+            admission.release(ticket)
+
+async def admission_events(ticket: AdmissionTicket):
+    """Position dans la file à chaque changement, jusqu'à l'admission ; erreur après ADMISSION_QUEUE_TIMEOUT."""
+    deadline = time.monotonic() + Config.ADMISSION_QUEUE_TIMEOUT
+    last_position = None
+    while not ticket.admitted:
+        position = admission.position(ticket)
+        if position != last_position:
+            last_position = position
+            message = f"⏳ Server busy: you are number {position} in the queue..."
+            yield {"node": "admission", "data": {"queue_position": position, "status_message": message}}
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            admission.time_out(ticket)
+            yield {"node": "admission", "data": {"error_message": "The server is too busy right now, please try again in a few minutes."}}
+            return
+        await admission.wait(ticket, min(1.0, remaining))
+
+async def stream_generator(req, ticket: Optional[AdmissionTicket] = None):
+    include_transcript = bool(_field(req, "include_transcript", False))
+    include_timings = bool(_field(req, "include_timings", False))
+    events = None
+    try:
+        if ticket is not None and not ticket.admitted:
+            async for event in admission_events(ticket):
+                yield encode_event(event)
+            if not ticket.admitted:
+                return
+        events = graph_events(req)
+        async for data_to_send in events:
+            yield encode_event(data_to_send, include_transcript, include_timings)
+            if "delta" not in data_to_send:
                 await asyncio.sleep(0.01)
+    finally:
+        if ticket is not None:
+            admission.release(ticket)
+        # Client déconnecté (Starlette annule ce générateur) : désabonnement immédiat, sans attendre le ramasse-miettes.
+        # Sans autre abonné, l'exécution partagée est annulée après CANCEL_GRACE_SECONDS.
+        if events is not None:
+            await events.aclose()
+
+# --- Jobs en arrière-plan : le pipeline ne dépend plus de la connexion HTTP du client ---
+
+async def run_job(request: dict):
+    """Exécute le graphe pour un job ; les événements sont déjà filtrés pour le client."""
+    include_transcript = bool(request.get("include_transcript", False))
+    include_timings = bool(request.get("include_timings", False))
+    async with admitted(request):
+        async for event in graph_events(request):
+            yield public_event(event, include_transcript, include_timings)
+
+job_queue = JobQueue(
+    JobStore(Config.JOBS_DB_PATH), run_job, workers=Config.JOB_WORKERS, max_queued=Config.JOB_QUEUE_MAX,
+    heartbeat_interval=Config.JOB_HEARTBEAT_SECONDS,
+)
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Graphe LangGraph construit en arrière-plan : le port s'ouvre sans attendre son import
+    warm_up = asyncio.create_task(asyncio.to_thread(get_graph))
+    await job_queue.start(retention=Config.JOB_RETENTION)
+    yield
+    await job_queue.stop()
+    await asyncio.gather(warm_up, return_exceptions=True)
+
+app = FastAPI(lifespan=lifespan)
+
+# Le reste du fichier est inchangé
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
 
 @app.api_route('/summarize', methods=["GET", "POST"])
 async def summarize(req: Request):
@@ -63,7 +290,237 @@ async def summarize(req: Request):
     if req.method == "POST":
         try:
             body = await req.json()
-            return StreamingResponse(stream_generator(body), media_type="text/event-stream")
         except json.JSONDecodeError:
             return JSONResponse({"error": "Invalid JSON in request body"}, status_code=400)
-    return JSONResponse({"error": "Method not allowed"}, status_code=405)
\ No newline at end of file
+        ticket = None
+        if Config.ADMISSION_ENABLED:
+            # Refus immédiat (avant d'ouvrir le flux) plutôt qu'une attente sans fin quand le serveur est saturé
+            try:
+                ticket = admission.enter(client_identity(req), admission.weight_for(await admission_units(body)))
+            except AdmissionRejected as e:
+                return JSONResponse({"error": str(e)}, status_code=e.status_code, headers={"Retry-After": str(e.retry_after)})
+        generator = stream_generator(body, ticket)
+        if ticket is not None:
+            # Client parti avant le début du flux : le générateur n'a jamais tourné, son `finally` non plus
+            weakref.finalize(generator, admission.release, ticket)
+        return StreamingResponse(generator, media_type="text/event-stream")
+    return JSONResponse({"error": "Method not allowed"}, status_code=405)
+
+@app.get('/transcript/{video_id}')
+async def transcript(video_id: str):
+    """Transcription déjà récupérée d'une vidéo (servie depuis le stockage local, jamais via le réseau)."""
+    stored = await asyncio.to_thread(get_video_segments, video_id)
+    if stored is None:
+        return JSONResponse({"error": "Transcript not available for this video."}, status_code=404)
+    return {"video_id": video_id, "language_code": stored.language_code, "transcript": stored.text}
+
+@app.get('/metrics')
+async def metrics():
+    """Métriques Prometheus : latence par nœud et par appel LLM, tokens, nouvelles tentatives, caches."""
+    if not METRICS_ENABLED:
+        return JSONResponse({"error": "prometheus_client is not installed."}, status_code=501)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get('/stats')
+async def stats():
+    """Compteurs du processus : caches, coalescence des requêtes, traductions évitées, budget des clés API et pools de clients."""
+    # Importé avec le graphe, pas au démarrage (prompts LangChain)
+    from src.translation import TRANSLATION_STATS
+
+    cache = get_summary_cache()
+    map_cache = get_map_cache()
+    checked = TRANSLATION_STATS["checked"]
+    return {
+        "summary_cache": dict(cache.stats) if cache is not None else None,
+        "map_cache": dict(map_cache.stats) if map_cache is not None else None,
+        "inflight_runs": dict(inflight_runs.stats),
+        "transcript_fetches": {
+            "sync": dict(video_tools._transcript_flight.stats),
+            "async": dict(video_tools._async_transcript_flight.stats),
+            "hedged": video_tools.transcript_fetcher.snapshot(),
+        },
+        "translation": {
+            **TRANSLATION_STATS,
+            "skip_rate": round(TRANSLATION_STATS["skipped"] / checked, 3) if checked else None,
+        },
+        "api_keys": await asyncio.to_thread(key_scheduler.snapshot),
+        "client_pools": {
+            "llm": llm_pool.snapshot(),
+            "youtube": video_tools.transcript_client_pool.snapshot(),
+        },
+        "jobs": {**job_queue.stats, "queued": job_queue.queued},
+        "cancellations": dict(CANCELLATION_STATS),
+        "admission": admission.snapshot(),
+        "worker": {"id": PROCESS_ID, "shared_state": Config.SHARED_STATE_ENABLED},
+    }
+
+class JobRequest(SummarizeRequest):
+    priority: int = 0
+
+def job_view(job: dict) -> dict:
+    """Représentation publique d'un job (sans la requête d'origine ni l'identité du client)."""
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "priority": job["priority"],
+        "queue_position": job_queue.position(job["job_id"]),
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "events_url": f"/jobs/{job['job_id']}/events",
+    }
+
+@app.post('/jobs', status_code=202)
+async def create_job(body: JobRequest, req: Request):
+    """Met un résumé en file d'attente et retourne immédiatement l'identifiant du job."""
+    # Équité entre clients : identifiant fourni par le client, sinon celui du contrôle d'admission
+    client_id = req.headers.get("x-client-id") or client_identity(req)
+    request = body.model_dump() if hasattr(body, "model_dump") else body.dict()
+    priority = max(0, min(Config.JOB_MAX_PRIORITY, request.pop("priority")))
+    try:
+        if Config.ADMISSION_ENABLED:
+            admission.take_rate(client_identity(req))
+        job = job_queue.submit(request, client_id, priority)
+    except AdmissionRejected as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code, headers={"Retry-After": str(e.retry_after)})
+    except JobQueueFull as e:
+        return JSONResponse({"error": str(e)}, status_code=503, headers={"Retry-After": "30"})
+    return job_view(job)
+
+@app.get('/jobs/{job_id}')
+async def get_job(job_id: str):
+    job = job_queue.store.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found."}, status_code=404)
+    return job_view(job)
+
+@app.get('/jobs/{job_id}/events')
+async def job_events(job_id: str, req: Request, last_event_id: str = ""):
+    """
+    Flux SSE des événements du job. Chaque trame porte un `id:` ; un client qui se reconnecte
+    avec l'en-tête `Last-Event-ID` (ou `?last_event_id=`) ne reçoit que la suite.
+    """
+    if job_queue.store.get(job_id) is None:
+        return JSONResponse({"error": "Job not found."}, status_code=404)
+    after = parse_event_id(req.headers.get("last-event-id", "") or last_event_id)
+
+    async def event_stream():
+        async for event_id, payload in job_queue.events(job_id, after):
+            yield f"id: {event_id}\ndata: {payload}\n\n".encode("utf-8")
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+# --- Résumés par lot : listes d'URLs et playlists, un résultat par vidéo dès qu'il est prêt ---
+
+class BatchRequest(BaseModel):
+    youtube_urls: List[str] = []
+    playlist: Optional[str] = None  # URL ou identifiant de playlist
+    language: str = "english"
+    summary_length: str = "standard"
+    include_transcript: bool = False
+    include_timings: bool = False
+    format: str = "ndjson"  # "ndjson" ou "sse"
+
+def batch_concurrency() -> int:
+    """Exécutions du graphe simultanées pour tous les lots : BATCH_RUNS_PER_KEY par clé API, plafonnées."""
+    return max(1, min(Config.BATCH_MAX_CONCURRENCY, Config.BATCH_RUNS_PER_KEY * max(1, len(Config.GROQ_API_KEYS))))
+
+async def summarize_item(request: dict) -> dict:
+    """Exécute le graphe pour une vidéo du lot et retourne son état public final."""
+    include_transcript = bool(request.get("include_transcript", False))
+    include_timings = bool(request.get("include_timings", False))
+    state: dict = {}
+    async with get_loop_semaphore("batch_runs", batch_concurrency()), admitted(request):
+        async for event in graph_events(request):
+            if "data" in event:
+                state.update(public_event(event, include_transcript, include_timings)["data"])
+    result = {key: state[key] for key in ("summary", "error_message", "cache_hit", "translation_skipped", "transcript", "timings") if key in state}
+    result["status"] = "error" if result.get("error_message") or not result.get("summary") else "done"
+    return result
+
+async def batch_events(items: List[dict], invalid: List[dict], request: dict):
+    """
+    Événements d'un lot : "start", puis un "item" par vidéo distincte dans l'ordre d'achèvement, puis "done".
+    Les doublons ne sont résumés qu'une fois (leurs index sont regroupés dans le même résultat).
+    """
+    yield {"type": "start", "videos": len(items), "invalid": len(invalid), "concurrency": batch_concurrency()}
+    for item in invalid:
+        yield {"type": "item", **item, "status": "error", "error_message": "Invalid YouTube URL."}
+
+    async def run(item: dict) -> dict:
+        try:
+            outcome = await summarize_item({**request, "youtube_url": item["youtube_url"]})
+        except Exception as e:
+            print(f"❌ Batch item {item['video_id']} failed: {e}")
+            outcome = {"status": "error", "error_message": f"An unexpected error occurred: {e}"}
+        return {"type": "item", **item, **outcome}
+
+    tasks = [asyncio.create_task(run(item)) for item in items]
+    summarized = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            summarized += result["status"] == "done"
+            yield result
+    finally:
+        # Client déconnecté : les vidéos pas encore traitées ne sont pas lancées
+        for task in tasks:
+            task.cancel()
+    yield {"type": "done", "videos": len(items), "summarized": summarized, "failed": len(items) - summarized + len(invalid)}
+
+@app.post('/summarize/batch')
+async def summarize_batch(body: BatchRequest, req: Request):
+    """
+    Résume une liste de vidéos et/ou une playlist. Les vidéos en double ne sont traitées qu'une fois,
+    les exécutions partagent les caches (transcriptions, résumés) et sont limitées globalement
+    et par clé API. Chaque résultat est envoyé dès qu'il est prêt, en NDJSON ou en SSE.
+    """
+    if body.format not in ("ndjson", "sse"):
+        return JSONResponse({"error": "format must be 'ndjson' or 'sse'."}, status_code=400)
+    if Config.ADMISSION_ENABLED:
+        # Un lot compte pour une requête du client ; chaque vidéo attend ensuite la capacité globale
+        try:
+            admission.take_rate(client_identity(req))
+        except AdmissionRejected as e:
+            return JSONResponse({"error": str(e)}, status_code=e.status_code, headers={"Retry-After": str(e.retry_after)})
+
+    sources = [(url, extract_video_id(url)) for url in body.youtube_urls]
+    if body.playlist:
+        playlist_id = extract_playlist_id(body.playlist)
+        if not playlist_id:
+            return JSONResponse({"error": "Invalid playlist URL or id."}, status_code=400)
+        video_ids, error = await asyncio.to_thread(get_playlist_video_ids, playlist_id)
+        if error:
+            return JSONResponse({"error": error}, status_code=502)
+        sources += [(f"https://www.youtube.com/watch?v={video_id}", video_id) for video_id in video_ids]
+
+    items: Dict[str, dict] = {}
+    invalid = []
+    for index, (url, video_id) in enumerate(sources):
+        if not video_id:
+            invalid.append({"indexes": [index], "youtube_url": url, "video_id": None})
+        elif video_id in items:
+            items[video_id]["indexes"].append(index)
+        else:
+            items[video_id] = {"indexes": [index], "youtube_url": url, "video_id": video_id}
+    if not items and not invalid:
+        return JSONResponse({"error": "Provide youtube_urls and/or a playlist."}, status_code=400)
+    if len(items) > Config.BATCH_MAX_ITEMS:
+        return JSONResponse({"error": f"Too many videos ({len(items)}); the limit is {Config.BATCH_MAX_ITEMS} per batch."}, status_code=413)
+
+    request = body.model_dump() if hasattr(body, "model_dump") else body.dict()
+    print(f"📦 Batch: {len(items)} videos ({len(sources) - len(items) - len(invalid)} duplicates, {len(invalid)} invalid).")
+    events = batch_events(list(items.values()), invalid, request)
+
+    if body.format == "sse":
+        async def stream():
+            async for event in events:
+                yield b"data: " + dumps(event) + b"\n\n"
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    async def stream_ndjson():
+        async for event in events:
+            yield dumps(event) + b"\n"
+    return StreamingResponse(stream_ndjson(), media_type="application/x-ndjson")
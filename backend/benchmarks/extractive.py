@@ -0,0 +1,199 @@
+# /backend/benchmarks/extractive.py
+"""
+Benchmark de la pré-compression extractive (src/extractive.py) des résumés brefs et courts :
+chemin complet (map-reduce sur toute la transcription) contre extraits locaux + un seul appel direct.
+
+    python benchmarks/extractive.py                               # hors ligne : faux LLM, transcriptions thématiques
+    python benchmarks/extractive.py --sizes 50000,500000 --llm-latency 0.5 --summary-length short
+    python benchmarks/extractive.py --videos <id>,<id>            # vraies vidéos et vrai LLM (GROQ_API_KEYS)
+
+Rapporte, par transcription et par chemin : latence, appels LLM, tokens de prompt, temps de la sélection
+locale, et une mesure de qualité :
+- hors ligne, la part des thèmes de la transcription présents dans le texte envoyé au LLM
+  (le chemin complet les voit tous). C'est une borne : un thème absent des extraits manquera au résumé,
+  mais un thème présent n'y figurera pas forcément. Le faux LLM ne dit rien de la qualité du résumé ;
+- avec --videos, l'accord ROUGE-1 (F1) du résumé extractif avec celui du chemin complet.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ("full", "extractive")
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Environnement isolé, à fixer avant le premier import de `config`."""
+    os.environ["ZENYTH_DATA_DIR"] = tempfile.mkdtemp(prefix="zenyth-bench-")
+    # Chaque chemin part de zéro : pas de sorties map en cache d'une mesure à l'autre
+    os.environ["MAP_CACHE_ENABLED"] = "false"
+    if not args.videos:
+        os.environ["GROQ_API_KEYS"] = ",".join(f"bench-key-{index}" for index in range(args.keys))
+        os.environ["TRANSCRIPT_STORE_ENABLED"] = "false"
+        os.environ.setdefault("TOKENIZER_ENCODING", args.tokenizer)
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def topical_transcript(chars: int, topics: int, seed: int) -> Tuple[str, List[List[str]]]:
+    """
+    Transcription synthétique : des sections de longueurs inégales, chacune sur un thème (mots propres
+    au thème mêlés à un vocabulaire commun), dans le désordre, certains thèmes revenant plus loin.
+    Retourne (texte, mots propres à chaque thème).
+    """
+    rng = random.Random(seed)
+    common = [f"word{index}" for index in range(400)]
+    topic_words = [[f"topic{topic}term{index}" for index in range(30)] for topic in range(topics)]
+    # Poids de Zipf : quelques thèmes dominent, d'autres ne durent que quelques phrases
+    weights = [1.0 / (rank + 1) for rank in range(topics)]
+    sentences: List[str] = []
+    size = 0
+    while size < chars:
+        topic = rng.choices(range(topics), weights)[0]
+        for _ in range(rng.randint(3, 12)):
+            words = rng.sample(topic_words[topic], 4) + rng.sample(common, 8)
+            rng.shuffle(words)
+            sentence = " ".join(words).capitalize() + "."
+            sentences.append(sentence)
+            size += len(sentence) + 1
+    return " ".join(sentences)[:chars], topic_words
+
+
+def topic_coverage(text: str, transcript: str, topic_words: List[List[str]]) -> float:
+    """Part des thèmes de la transcription dont au moins un mot propre figure dans `text`."""
+    def topics(source: str) -> List[int]:
+        present = set(re.findall(r"topic\d+term\d+", source))
+        return [topic for topic, words in enumerate(topic_words) if present.intersection(words)]
+
+    expected = topics(transcript)
+    return len(set(topics(text)) & set(expected)) / max(1, len(expected))
+
+
+def rouge1_f1(candidate: str, reference: str) -> float:
+    tokens = lambda text: Counter(re.findall(r"\w+", text.lower()))
+    a, b = tokens(candidate), tokens(reference)
+    overlap = sum((a & b).values())
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / sum(a.values()), overlap / sum(b.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+async def run_path(path: str, transcript: str, video_id: Optional[str], args: argparse.Namespace) -> Dict[str, Any]:
+    """Un résumé par le chemin demandé ; l'étape extractive est activée ou non pour cette longueur."""
+    from config import Config
+    from src.metrics import llm_usage
+    from src.summarize import asummarize_text, split_transcript
+
+    Config.EXTRACTIVE_LENGTHS = [args.summary_length] if path == "extractive" else []
+    started = time.perf_counter()
+    chunks = split_transcript(transcript, video_id, args.summary_length)
+    local_seconds = time.perf_counter() - started
+
+    usage = {"llm_calls": 0, "llm_seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+    token = llm_usage.set(usage)
+    started = time.perf_counter()
+    try:
+        summary, error = await asummarize_text(transcript, args.language, args.summary_length, video_id)
+    finally:
+        llm_usage.reset(token)
+    return {
+        "path": path,
+        "ok": error is None,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        "local_ms": round(local_seconds * 1000, 1) if path == "extractive" else 0.0,
+        "chunks": len(chunks),
+        "llm_calls": usage["llm_calls"],
+        "prompt_tokens": usage["prompt_tokens"],
+        "llm_input": " ".join(chunks),
+        "summary": summary or "",
+        "error": error,
+    }
+
+
+async def compare(transcript: str, video_id: Optional[str], label: str, args: argparse.Namespace,
+                  topic_words: Optional[List[List[str]]] = None) -> List[Dict[str, Any]]:
+    results = [await run_path(path, transcript, video_id, args) for path in PATHS]
+    for result in results:
+        result["transcript"] = label
+        if topic_words is not None:
+            result["quality"] = round(topic_coverage(result["llm_input"], transcript, topic_words), 3)
+        else:
+            result["quality"] = round(rouge1_f1(result["summary"], results[0]["summary"]), 3)
+    return results
+
+
+def print_table(results: List[Dict[str, Any]], quality: str) -> None:
+    columns = ["transcript", "path", "latency_ms", "local_ms", "chunks", "llm_calls", "prompt_tokens", "quality"]
+    headers = [quality if column == "quality" else column for column in columns]
+    widths = [max(len(header), *(len(str(result[column])) for result in results)) for column, header in zip(columns, headers)]
+    print("  ".join(header.rjust(width) for header, width in zip(headers, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).rjust(width) for column, width in zip(columns, widths)))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Extractive pre-compression vs. full map-reduce for short summaries.")
+    parser.add_argument("--sizes", default="20000,100000,500000", help="synthetic transcript sizes in characters (offline)")
+    parser.add_argument("--topics", type=int, default=12, help="topics per synthetic transcript (offline)")
+    parser.add_argument("--videos", default="", help="comma-separated YouTube ids: real transcripts and real LLM calls")
+    parser.add_argument("--summary-length", default="brief", choices=["brief", "short", "standard", "detailed", "comprehensive"])
+    parser.add_argument("--language", default="english")
+    parser.add_argument("--keys", type=int, default=4, help="number of (fake) API keys (offline)")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds before the first token (offline)")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds per output token (offline)")
+    parser.add_argument("--max-chunk-tokens", type=int, default=0, help="MAX_CHUNK_TOKENS for both paths (0 = the configured default)")
+    parser.add_argument("--tokenizer", default="none", help="tiktoken encoding, or 'none' for the offline estimate")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the pipeline logs")
+    args = parser.parse_args()
+    args.videos = [video.strip() for video in args.videos.split(",") if video.strip()]
+
+    configure_environment(args)
+    if args.max_chunk_tokens:
+        os.environ["MAX_CHUNK_TOKENS"] = str(args.max_chunk_tokens)
+    if not args.videos:
+        from fakes import install_fakes
+
+        install_fakes(args.llm_latency, args.token_latency)
+
+    results: List[Dict[str, Any]] = []
+    log_sink = sys.stdout if args.verbose else open(os.devnull, "w")
+    if args.videos:
+        from src.video_tools import get_video_transcript
+
+        for video_id in args.videos:
+            with contextlib.redirect_stdout(log_sink):
+                transcript, error = get_video_transcript(video_id)
+                if error:
+                    print(f"❌ {video_id}: {error}", file=sys.stderr)
+                    continue
+                results.extend(asyncio.run(compare(transcript, video_id, video_id, args)))
+    else:
+        for index, size in enumerate(int(size) for size in args.sizes.split(",") if size.strip()):
+            transcript, topic_words = topical_transcript(size, args.topics, seed=index)
+            with contextlib.redirect_stdout(log_sink):
+                results.extend(asyncio.run(compare(transcript, None, f"{size:,} chars", args, topic_words)))
+
+    for result in results:
+        if not result["ok"]:
+            print(f"❌ {result['transcript']} ({result['path']}): {result['error']}")
+    quality = "rouge1_vs_full" if args.videos else "input_topic_coverage"
+    print_table(results, quality)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            report = [{key: value for key, value in result.items() if key != "llm_input"} for result in results]
+            json.dump({"settings": vars(args), "quality_metric": quality, "results": report}, f, indent=2)
+    return 1 if any(not result["ok"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
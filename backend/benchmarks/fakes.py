@@ -0,0 +1,171 @@
+# /backend/benchmarks/fakes.py
+"""
+Doublures déterministes pour les benchmarks hors ligne.
+
+- `FakeChatModel` : modèle de chat à latence configurable (appel direct et streaming), sortie stable.
+- `FakeTranscriptApi` : remplace YouTubeTranscriptApi ; la taille de la transcription se lit dans
+  l'identifiant de la vidéo (ex. "b500000x3" → ~500 000 caractères, vidéo n°3).
+- `install_fakes()` : branche les deux derrière `create_llm_instance` et `_get_api_client`.
+
+À importer après avoir configuré l'environnement (clés, cache) et ajouté `backend/` au sys.path.
+"""
+import asyncio
+import hashlib
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_VOCABULARY = (
+    "the model learns from data and every layer of the network transforms its input into a richer "
+    "representation so that attention can relate distant tokens while training minimizes the loss "
+    "over many examples gradient descent updates the weights with a small learning rate and we "
+    "evaluate on held out benchmarks to measure accuracy latency memory throughput cost quality "
+    "users ask questions about history science cooking travel music finance health sport climate "
+    "energy policy startups design research experiments results conclusions ideas examples"
+).split()
+_VIDEO_SIZE = re.compile(r"^b(\d+)")
+DEFAULT_TRANSCRIPT_CHARS = 10_000
+
+# Compteur global des appels LLM (toutes instances confondues)
+_llm_calls = 0
+_llm_calls_lock = threading.Lock()
+
+
+def llm_calls() -> int:
+    return _llm_calls
+
+
+def reset_llm_calls() -> None:
+    global _llm_calls
+    with _llm_calls_lock:
+        _llm_calls = 0
+
+
+def _words(seed: str, count: int) -> List[str]:
+    rng = random.Random(hashlib.sha256(seed.encode("utf-8")).hexdigest())
+    return [rng.choice(_VOCABULARY) for _ in range(count)]
+
+
+class FakeChatModel(BaseChatModel):
+    """Modèle de chat déterministe : `latency` secondes avant le premier token, puis `token_latency` par token."""
+
+    latency: float = 0.05
+    token_latency: float = 0.0
+    output_words: int = 120
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _count_call(self) -> None:
+        global _llm_calls
+        with _llm_calls_lock:
+            _llm_calls += 1
+
+    def _output(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = "".join(str(message.content) for message in messages)
+        words = _words(prompt[-2000:], self.output_words)
+        # Un peu de Markdown, comme un vrai résumé
+        return ["## Summary\n\n", "- **" + words[0] + "** "] + [word + " " for word in words[1:]]
+
+    def _usage(self, messages: List[BaseMessage], output: List[str]) -> Dict[str, int]:
+        prompt_tokens = sum(len(str(message.content)) for message in messages) // 4
+        output_tokens = len(output)
+        return {"input_tokens": prompt_tokens, "output_tokens": output_tokens, "total_tokens": prompt_tokens + output_tokens}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._count_call()
+        output = self._output(messages)
+        time.sleep(self.latency + self.token_latency * len(output))
+        message = AIMessage(content="".join(output), usage_metadata=self._usage(messages, output))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._count_call()
+        output = self._output(messages)
+        await asyncio.sleep(self.latency + self.token_latency * len(output))
+        message = AIMessage(content="".join(output), usage_metadata=self._usage(messages, output))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        result = self._generate(messages, stop, run_manager, **kwargs)
+        yield ChatGenerationChunk(message=AIMessageChunk(content=result.generations[0].message.content))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        self._count_call()
+        output = self._output(messages)
+        await asyncio.sleep(self.latency)
+        for index, piece in enumerate(output):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            usage = self._usage(messages, output) if index == len(output) - 1 else None
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece, usage_metadata=usage))
+
+
+# --- Transcriptions factices (même interface que youtube_transcript_api) ---
+
+class FakeTranscript:
+    def __init__(self, video_id: str, latency: float):
+        self.video_id = video_id
+        self.language_code = "en"
+        self.is_generated = True
+        self.latency = latency
+
+    def fetch(self):
+        from youtube_transcript_api._transcripts import FetchedTranscriptSnippet
+
+        time.sleep(self.latency)
+        match = _VIDEO_SIZE.match(self.video_id)
+        target_chars = int(match.group(1)) if match else DEFAULT_TRANSCRIPT_CHARS
+        # ~6 caractères par mot, segments de 12 mots toutes les 4 secondes
+        words = _words(self.video_id, max(12, target_chars // 6))
+        return [
+            FetchedTranscriptSnippet(text=" ".join(words[index:index + 12]) + ".", start=index / 3.0, duration=4.0)
+            for index in range(0, len(words), 12)
+        ]
+
+
+class FakeTranscriptList:
+    def __init__(self, video_id: str, latency: float):
+        self._transcript = FakeTranscript(video_id, latency)
+
+    def find_transcript(self, language_codes):
+        return self._transcript
+
+    def __iter__(self):
+        return iter([self._transcript])
+
+
+class FakeTranscriptApi:
+    """Remplace YouTubeTranscriptApi : `list(video_id)` attend `latency` secondes (requête réseau simulée)."""
+
+    def __init__(self, latency: float = 0.02):
+        self.latency = latency
+
+    def list(self, video_id: str) -> FakeTranscriptList:
+        time.sleep(self.latency)
+        return FakeTranscriptList(video_id, self.latency)
+
+
+def install_fakes(llm_latency: float = 0.05, token_latency: float = 0.0, output_words: int = 120,
+                  transcript_latency: float = 0.02) -> None:
+    """Branche le faux LLM derrière `create_llm_instance` et les fausses transcriptions derrière `_get_api_client`."""
+    import config
+    import src.video_tools as video_tools
+
+    def create_llm_instance(api_key: Optional[str] = None, **kwargs) -> FakeChatModel:
+        from src.metrics import LLMMetricsHandler
+
+        return FakeChatModel(
+            latency=llm_latency, token_latency=token_latency, output_words=output_words,
+            callbacks=[LLMMetricsHandler(api_key or "", "fake-benchmark")],
+        )
+
+    config.create_llm_instance = create_llm_instance
+    fake_api = FakeTranscriptApi(transcript_latency)
+    video_tools._get_api_client = lambda route="direct": fake_api
@@ -0,0 +1,243 @@
+# /backend/benchmarks/hedged_fetch.py
+"""
+Banc d'essai des tentatives couvertes et du disjoncteur (src/hedged_fetch.py), contre un faux serveur HTTP
+local (aucun accès à YouTube) :
+
+    python benchmarks/hedged_fetch.py                              # les deux scénarios
+    python benchmarks/hedged_fetch.py --scenario hedge --fetches 400 --slow-fraction 0.05 --tail 2.0
+    python benchmarks/hedged_fetch.py --scenario breaker --threshold 3 --reset-after 1.5
+
+Routes du serveur :
+- `/slow/<clé>` : répond en `--base-latency` secondes, sauf une fraction `--slow-fraction` des requêtes
+  qui attendent `--tail` secondes (route bloquée par moments) ;
+- `/flaky/<clé>` : 503 tant que le serveur est en panne, sinon comme une route normale.
+
+Scénarios :
+- `hedge` : latences p50/p95/p99 sur deux routes lentes par moments, sans couverture (une tentative à la fois)
+  puis avec ; rapporte les tentatives couvertes lancées et gagnées.
+- `breaker` : la route tombe en panne puis se rétablit ; affiche chaque changement d'état du disjoncteur
+  (fermé → ouvert → semi-ouvert → fermé) et les requêtes qu'il a épargnées au serveur.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeServer(ThreadingHTTPServer):
+    """Faux serveur : latence de queue sur /slow, pannes à la demande sur /flaky."""
+
+    daemon_threads = True
+
+    def __init__(self, base_latency: float, slow_fraction: float, tail: float, seed: int):
+        super().__init__(("127.0.0.1", 0), FakeHandler)
+        self.base_latency = base_latency
+        self.slow_fraction = slow_fraction
+        self.tail = tail
+        self.failing = threading.Event()
+        self.hits: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def delay(self, route: str) -> float:
+        with self._lock:
+            self.hits[route] = self.hits.get(route, 0) + 1
+            slow = route == "slow" and self._random.random() < self.slow_fraction
+            jitter = self._random.uniform(0.8, 1.2)
+        return self.tail if slow else self.base_latency * jitter
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        route = self.path.strip("/").split("/")[0]
+        server: FakeServer = self.server
+        time.sleep(server.delay(route))
+        if route == "flaky" and server.failing.is_set():
+            self.send_error(503, "Blocked")
+        else:
+            body = json.dumps({"route": route, "key": self.path}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def make_attempt(server: FakeServer):
+    def attempt(key: str, route: str) -> Dict[str, Any]:
+        with urllib.request.urlopen(f"{server.url}/{route}/{key}", timeout=30) as response:
+            return json.loads(response.read())
+    return attempt
+
+
+def is_final(error: BaseException) -> bool:
+    # 404 : la ressource n'existe pas, une autre route n'y changerait rien (jamais renvoyé par le faux serveur)
+    return isinstance(error, urllib.error.HTTPError) and error.code == 404
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_hedge(server: FakeServer, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Mêmes requêtes sur deux routes lentes par moments, sans puis avec tentatives couvertes."""
+    from src.hedged_fetch import HedgedFetcher
+
+    results = []
+    for label, parallel in (("no hedging", 1), ("hedged", 2)):
+        fetcher = HedgedFetcher(
+            f"bench-{parallel}", make_attempt(server), is_final, max_attempts=2, max_parallel=parallel,
+            hedge_delay=(args.hedge_delay, args.hedge_min_delay, args.tail), workers=2 * args.concurrency,
+        )
+        latencies: List[float] = []
+        errors = 0
+
+        def one(index: int) -> None:
+            nonlocal errors
+            started = time.perf_counter()
+            try:
+                fetcher.fetch(f"video{index}", ["slow", "slow"])
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(one, range(args.fetches)))
+        stats = fetcher.snapshot()
+        results.append({
+            "mode": label,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+            "attempts": stats["attempts"],
+            "hedges": stats["hedges"],
+            "hedge_wins": stats["hedge_wins"],
+            "hedge_delay_ms": round(stats["hedge_delay"] * 1000, 1),
+            "errors": errors,
+        })
+    return results
+
+
+def run_breaker(server: FakeServer, args: argparse.Namespace) -> Dict[str, Any]:
+    """Une requête toutes les `--interval` secondes ; la route est en panne pendant `--outage` secondes."""
+    from src.hedged_fetch import CircuitBreaker, CircuitOpenError, HedgedFetcher
+
+    breaker = CircuitBreaker("bench", threshold=args.threshold, reset_after=args.reset_after)
+    fetcher = HedgedFetcher("bench-breaker", make_attempt(server), is_final, max_attempts=1, breaker=breaker)
+    outcomes = {"ok": 0, "failed": 0, "rejected": 0}
+    transitions: List[Tuple[float, str, str]] = []  # (instant, état avant, état après), disjoncteur ou route
+    state = breaker.state
+    server.failing.set()
+    started = time.perf_counter()
+    hits_before = server.hits.get("flaky", 0)
+
+    def observe(now: float) -> None:
+        nonlocal state
+        if breaker.state != state:
+            transitions.append((now, state, breaker.state))
+            state = breaker.state
+
+    while time.perf_counter() - started < args.outage + 2 * args.reset_after:
+        now = time.perf_counter() - started
+        if server.failing.is_set() and now >= args.outage:
+            server.failing.clear()
+            transitions.append((now, "route down", "route up"))
+        observe(now)
+        try:
+            fetcher.fetch("video", ["flaky"])
+            outcomes["ok"] += 1
+        except CircuitOpenError:
+            outcomes["rejected"] += 1
+        except urllib.error.HTTPError:
+            outcomes["failed"] += 1
+        observe(time.perf_counter() - started)
+        time.sleep(args.interval)
+
+    return {
+        **outcomes,
+        "requests_sent": server.hits.get("flaky", 0) - hits_before,
+        "opened": breaker.stats["opened"],
+        "final_state": breaker.state,
+        "transitions": [{"t": round(at, 2), "from": before, "to": after} for at, before, after in transitions],
+    }
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    columns = ["mode", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "attempts", "hedges", "hedge_wins", "hedge_delay_ms", "errors"]
+    widths = [max(len(column), *(len(str(result[column])) for result in results)) for column in columns]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).rjust(width) for column, width in zip(columns, widths)))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Hedged requests and circuit breaker against a local fake HTTP server.")
+    parser.add_argument("--scenario", choices=["hedge", "breaker", "both"], default="both")
+    parser.add_argument("--fetches", type=int, default=200, help="fetches per mode (hedge)")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent fetches (hedge)")
+    parser.add_argument("--base-latency", type=float, default=0.03, help="usual response time in seconds")
+    parser.add_argument("--slow-fraction", type=float, default=0.03, help="share of /slow requests that stall")
+    parser.add_argument("--tail", type=float, default=1.0, help="response time of a stalled request in seconds")
+    parser.add_argument("--hedge-delay", type=float, default=0.2, help="hedge delay until enough latencies are known")
+    parser.add_argument("--hedge-min-delay", type=float, default=0.02, help="lower bound of the learned hedge delay")
+    parser.add_argument("--threshold", type=int, default=3, help="consecutive failures that open the breaker")
+    parser.add_argument("--reset-after", type=float, default=1.0, help="seconds before the breaker lets a probe through")
+    parser.add_argument("--outage", type=float, default=2.0, help="seconds the /flaky route stays down (breaker)")
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between two fetches (breaker)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the fetcher logs")
+    args = parser.parse_args()
+    sys.path.insert(0, BACKEND_DIR)
+
+    server = FakeServer(args.base_latency, args.slow_fraction, args.tail, args.seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    report: Dict[str, Any] = {"settings": vars(args)}
+    # Les messages de chaque tentative échouée noient le rapport
+    log_sink = sys.stdout if args.verbose else open(os.devnull, "w")
+    try:
+        if args.scenario in ("hedge", "both"):
+            with contextlib.redirect_stdout(log_sink):
+                report["hedge"] = run_hedge(server, args)
+            print_table(report["hedge"])
+            print()
+        if args.scenario in ("breaker", "both"):
+            with contextlib.redirect_stdout(log_sink):
+                report["breaker"] = breaker = run_breaker(server, args)
+            for transition in breaker["transitions"]:
+                print(f"🔌 t={transition['t']:5.2f}s  {transition['from']} → {transition['to']}")
+            print(f"✅ {breaker['ok']} ok, ❌ {breaker['failed']} failed, ⛔ {breaker['rejected']} rejected by the open "
+                  f"breaker; {breaker['requests_sent']} requests reached the server, final state '{breaker['final_state']}'.")
+    finally:
+        server.shutdown()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
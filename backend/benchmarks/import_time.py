@@ -0,0 +1,71 @@
+# /backend/benchmarks/import_time.py
+"""
+Budget de démarrage : mesure le temps d'import du module servi par uvicorn (`api` par défaut).
+
+    python benchmarks/import_time.py                   # médiane sur 5 imports à froid, budget 1000 ms
+    python benchmarks/import_time.py --budget-ms 800 --top 15
+
+Chaque mesure se fait dans un nouvel interpréteur. La médiane est comparée au budget (code de sortie 1 si dépassé),
+puis `python -X importtime` donne le détail des modules les plus coûteux (temps cumulé, imports inclus).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(module: str) -> float:
+    """Temps d'import (en secondes) de `module` dans un interpréteur neuf."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def import_breakdown(module: str) -> List[Tuple[int, int, str]]:
+    """Lignes (self µs, cumulé µs, module) de `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the backend import-time budget.")
+    parser.add_argument("--module", default="api")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_TIME_BUDGET_MS", 1000)))
+    parser.add_argument("--top", type=int, default=10, help="number of costliest modules to list")
+    args = parser.parse_args()
+
+    timings = [measure_import(args.module) * 1000 for _ in range(args.runs)]
+    median = statistics.median(timings)
+    print(f"import {args.module}: median {median:.0f} ms, min {min(timings):.0f} ms, max {max(timings):.0f} ms ({args.runs} runs)")
+
+    # Modules de premier niveau (dépendances directes) et les plus coûteux au total
+    rows = import_breakdown(args.module)
+    print(f"\nTop {args.top} modules by cumulative import time (python -X importtime):")
+    for self_us, cumulative_us, name in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {name}")
+
+    if median > args.budget_ms:
+        print(f"\n❌ Import time {median:.0f} ms exceeds the {args.budget_ms:.0f} ms budget.")
+        return 1
+    print(f"\n✅ Import time within the {args.budget_ms:.0f} ms budget.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
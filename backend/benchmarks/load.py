@@ -0,0 +1,199 @@
+# /backend/benchmarks/load.py
+"""
+Benchmark de charge hors ligne : graphe complet (`agent.py`) et endpoint SSE `/summarize`,
+avec un faux LLM et de fausses transcriptions (voir benchmarks/fakes.py). Aucun accès réseau.
+
+    python benchmarks/load.py                                  # graphe + SSE, tailles 1k → 500k caractères
+    python benchmarks/load.py --target sse --concurrency 16 --requests 64 --sizes 1000,100000
+    python benchmarks/load.py --llm-latency 0.2 --json results.json
+
+Rapporte, par cible et par taille de transcription : requêtes/s, latence p50/p95/p99,
+appels LLM par requête et pic de RSS du processus.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Environnement isolé, à fixer avant le premier import de `config`."""
+    os.environ["ZENYTH_DATA_DIR"] = tempfile.mkdtemp(prefix="zenyth-bench-")
+    os.environ["GROQ_API_KEYS"] = ",".join(f"bench-key-{index}" for index in range(args.keys))
+    os.environ["SUMMARY_CACHE_ENABLED"] = "true" if args.cache else "false"
+    os.environ["TRANSCRIPT_STORE_ENABLED"] = "true" if args.cache else "false"
+    # Un seul client (le benchmark) : pas de limite de débit par client, la capacité globale reste active
+    os.environ.setdefault("ADMISSION_RATE_PER_MINUTE", "0")
+    # Pas de téléchargement d'encodage tiktoken : estimation locale, sauf demande explicite
+    os.environ.setdefault("TOKENIZER_ENCODING", args.tokenizer)
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss est en kilo-octets sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def graph_inputs(video_id: str, language: str, summary_length: str) -> Dict[str, Any]:
+    return {
+        "youtube_url": f"https://youtu.be/{video_id}",
+        "language": language,
+        "summary_length": summary_length,
+        "video_id": None,
+        "transcript": None,
+        "intermediate_summary": None,
+        "summary": None,
+        "error_message": None,
+        "log": [],
+        "status_message": "Benchmark",
+        "step_progress": [],
+        "current_step": "Initialization",
+        "cache_key": None,
+        "cache_hit": False,
+        "translation_skipped": None,
+        "derived_from": None,
+        "translated_from": None,
+        "node_timings": [],
+        "timings": None,
+    }
+
+
+async def run_load(target: str, size: int, args: argparse.Namespace, run_index: int) -> Dict[str, Any]:
+    """Envoie `args.requests` requêtes (au plus `args.concurrency` à la fois) et mesure chacune."""
+    from fakes import llm_calls, reset_llm_calls
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    if target == "graph":
+        from agent import app as agent_graph
+
+        async def one(video_id: str) -> bool:
+            state = await agent_graph.ainvoke(graph_inputs(video_id, args.language, args.summary_length))
+            return bool(state.get("summary")) and not state.get("error_message")
+    else:
+        import httpx
+        import api
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://bench", timeout=None)
+
+        async def one(video_id: str) -> bool:
+            body = {"youtube_url": f"https://youtu.be/{video_id}", "language": args.language, "summary_length": args.summary_length}
+            summary = None
+            async with client.stream("POST", "/summarize", json=body) as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        data = json.loads(line[6:]).get("data") or {}
+                        if data.get("error_message"):
+                            return False
+                        summary = data.get("summary") or summary
+            return bool(summary)
+
+    async def measured(index: int) -> None:
+        nonlocal errors
+        # Vidéos distinctes (sauf --same-video) : pas de coalescence entre requêtes
+        video_id = f"b{size}x{run_index}r{0 if args.same_video else index}"
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                ok = await one(video_id)
+            except Exception as e:
+                print(f"❌ {target} request failed: {e}")
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += 0 if ok else 1
+
+    reset_llm_calls()
+    started = time.perf_counter()
+    await asyncio.gather(*(measured(index) for index in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    if target == "sse":
+        await client.aclose()
+
+    return {
+        "target": target,
+        "transcript_chars": size,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "rps": round(args.requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "llm_calls_per_request": round(llm_calls() / args.requests, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    columns = ["target", "transcript_chars", "rps", "p50_ms", "p95_ms", "p99_ms", "llm_calls_per_request", "peak_rss_mb", "errors"]
+    widths = [max(len(column), *(len(str(result[column])) for result in results)) for column in columns]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).rjust(width) for column, width in zip(columns, widths)))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline load benchmark for the summarization pipeline.")
+    parser.add_argument("--target", choices=["graph", "sse", "both"], default="both")
+    parser.add_argument("--sizes", default="1000,10000,100000,500000", help="transcript sizes in characters")
+    parser.add_argument("--requests", type=int, default=16, help="requests per target and size")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--keys", type=int, default=4, help="number of (fake) API keys")
+    parser.add_argument("--language", default="english")
+    parser.add_argument("--summary-length", default="standard")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds per output token")
+    parser.add_argument("--output-words", type=int, default=120)
+    parser.add_argument("--transcript-latency", type=float, default=0.02)
+    parser.add_argument("--same-video", action="store_true", help="all requests ask for the same video (coalescing)")
+    parser.add_argument("--cache", action="store_true", help="keep the summary cache and transcript store enabled")
+    parser.add_argument("--tokenizer", default="none", help="tiktoken encoding, or 'none' for the offline estimate")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the pipeline logs")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    from fakes import install_fakes
+
+    install_fakes(args.llm_latency, args.token_latency, args.output_words, args.transcript_latency)
+
+    targets = ["graph", "sse"] if args.target == "both" else [args.target]
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = []
+    # Les logs du pipeline (print) faussent les mesures et noient le rapport
+    log_sink = sys.stdout if args.verbose else open(os.devnull, "w")
+    for run_index, (target, size) in enumerate((target, size) for target in targets for size in sizes):
+        with contextlib.redirect_stdout(log_sink):
+            result = asyncio.run(run_load(target, size, args, run_index))
+        print(f"⏱️ {target} {size:,} chars: {result['rps']} req/s, p95 {result['p95_ms']} ms, "
+              f"{result['llm_calls_per_request']} LLM calls/request")
+        results.append(result)
+
+    print()
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+    return 1 if any(result["errors"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
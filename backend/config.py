@@ -3,11 +3,20 @@
 Configuration centralisée pour Zenyth
 """
 import os
-import itertools
+import asyncio
+import importlib.util
 import threading
-from typing import Optional, List, Dict
+import weakref
+from typing import TYPE_CHECKING, Optional, List, Dict, Tuple
+import httpx
 from pydantic import SecretStr
-from langchain_groq import ChatGroq
+from src.key_scheduler import KeyScheduler
+from src.shared_state import SharedKeyLedger
+from src.client_pool import ClientPool
+from src.metrics import LLMMetricsHandler
+
+if TYPE_CHECKING:  # langchain_groq (et le SDK groq) n'est importé qu'à la création du premier LLM
+    from langchain_groq import ChatGroq
 
 class Config:
     """Classe de configuration pour l'application Zenyth."""
@@ -20,7 +29,23 @@ class Config:
     # --- Configuration du proxy YouTube ---
     WEBSHARE_PROXY_USERNAME: Optional[str] = os.getenv("WEBSHARE_PROXY_USERNAME")
     WEBSHARE_PROXY_PASSWORD: Optional[str] = os.getenv("WEBSHARE_PROXY_PASSWORD")
-    WEBSHARE_RETRIES: int = 10
+    # Nouvelles IP par tentative ; au-delà, une autre tentative (couverte) prend le relais
+    WEBSHARE_RETRIES: int = int(os.getenv("WEBSHARE_RETRIES", 2))
+    # Autres proxies (http://user:pass@hôte:port), chacun une route de plus pour les tentatives
+    TRANSCRIPT_PROXY_URLS: List[str] = [url.strip() for url in os.getenv("TRANSCRIPT_PROXY_URLS", "").split(",") if url.strip()]
+    # Accès direct (sans proxy) en plus des proxies : en premier pour les vidéos déjà obtenues ainsi
+    TRANSCRIPT_DIRECT_FAST_PATH: bool = os.getenv("TRANSCRIPT_DIRECT_FAST_PATH", "false").lower() in ("1", "true", "yes")
+    TRANSCRIPT_PREFERRED_LANGUAGES: List[str] = ['fr', 'en']
+    TRANSCRIPT_FETCH_CONCURRENCY: int = int(os.getenv("TRANSCRIPT_FETCH_CONCURRENCY", 16))
+    # Tentatives couvertes (voir src/hedged_fetch.py) : une deuxième part si la première tarde (p95 des réussites)
+    TRANSCRIPT_MAX_ATTEMPTS: int = int(os.getenv("TRANSCRIPT_MAX_ATTEMPTS", 4))
+    TRANSCRIPT_HEDGE_PARALLEL: int = int(os.getenv("TRANSCRIPT_HEDGE_PARALLEL", 2))
+    TRANSCRIPT_HEDGE_DELAY: float = float(os.getenv("TRANSCRIPT_HEDGE_DELAY", 3.0))  # tant qu'il y a trop peu de mesures
+    TRANSCRIPT_HEDGE_MIN_DELAY: float = float(os.getenv("TRANSCRIPT_HEDGE_MIN_DELAY", 1.0))
+    TRANSCRIPT_HEDGE_MAX_DELAY: float = float(os.getenv("TRANSCRIPT_HEDGE_MAX_DELAY", 10.0))
+    # Disjoncteur : après N échecs d'affilée (blocages, réseau), plus de requête à YouTube pendant un moment
+    TRANSCRIPT_BREAKER_THRESHOLD: int = int(os.getenv("TRANSCRIPT_BREAKER_THRESHOLD", 6))
+    TRANSCRIPT_BREAKER_RESET_SECONDS: float = float(os.getenv("TRANSCRIPT_BREAKER_RESET_SECONDS", 60))
 
     # --- Configuration du Site ---
     SITE_URL: str = os.getenv("YOUR_SITE_URL", "https://tryzenyth.app")
@@ -30,11 +55,119 @@ class Config:
     DEFAULT_MODEL_NAME: str = "meta-llama/llama-4-scout-17b-16e-instruct"  # Modèle Groq par défaut
     DEFAULT_TEMPERATURE: float = 0.1
     DEFAULT_TIMEOUT: int = 1800 # Augmenté pour les longs résumés
+    # Fenêtres de contexte (en tokens) des modèles utilisés
+    MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+        "meta-llama/llama-4-scout-17b-16e-instruct": 131072,
+        "meta-llama/llama-4-maverick-17b-128e-instruct": 131072,
+        "llama-3.3-70b-versatile": 131072,
+        "llama-3.1-8b-instant": 131072,
+        "moonshotai/kimi-k2-instruct": 131072,
+    }
+    DEFAULT_CONTEXT_WINDOW: int = 8192
+    # Ordonnancement des clés : pause après un 429 sans `retry-after`, attente maximale d'une clé libre
+    KEY_COOLDOWN_SECONDS: float = float(os.getenv("KEY_COOLDOWN_SECONDS", 30))
+    KEY_WAIT_TIMEOUT: float = float(os.getenv("KEY_WAIT_TIMEOUT", 300))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", 2))
+    KEY_SWITCH_RETRIES: int = int(os.getenv("KEY_SWITCH_RETRIES", 3))  # nouvelles tentatives sur une autre clé après un 429
+
+    # --- Pools de clients (connexions keep-alive réutilisées entre les requêtes) ---
+    LLM_POOL_SIZE: int = int(os.getenv("LLM_POOL_SIZE", 32))  # instances ChatGroq gardées, par (clé, modèle, paramètres)
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")  # nécessite le paquet `h2`
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 60))
+    TRANSCRIPT_CLIENT_POOL_SIZE: int = int(os.getenv("TRANSCRIPT_CLIENT_POOL_SIZE", 64))  # un client YouTube par thread et par route
 
     # --- Configuration du Traitement de Texte ---
-    CHUNK_SIZE: int = 15000
-    CHUNK_OVERLAP: int = 750
-    
+    # Les morceaux sont remplis jusqu'à la fenêtre de contexte du modèle, moins le prompt et la sortie
+    TOKENIZER_ENCODING: str = os.getenv("TOKENIZER_ENCODING", "o200k_base")
+    TOKEN_SAFETY_MARGIN: float = 0.9  # le tokenizer tiktoken n'est qu'une approximation de celui du modèle
+    MAP_OUTPUT_TOKENS: int = 2048  # tokens réservés à la sortie d'un appel map
+    # Plafond d'un morceau (0 = fenêtre de contexte) : un appel map doit tenir dans le budget par minute (TPM) d'une clé
+    MAX_CHUNK_TOKENS: int = int(os.getenv("MAX_CHUNK_TOKENS", 8000))
+    CHUNK_OVERLAP_TOKENS: int = 200
+    MAP_CONCURRENCY_PER_KEY: int = int(os.getenv("MAP_CONCURRENCY_PER_KEY", 4))  # appels LLM simultanés par clé
+    MAP_REDUCE_MAX_DEPTH: int = 4
+    REDUCE_OUTPUT_TOKENS: int = 4096  # tokens réservés à la sortie d'un collapse/combine
+
+    # --- Répétitions retirées avant la phase map (refrains, sponsors, boucles de sous-titres), voir src/dedup.py ---
+    DEDUP_ENABLED: bool = os.getenv("DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+    DEDUP_MIN_REPEAT_CHARS: int = int(os.getenv("DEDUP_MIN_REPEAT_CHARS", 24))  # unités plus courtes jamais retirées
+    DEDUP_CHUNK_SIMILARITY: float = float(os.getenv("DEDUP_CHUNK_SIMILARITY", 0.8))  # Jaccard estimé sur des suites de 5 mots
+
+    # --- Pré-compression extractive locale (NumPy) des longues transcriptions, voir src/extractive.py ---
+    # Longueurs concernées (vide = désactivé) : une transcription qui demanderait plusieurs morceaux est réduite
+    # à ses passages les plus représentatifs, résumés en un seul appel
+    EXTRACTIVE_LENGTHS: List[str] = [length.strip() for length in os.getenv("EXTRACTIVE_LENGTHS", "brief,short").split(",") if length.strip()]
+    EXTRACTIVE_TOKEN_BUDGET: int = int(os.getenv("EXTRACTIVE_TOKEN_BUDGET", 0))  # 0 : tout le budget d'un morceau
+
+    # --- Traduction des longs résumés : sections Markdown traduites en parallèle ---
+    TRANSLATION_SECTION_TOKENS: int = int(os.getenv("TRANSLATION_SECTION_TOKENS", 1024))  # au-delà, on découpe le résumé
+    TRANSLATION_MEMO_ENTRIES: int = int(os.getenv("TRANSLATION_MEMO_ENTRIES", 1024))  # sections traduites gardées en mémoire
+
+    # --- Détection de langue (évite la traduction si le résumé est déjà dans la bonne langue) ---
+    LANGUAGE_DETECTION_MIN_CONFIDENCE: float = float(os.getenv("LANGUAGE_DETECTION_MIN_CONFIDENCE", 0.5))
+
+    # --- Configuration du Cache ---
+    DATA_DIR: str = os.getenv("ZENYTH_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+    CACHE_DB_PATH: str = os.getenv("ZENYTH_CACHE_DB", os.path.join(DATA_DIR, "zenyth_cache.sqlite3"))
+    SUMMARY_CACHE_ENABLED: bool = os.getenv("SUMMARY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    SUMMARY_CACHE_TTL: int = int(os.getenv("SUMMARY_CACHE_TTL", 7 * 24 * 3600))  # secondes
+    SUMMARY_CACHE_MAX_ENTRIES: int = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", 512))
+    # Résumés partiels (sortie map) par morceau : une autre longueur ne relance que collapse/combine
+    MAP_CACHE_ENABLED: bool = os.getenv("MAP_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    MAP_CACHE_MAX_ENTRIES: int = int(os.getenv("MAP_CACHE_MAX_ENTRIES", 4096))
+    SUMMARY_LENGTHS: Tuple[str, ...] = ("brief", "short", "standard", "detailed", "comprehensive")  # du moins au plus détaillé
+    # Longueurs produites à partir d'un résumé plus détaillé déjà en cache (un seul appel LLM, sans transcription)
+    DERIVED_SUMMARY_LENGTHS: Tuple[str, ...] = tuple(
+        length.strip() for length in os.getenv("DERIVED_SUMMARY_LENGTHS", "brief,short").split(",") if length.strip()
+    )
+    TRANSCRIPT_STORE_ENABLED: bool = os.getenv("TRANSCRIPT_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+    TRANSCRIPT_MEMORY_ENTRIES: int = int(os.getenv("TRANSCRIPT_MEMORY_ENTRIES", 64))
+
+    # --- File de jobs en arrière-plan (POST /jobs) ---
+    JOBS_DB_PATH: str = os.getenv("ZENYTH_JOBS_DB", os.path.join(DATA_DIR, "zenyth_jobs.sqlite3"))
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", 4))  # exécutions du graphe simultanées
+    JOB_QUEUE_MAX: int = int(os.getenv("JOB_QUEUE_MAX", 1000))  # jobs en attente au-delà desquels on refuse (503)
+    JOB_MAX_PRIORITY: int = 9  # priorités acceptées : 0 (défaut) à 9 (la plus haute)
+    JOB_RETENTION: int = int(os.getenv("JOB_RETENTION", 24 * 3600))  # secondes de conservation des jobs terminés
+
+    # --- Résumés par lot (POST /summarize/batch : listes d'URLs, playlists) ---
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", 200))  # vidéos distinctes par lot
+    BATCH_RUNS_PER_KEY: int = int(os.getenv("BATCH_RUNS_PER_KEY", 2))  # exécutions du graphe simultanées par clé API
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", 16))  # plafond global, tous lots confondus
+
+    # --- Contrôle d'admission de /summarize (voir src/admission.py) ---
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+    ADMISSION_RATE_PER_MINUTE: float = float(os.getenv("ADMISSION_RATE_PER_MINUTE", 10))  # par client (0 : pas de limite)
+    ADMISSION_BURST: int = int(os.getenv("ADMISSION_BURST", 5))  # requêtes d'affilée avant d'être limité
+    ADMISSION_UNITS_PER_KEY: int = int(os.getenv("ADMISSION_UNITS_PER_KEY", 4))  # capacité globale, par clé API
+    ADMISSION_UNIT_CHARS: int = int(os.getenv("ADMISSION_UNIT_CHARS", 100_000))  # une unité ≈ transcription d'environ 1 h 30
+    ADMISSION_DEFAULT_UNITS: int = int(os.getenv("ADMISSION_DEFAULT_UNITS", 1))  # transcription pas encore récupérée
+    ADMISSION_QUEUE_MAX: int = int(os.getenv("ADMISSION_QUEUE_MAX", 32))  # requêtes en attente au-delà desquelles on refuse (503)
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 120))  # attente maximale dans la file
+    # Proxies devant le backend qui ajoutent l'adresse de leur client à X-Forwarded-For (Nginx puis Next.js)
+    TRUSTED_PROXY_HOPS: int = int(os.getenv("TRUSTED_PROXY_HOPS", 2))
+    # Jetons `Authorization: Bearer` reconnus comme identité de client (débit propre) ; tout autre jeton est ignoré
+    ADMISSION_CLIENT_TOKENS: List[str] = [token.strip() for token in os.getenv("ADMISSION_CLIENT_TOKENS", "").split(",") if token.strip()]
+
+    # --- Client déconnecté (onglet fermé) : l'exécution que plus personne ne suit est annulée ---
+    CANCEL_ON_DISCONNECT: bool = os.getenv("CANCEL_ON_DISCONNECT", "true").lower() in ("1", "true", "yes")
+    CANCEL_GRACE_SECONDS: float = float(os.getenv("CANCEL_GRACE_SECONDS", 5))  # délai pour se rattacher (rechargement de page)
+
+    # --- Plusieurs workers (uvicorn --workers) ou réplicas sur une même machine ---
+    # Budget des clés, exécutions en cours et leurs événements partagés dans un fichier SQLite (voir src/shared_state.py)
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", 1))
+    SHARED_STATE_ENABLED: bool = os.getenv("SHARED_STATE_ENABLED", "true" if WEB_CONCURRENCY > 1 else "false").lower() in ("1", "true", "yes")
+    SHARED_STATE_DB_PATH: str = os.getenv("ZENYTH_SHARED_DB", os.path.join(DATA_DIR, "zenyth_shared.sqlite3"))
+    SHARED_RUN_STALE_SECONDS: float = float(os.getenv("SHARED_RUN_STALE_SECONDS", 30))  # exécution reprise sans signe de vie
+    JOB_HEARTBEAT_SECONDS: float = float(os.getenv("JOB_HEARTBEAT_SECONDS", 10))
+
+    @classmethod
+    def get_context_window(cls, model: str) -> int:
+        """Retourne la fenêtre de contexte du modèle (en tokens)."""
+        return cls.MODEL_CONTEXT_WINDOWS.get(model, cls.DEFAULT_CONTEXT_WINDOW)
+
     @classmethod
     def get_default_headers(cls) -> Dict[str, str]:
         """Retourne les en-têtes HTTP par défaut pour les appels LLM."""
@@ -43,50 +176,141 @@ class Config:
             "X-Title": cls.SITE_NAME,
         }
 
-# --- Logique de Rotation des Clés API (Thread-Safe) ---
+# --- Ordonnancement des Clés API selon leurs limites de débit (Thread-Safe) ---
 
 if not Config.GROQ_API_KEYS:
     print("⚠️ WARNING: OPENROUTER_API_KEYS environment variable not set or empty. API calls will fail.")
-    # Crée un cycle avec une chaîne vide pour que l'appli ne crash pas, mais les appels échoueront avec une erreur d'auth.
-    key_cycle = itertools.cycle([""]) 
 else:
-    print(f"✅ Found {len(Config.GROQ_API_KEYS)} API keys. Rotation is enabled.")
-    key_cycle = itertools.cycle(Config.GROQ_API_KEYS)
+    print(f"✅ Found {len(Config.GROQ_API_KEYS)} API keys. Rate-limit aware scheduling is enabled.")
 
-key_lock = threading.Lock()
+# Sans clé, l'ordonnanceur renvoie une chaîne vide : l'appli ne crash pas, mais les appels échoueront avec une erreur d'auth.
+key_scheduler = KeyScheduler(
+    Config.GROQ_API_KEYS,
+    default_cooldown=Config.KEY_COOLDOWN_SECONDS,
+    # Plusieurs workers : budget des clés partagé, sinon chacun croirait disposer de toute la marge
+    ledger=SharedKeyLedger(Config.SHARED_STATE_DB_PATH, in_flight_ttl=Config.DEFAULT_TIMEOUT) if Config.SHARED_STATE_ENABLED else None,
+)
+_http_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+_http_async_loop: Optional["weakref.ReferenceType[asyncio.AbstractEventLoop]"] = None
+# Instances ChatGroq réutilisées, par (clé, modèle, paramètres) ; elles partagent les clients HTTP ci-dessous
+llm_pool = ClientPool("llm", Config.LLM_POOL_SIZE)
 
-def get_rotating_api_key() -> str:
-    """Récupère de manière sûre la prochaine clé API du cycle (thread-safe)."""
-    with key_lock:
-        key = next(key_cycle)
-        if key:
-            print(f"🔄 Using API key ending in: ...{key[-4:]}")
-        return key
+def get_rotating_api_key(estimated_tokens: int = 0) -> str:
+    """Récupère la clé API ayant le plus de marge de débit (thread-safe, ne bloque jamais)."""
+    key = key_scheduler.acquire(estimated_tokens)
+    if key:
+        print(f"🔄 Using API key ending in: ...{key[-4:]}")
+    return key
+
+async def aget_api_key(estimated_tokens: int = 0) -> str:
+    """Comme `get_rotating_api_key`, mais attend (sans bloquer la boucle) qu'une clé ait de la marge."""
+    key = await key_scheduler.acquire_async(estimated_tokens, timeout=Config.KEY_WAIT_TIMEOUT)
+    if key:
+        print(f"🔄 Using API key ending in: ...{key[-4:]}")
+    return key
+
+def _report_rate_limits(response: httpx.Response) -> None:
+    """Met à jour le budget de la clé utilisée (lue dans l'en-tête Authorization) dans l'ordonnanceur."""
+    authorization = response.request.headers.get("authorization", "")
+    api_key = authorization[len("Bearer "):] if authorization.startswith("Bearer ") else authorization
+    key_scheduler.update_from_headers(api_key, response.headers, response.status_code)
+
+async def _areport_rate_limits(response: httpx.Response) -> None:
+    authorization = response.request.headers.get("authorization", "")
+    api_key = authorization[len("Bearer "):] if authorization.startswith("Bearer ") else authorization
+    await key_scheduler.update_from_headers_async(api_key, response.headers, response.status_code)
+
+def _http_options() -> dict:
+    """Options communes : connexions keep-alive bornées, HTTP/2 si le paquet `h2` est installé."""
+    return {
+        "timeout": Config.DEFAULT_TIMEOUT,
+        "http2": Config.HTTP2_ENABLED and importlib.util.find_spec("h2") is not None,
+        "limits": httpx.Limits(
+            max_connections=Config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY,
+        ),
+    }
+
+def _get_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    Clients HTTP partagés par toutes les clés et tous les modèles (un seul pool de connexions).
+    Le client asynchrone est lié à une boucle d'événements : si la boucle change (wrappers via
+    asyncio.run), il est recréé et les instances LLM qui le référencent sont oubliées.
+    """
+    global _http_client, _http_async_client, _http_async_loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    with _http_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(event_hooks={"response": [_report_rate_limits]}, **_http_options())
+        if _http_async_client is None or (loop is not None and (_http_async_loop is None or _http_async_loop() is not loop)):
+            if _http_async_client is not None:
+                llm_pool.clear()
+            _http_async_client = httpx.AsyncClient(event_hooks={"response": [_areport_rate_limits]}, **_http_options())
+            _http_async_loop = weakref.ref(loop) if loop is not None else None
+        return _http_client, _http_async_client
 
 # --- Usine de création de LLM (Nouveau & Centralisé) ---
 
-def create_llm_instance(**kwargs) -> ChatGroq:
+def create_llm_instance(api_key: Optional[str] = None, **kwargs) -> "ChatGroq":
     """
-    Crée et configure une instance de ChatGroq.
+    Retourne une instance de ChatGroq, réutilisée depuis le pool si elle existe déjà.
     C'est le point d'entrée unique pour obtenir un client LLM.
+    Sans `api_key`, la clé ayant le plus de marge est choisie par l'ordonnanceur.
     Les `kwargs` peuvent surcharger les paramètres par défaut (ex: temperature, timeout).
     """
-    api_key = get_rotating_api_key()
+    if api_key is None:
+        api_key = get_rotating_api_key()
+        # Instance sans durée d'appel connue : la clé n'est pas comptée comme en cours d'utilisation
+        key_scheduler.release(api_key)
     if not api_key:
         # Cette erreur est plus claire et arrêtera le processus tôt.
         raise ValueError("No OpenRouter API key available. Check your .env file and OPENROUTER_API_KEYS variable.")
 
+    http_client, http_async_client = _get_http_clients()
     # Paramètres par défaut tirés de la classe Config
     config = {
         "model": Config.DEFAULT_MODEL_NAME,
         "temperature": Config.DEFAULT_TEMPERATURE,
         "timeout": Config.DEFAULT_TIMEOUT,
-        "api_key": SecretStr(api_key),
+        "max_retries": Config.LLM_MAX_RETRIES,
     }
 
     # Met à jour la configuration avec les arguments fournis (kwargs)
     # Permet de surcharger la température pour la traduction, par exemple.
     config.update(kwargs)
-    
-    print(f"🤖  Creating LLM instance for model '{config['model']}' with temp {config['temperature']}.")
-    return ChatGroq(**config)
\ No newline at end of file
+
+    def build() -> "ChatGroq":
+        from langchain_groq import ChatGroq
+
+        print(f"🤖  Creating LLM instance for model '{config['model']}' with temp {config['temperature']}.")
+        # Latence et tokens de chaque appel (voir src/metrics.py)
+        callbacks = config.pop("callbacks", None) or [LLMMetricsHandler(api_key, config["model"])]
+        return ChatGroq(
+            api_key=SecretStr(api_key), http_client=http_client, http_async_client=http_async_client,
+            callbacks=callbacks, **config
+        )
+
+    # Une instance par (clé, paramètres) : les appels suivants réutilisent ses connexions keep-alive
+    pool_key = (api_key, tuple(sorted((name, repr(value)) for name, value in config.items())))
+    return llm_pool.get(pool_key, build)
+
+async def acreate_llm_instance(estimated_tokens: int = 0, **kwargs) -> Tuple["ChatGroq", str]:
+    """
+    Version asynchrone de `create_llm_instance` : attend qu'une clé ait assez de marge
+    pour `estimated_tokens` tokens, et retourne (llm, clé utilisée).
+    La clé reste réservée jusqu'à `key_scheduler.release(clé)`, à appeler une fois l'appel terminé.
+    """
+    api_key = await aget_api_key(estimated_tokens)
+    try:
+        return create_llm_instance(api_key=api_key, **kwargs), api_key
+    except BaseException:
+        # Pas d'instance, donc pas d'appel qui rendrait la clé : on la libère ici
+        if api_key:
+            await key_scheduler.release_async(api_key)
+        raise
@@ -0,0 +1,190 @@
+# /backend/src/admission.py
+"""
+Contrôle d'admission devant le graphe (/summarize, lots et jobs) : en surcharge, la latence des requêtes admises reste
+prévisible, les autres attendent dans une file bornée ou sont refusées tout de suite.
+
+- `TokenBuckets` : un seau à jetons par client (débit en régime établi et rafale bornés), refus 429 au-delà.
+- `AdmissionController` : capacité globale en « unités », une requête pesant selon la taille estimée de sa
+  transcription ; au-delà, file d'attente FIFO bornée (la position est envoyée au client), et refus 503
+  avec `Retry-After` quand la file est pleine.
+
+L'état est propre à chaque processus : avec plusieurs workers, la capacité est répartie entre eux.
+"""
+import asyncio
+import collections
+import math
+import time
+from typing import Deque, Dict, Optional, Tuple
+from src.metrics import ADMISSIONS, ADMISSION_WAIT_SECONDS
+
+
+class AdmissionRejected(Exception):
+    """Requête refusée sans attente : débit du client dépassé (429) ou file d'attente pleine (503)."""
+
+    def __init__(self, message: str, status_code: int, retry_after: float):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBuckets:
+    """Un seau à jetons par client : `rate` requêtes par seconde en régime établi, jusqu'à `burst` d'un coup."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_clients = max_clients
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # client -> (jetons, instant de la dernière mise à jour)
+
+    def take(self, client: str) -> float:
+        """Prend un jeton du client ; retourne 0 si c'est fait, sinon le délai (secondes) avant le prochain jeton."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
+            return (1 - tokens) / self.rate
+        if client not in self._buckets and len(self._buckets) >= self.max_clients:
+            self._prune(now)
+        self._buckets[client] = (tokens - 1, now)
+        return 0.0
+
+    def _prune(self, now: float) -> None:
+        # Un client dont le seau s'est rempli depuis n'a plus besoin d'être suivi
+        refill = self.burst / self.rate
+        self._buckets = {client: state for client, state in self._buckets.items() if now - state[1] < refill}
+
+
+class AdmissionTicket:
+    __slots__ = ("weight", "admitted", "released", "future", "created_at", "admitted_at")
+
+    def __init__(self, weight: int):
+        self.weight = weight
+        self.admitted = False
+        self.released = False
+        self.future: Optional[asyncio.Future] = None
+        self.created_at = time.monotonic()
+        self.admitted_at = 0.0
+
+
+class AdmissionController:
+    """
+    Capacité globale pondérée et file d'attente FIFO bornée (une seule boucle d'événements).
+    `enter()` réserve la capacité, place la requête en file ou la refuse tout de suite (avant d'ouvrir
+    le flux SSE) ; `wait()` attend son tour et `release()` rend la capacité.
+    """
+
+    def __init__(self, capacity: int, max_queue: int, rate_per_minute: float = 0.0, burst: float = 1.0,
+                 service_seconds: float = 30.0):
+        self.capacity = max(1, capacity)
+        self.max_queue = max_queue
+        self.buckets = TokenBuckets(rate_per_minute / 60, burst) if rate_per_minute > 0 else None
+        self._used = 0
+        self._queue: Deque[AdmissionTicket] = collections.deque()
+        # Moyenne mobile de la durée d'une exécution admise, pour estimer le Retry-After
+        self._service_seconds = service_seconds
+        self.stats = {"admitted": 0, "queued": 0, "rejected_rate": 0, "rejected_full": 0, "timed_out": 0}
+
+    def _count(self, result: str) -> None:
+        self.stats[result] += 1
+        ADMISSIONS.labels(result).inc()
+
+    def weight_for(self, units: int) -> int:
+        return min(max(0, units), self.capacity)
+
+    def _fits(self, weight: int) -> bool:
+        return weight == 0 or (not self._queue and self._used + weight <= self.capacity)
+
+    def estimated_wait(self) -> float:
+        """Attente probable d'une nouvelle requête : le travail en cours et en file, écoulé à pleine capacité."""
+        pending = self._used + sum(ticket.weight for ticket in self._queue)
+        return self._service_seconds * max(1.0, pending / self.capacity)
+
+    def take_rate(self, client: str) -> None:
+        """Compte une requête du client ; refus immédiat (429) s'il a dépassé son débit."""
+        if self.buckets is None:
+            return
+        wait = self.buckets.take(client)
+        if wait:
+            self._count("rejected_rate")
+            raise AdmissionRejected("Too many requests from this client, please slow down.", 429, wait)
+
+    def enter(self, client: Optional[str], weight: int) -> AdmissionTicket:
+        """
+        Réserve la capacité si elle est disponible (et que personne n'attend), sinon place la requête en file.
+        Refus immédiat si la file est pleine (503) ou si le client a dépassé son débit (429).
+        `client` None : pas de limite de débit (travail déjà compté à sa soumission, ex. une vidéo d'un lot).
+        """
+        fits = self._fits(weight)
+        if not fits and len(self._queue) >= self.max_queue:
+            self._count("rejected_full")
+            raise AdmissionRejected("The server is at capacity, please retry later.", 503, self.estimated_wait())
+        if client is not None:
+            self.take_rate(client)
+        ticket = AdmissionTicket(weight)
+        if fits:
+            self._admit(ticket)
+        else:
+            ticket.future = asyncio.get_running_loop().create_future()
+            self._queue.append(ticket)
+            self._count("queued")
+        return ticket
+
+    def _admit(self, ticket: AdmissionTicket) -> None:
+        self._used += ticket.weight
+        ticket.admitted = True
+        ticket.admitted_at = time.monotonic()
+        ADMISSION_WAIT_SECONDS.observe(ticket.admitted_at - ticket.created_at)
+        self._count("admitted")
+        if ticket.future is not None and not ticket.future.done():
+            ticket.future.set_result(True)
+
+    def position(self, ticket: AdmissionTicket) -> int:
+        """Position (à partir de 1) dans la file, 0 si la requête est admise."""
+        if ticket.admitted:
+            return 0
+        try:
+            return self._queue.index(ticket) + 1
+        except ValueError:
+            return 0
+
+    async def wait(self, ticket: AdmissionTicket, timeout: float) -> bool:
+        """Attend l'admission au plus `timeout` secondes ; retourne True si la requête est admise."""
+        if ticket.admitted or ticket.future is None:
+            return ticket.admitted
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return ticket.admitted
+
+    def time_out(self, ticket: AdmissionTicket) -> None:
+        self._count("timed_out")
+        self.release(ticket)
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        """Rend la capacité (ou quitte la file) ; sans effet au second appel."""
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket.admitted:
+            self._used -= ticket.weight
+            if ticket.weight:
+                self._service_seconds = 0.9 * self._service_seconds + 0.1 * (time.monotonic() - ticket.admitted_at)
+        else:
+            try:
+                self._queue.remove(ticket)
+            except ValueError:
+                pass
+        # FIFO strict : la tête de file passe d'abord, même si une requête plus légère derrière tiendrait
+        while self._queue and self._used + self._queue[0].weight <= self.capacity:
+            self._admit(self._queue.popleft())
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            **self.stats,
+            "capacity": self.capacity,
+            "in_use": self._used,
+            "waiting": len(self._queue),
+            "estimated_wait_seconds": round(self.estimated_wait(), 1),
+        }
@@ -0,0 +1,252 @@
+# /backend/src/cache.py
+"""
+Cache des résumés à deux niveaux : LRU en mémoire (avec TTL) + SQLite sur disque.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from config import Config
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Construit une clé de cache stable (sha256) à partir des éléments fournis."""
+    raw = "\x1f".join(str(part).strip().lower() if isinstance(part, str) else str(part) for part in parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def make_summary_key(video_id: str, language: str, summary_length: str, model: str, prompt_version: str) -> str:
+    """Clé d'un résumé : (video_id, langue, longueur, modèle, version des prompts)."""
+    return make_cache_key("summary", video_id, language, summary_length, model, prompt_version)
+
+
+def make_summary_languages_key(video_id: str, summary_length: str, model: str, prompt_version: str) -> str:
+    """Clé de l'index des langues dans lesquelles un résumé (vidéo, longueur) est en cache."""
+    return make_cache_key("summary_languages", video_id, summary_length, model, prompt_version)
+
+
+def make_map_key(video_id: str, chunk_hash: str, language: str, summary_length: str, model: str, prompt_version: str) -> str:
+    """Clé d'un résumé partiel (sortie map) : (video_id, empreinte du morceau, langue, longueur, modèle, prompts)."""
+    return make_cache_key("map", video_id, chunk_hash, language, summary_length, model, prompt_version)
+
+
+class CacheBackend(ABC):
+    """Interface minimale d'un niveau de cache ; un niveau incomplet ne peut pas être instancié."""
+
+    name = "backend"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class MemoryLRUCache(CacheBackend):
+    """Cache LRU en mémoire, borné en nombre d'entrées, avec expiration (thread-safe)."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 512, default_ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache(CacheBackend):
+    """Cache persistant sur disque (SQLite, mode WAL), partagé entre les processus."""
+
+    name = "disk"
+
+    def __init__(self, db_path: str, table: str = "summary_cache", default_ttl: Optional[float] = None):
+        self.db_path = db_path
+        self.table = table
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < time.time():
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        ttl = ttl if ttl is not None else self.default_ttl
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now, expires_at),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+
+class TieredCache:
+    """
+    Enchaîne plusieurs niveaux de cache (du plus rapide au plus lent).
+    Un succès sur un niveau lent est recopié dans les niveaux plus rapides.
+    """
+
+    def __init__(self, tiers: List[CacheBackend]):
+        self.tiers = tiers
+        self.stats = {"hits": 0, "misses": 0, "sets": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        for index, tier in enumerate(self.tiers):
+            try:
+                value = tier.get(key)
+            except Exception as e:
+                print(f"⚠️ Cache tier '{tier.name}' read failed: {e}")
+                continue
+            if value is not None:
+                for faster in self.tiers[:index]:
+                    faster.set(key, value)
+                self._count("hits")
+                self._count(f"hits_{tier.name}")
+                return value
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        for tier in self.tiers:
+            try:
+                tier.set(key, value, ttl)
+            except Exception as e:
+                print(f"⚠️ Cache tier '{tier.name}' write failed: {e}")
+        self._count("sets")
+
+    def delete(self, key: str) -> None:
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+
+# --- Instances partagées ---
+
+_summary_cache: Optional[TieredCache] = None
+_map_cache: Optional[TieredCache] = None
+_summary_cache_lock = threading.Lock()
+
+
+def _build_cache(table: str, max_entries: int) -> TieredCache:
+    tiers: List[CacheBackend] = [MemoryLRUCache(max_entries, Config.SUMMARY_CACHE_TTL)]
+    try:
+        tiers.append(SQLiteCache(Config.CACHE_DB_PATH, table, Config.SUMMARY_CACHE_TTL))
+    except sqlite3.Error as e:
+        print(f"⚠️ Disk cache unavailable ({e}), using the in-memory cache only.")
+    return TieredCache(tiers)
+
+
+def get_summary_cache() -> Optional[TieredCache]:
+    """Retourne le cache de résumés partagé (None si désactivé)."""
+    global _summary_cache
+    if not Config.SUMMARY_CACHE_ENABLED:
+        return None
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            _summary_cache = _build_cache("summary_cache", Config.SUMMARY_CACHE_MAX_ENTRIES)
+        return _summary_cache
+
+
+def get_map_cache() -> Optional[TieredCache]:
+    """Retourne le cache des résumés partiels (sorties map) partagé (None si désactivé)."""
+    global _map_cache
+    if not (Config.SUMMARY_CACHE_ENABLED and Config.MAP_CACHE_ENABLED):
+        return None
+    with _summary_cache_lock:
+        if _map_cache is None:
+            _map_cache = _build_cache("map_cache", Config.MAP_CACHE_MAX_ENTRIES)
+        return _map_cache
+
+
+def set_summary_cache(cache: Optional[TieredCache]) -> None:
+    """Remplace le cache de résumés partagé (autre backend, tests, benchmarks)."""
+    global _summary_cache
+    with _summary_cache_lock:
+        _summary_cache = cache
@@ -0,0 +1,56 @@
+# /backend/src/client_pool.py
+"""
+Pool de clients longue durée (LLM, YouTube), construits au premier usage puis réutilisés.
+
+Réutiliser un client, c'est réutiliser ses connexions keep-alive : plus de poignée de main TLS
+ni de construction d'objets à chaque appel. Le pool est borné (LRU) et compte ses hits/misses.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class ClientPool:
+    """Pool LRU thread-safe : `get(key, factory)` retourne le client de `key`, créé par `factory()` au besoin."""
+
+    def __init__(self, name: str, max_size: int = 32):
+        self.name = name
+        self.max_size = max(1, max_size)
+        self._clients: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "resets": 0}
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self.stats["hits"] += 1
+                return client
+            self.stats["misses"] += 1
+            client = factory()
+            self._clients[key] = client
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+                self.stats["evictions"] += 1
+            return client
+
+    def clear(self) -> None:
+        """Oublie tous les clients (ex. quand la boucle d'événements à laquelle ils sont liés a changé)."""
+        with self._lock:
+            if self._clients:
+                self.stats["resets"] += 1
+            self._clients.clear()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self._clients),
+                "max_size": self.max_size,
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+            }
@@ -0,0 +1,22 @@
+# /backend/src/concurrency.py
+"""
+Primitives de concurrence partagées par les modules asynchrones.
+"""
+import asyncio
+import weakref
+from typing import Dict
+
+# Un asyncio.Semaphore est lié à la boucle d'événements qui l'utilise : on en garde un par boucle
+# (les wrappers synchrones via asyncio.run créent une nouvelle boucle à chaque appel).
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def get_loop_semaphore(name: str, limit: int) -> asyncio.Semaphore:
+    """Retourne le sémaphore nommé `name` de la boucle courante, créé avec `limit` places au premier appel."""
+    loop = asyncio.get_running_loop()
+    semaphores = _semaphores.setdefault(loop, {})
+    semaphore = semaphores.get(name)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(limit)
+        semaphores[name] = semaphore
+    return semaphore
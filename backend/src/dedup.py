@@ -0,0 +1,115 @@
+# /backend/src/dedup.py
+"""
+Élimination des répétitions d'une transcription avant la phase map : moins d'appels et de tokens
+pour les clips musicaux (refrains), les lectures de sponsors, les intros/outros et les boucles de
+sous-titres automatiques.
+
+- `clean_units` : retire les balises de sous-titres ([Music], ♪...), les unités (phrases ou segments)
+  de remplissage connues (sponsors, « like and subscribe ») et les unités déjà vues à l'identique.
+- `drop_near_duplicate_chunks` : retire les morceaux presque identiques à un morceau déjà gardé.
+  Similarité de Jaccard estimée sur des « shingles » de mots (bottom-k MinHash : une seule
+  fonction de hachage, on garde les k plus petites empreintes de chaque morceau).
+"""
+import re
+import zlib
+from contextvars import ContextVar
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from src.metrics import DEDUP_TOKENS
+from src.tokens import estimate_tokens
+
+# Balises non verbales des sous-titres (YouTube, manuels ou automatiques)
+_CAPTION_TAGS = re.compile(
+    r"\[\s*(?:music|applause|laughter|laughs|cheering|silence|inaudible|musique|applaudissements|rires|__)\s*\]|[♪♫]+",
+    re.IGNORECASE,
+)
+# Unités de remplissage : une unité qui en contient une est retirée entière
+BOILERPLATE_PATTERNS = [
+    r"\b(?:like|subscribe)\b.{0,40}\b(?:subscribe|notification|bell|channel)\b",
+    r"\b(?:hit|smash|ring) the (?:like|bell|notification)",
+    r"\b(?:video|episode) is (?:brought to you|sponsored) by\b",
+    r"\bthanks? (?:to )?.{0,40}\bfor sponsoring\b",
+    r"\b(?:use|with) (?:the |my )?(?:promo )?code \w+\b",
+    r"\blinks? (?:is |are )?in the description\b",
+    r"\babonnez[- ]vous\b",
+    r"\bcette vidéo est sponsorisée\b",
+]
+_BOILERPLATE = re.compile("|".join(f"(?:{pattern})" for pattern in BOILERPLATE_PATTERNS), re.IGNORECASE)
+_WORD = re.compile(r"\w+")
+
+# Compteurs de la requête en cours (répétitions, pré-compression extractive), remplis par le résumé
+# et lus par le nœud (message de `step_progress`)
+dedup_report: ContextVar[Optional[Dict[str, int]]] = ContextVar("dedup_report", default=None)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def clean_units(units: List[str], min_repeat_chars: int = 24) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Retourne (unités gardées, compteurs). Une unité déjà vue (texte normalisé identique, d'au moins
+    `min_repeat_chars` caractères) est retirée : refrains, sponsors lus deux fois, boucles de sous-titres.
+    Les unités plus courtes (« Yeah. », « Okay. ») sont toujours gardées.
+    """
+    kept: List[str] = []
+    seen = set()
+    report = {"boilerplate_units": 0, "repeated_units": 0, "tokens_saved": 0}
+
+    def drop(kind: str, unit: str) -> None:
+        tokens = estimate_tokens(unit)
+        report["tokens_saved"] += tokens
+        DEDUP_TOKENS.labels(kind).inc(tokens)
+
+    for unit in units:
+        text = _CAPTION_TAGS.sub(" ", unit).strip()
+        if not _WORD.search(text):
+            drop("caption_tag", unit)
+            continue
+        if _BOILERPLATE.search(text):
+            report["boilerplate_units"] += 1
+            drop("boilerplate", unit)
+            continue
+        normalized = _normalize(text)
+        if len(normalized) >= min_repeat_chars:
+            if normalized in seen:
+                report["repeated_units"] += 1
+                drop("repeated", unit)
+                continue
+            seen.add(normalized)
+        kept.append(text)
+    return kept, report
+
+
+def chunk_sketch(text: str, shingle_words: int = 5, size: int = 128) -> FrozenSet[int]:
+    """Les `size` plus petites empreintes (crc32) des suites de `shingle_words` mots du texte."""
+    words = _WORD.findall(text.lower())
+    if len(words) <= shingle_words:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + shingle_words]) for i in range(len(words) - shingle_words + 1)}
+    hashes = sorted({zlib.crc32(shingle.encode("utf-8")) for shingle in shingles})
+    return frozenset(hashes[:size])
+
+
+def estimate_similarity(a: FrozenSet[int], b: FrozenSet[int], size: int = 128) -> float:
+    """Jaccard estimé : part des k plus petites empreintes de l'union présentes dans les deux esquisses."""
+    if not a or not b:
+        return 0.0
+    union = sorted(a | b)[:size]
+    return sum(1 for value in union if value in a and value in b) / len(union)
+
+
+def drop_near_duplicate_chunks(chunks: List[str], threshold: float = 0.8, shingle_words: int = 5) -> Tuple[List[str], List[str]]:
+    """Retourne (morceaux gardés, morceaux retirés) ; l'ordre et la première occurrence sont conservés."""
+    kept: List[str] = []
+    skipped: List[str] = []
+    sketches: List[FrozenSet[int]] = []
+    for chunk in chunks:
+        sketch = chunk_sketch(chunk, shingle_words)
+        if any(estimate_similarity(sketch, other) >= threshold for other in sketches):
+            skipped.append(chunk)
+            DEDUP_TOKENS.labels("chunk").inc(estimate_tokens(chunk))
+            continue
+        kept.append(chunk)
+        sketches.append(sketch)
+    return kept, skipped
@@ -0,0 +1,150 @@
+# /backend/src/extractive.py
+"""
+Pré-compression extractive locale des longues transcriptions, pour les résumés courts (brief, short).
+Les passages les plus représentatifs sont choisis sans appel LLM, jusqu'à un budget de tokens :
+le résumé se fait ensuite en un seul appel direct au lieu d'un map-reduce sur toute la transcription.
+
+- Passages : unités (segments ou phrases) regroupées par quelques dizaines de tokens, ce qui tient
+  aussi pour les sous-titres automatiques sans ponctuation.
+- Score : TextRank sur la similarité cosinus des vecteurs TF-IDF des passages (vocabulaire haché),
+  calcul vectorisé avec NumPy, par portion de la vidéo : chaque partie a ses passages centraux, au lieu
+  d'un budget entièrement pris par le thème dominant. La sélection (MMR) écarte ensuite les passages
+  trop proches de ceux déjà retenus.
+
+NumPy est optionnel : sans lui, la transcription est résumée en entier.
+"""
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from src.tokens import count_tokens_batch, pack_units
+
+_WORD = re.compile(r"\w{3,}")  # les mots de moins de 3 lettres sont surtout des mots vides
+_DIMENSIONS = 1 << 11          # taille du vocabulaire haché
+_MAX_PASSAGES = 1500           # borne la matrice de similarité (n × n)
+_GAP = "[...]"                 # marque un passage omis entre deux extraits
+
+
+@lru_cache(maxsize=1)
+def _numpy():
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        print("⚠️ NumPy is not installed, extractive pre-compression is disabled.")
+        return None
+
+
+def make_passages(units: List[str], sizes: List[int], passage_tokens: int) -> Tuple[List[str], List[int]]:
+    """Regroupe les unités consécutives en passages d'environ `passage_tokens` tokens ; retourne (passages, tailles)."""
+    passages: List[str] = []
+    passage_sizes: List[int] = []
+    current: List[str] = []
+    used = 0
+    for unit, size in zip(units, sizes):
+        if current and used + size > passage_tokens:
+            passages.append(" ".join(current))
+            passage_sizes.append(used)
+            current, used = [], 0
+        if size > 2 * passage_tokens:
+            # Unité sans ponctuation (sous-titres automatiques) : découpée à son tour
+            pieces = pack_units([unit], passage_tokens)
+            passages.extend(pieces)
+            passage_sizes.extend(count_tokens_batch(pieces))
+            continue
+        current.append(unit)
+        used += size
+    if current:
+        passages.append(" ".join(current))
+        passage_sizes.append(used)
+    return passages, passage_sizes
+
+
+def tfidf_matrix(np, passages: List[str]):
+    """Vecteurs TF-IDF normalisés (une ligne par passage) ; un mot présent partout pèse zéro."""
+    columns: Dict[str, int] = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    for index, passage in enumerate(passages):
+        for word in _WORD.findall(passage.lower()):
+            column = columns.get(word)
+            if column is None:
+                column = columns[word] = zlib.crc32(word.encode("utf-8")) & (_DIMENSIONS - 1)
+            rows.append(index)
+            cols.append(column)
+    counts = np.zeros((len(passages), _DIMENSIONS), dtype=np.float32)
+    np.add.at(counts, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+    idf = np.log((1.0 + len(passages)) / (1.0 + (counts > 0).sum(axis=0))).astype(np.float32)
+    vectors = np.log1p(counts) * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def textrank(np, similarity, damping: float = 0.85, iterations: int = 50):
+    """Scores PageRank du graphe des passages pondéré par leur similarité."""
+    weights = similarity.copy()
+    np.fill_diagonal(weights, 0.0)
+    totals = weights.sum(axis=1, keepdims=True)
+    totals[totals == 0] = 1.0
+    transition = (weights / totals).T
+    count = len(weights)
+    scores = np.full(count, 1.0 / count, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1.0 - damping) / count + damping * (transition @ scores)
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+
+def compress_units(units: List[str], budget_tokens: int, diversity: float = 0.5) -> Optional[Tuple[List[str], int, int]]:
+    """
+    Retourne (extraits dans l'ordre de la transcription, tokens avant, tokens après), ou None si
+    le texte tient déjà dans `budget_tokens` ou si NumPy est absent.
+    Deux extraits non contigus sont séparés par une unité « [...] ».
+    """
+    np = _numpy()
+    if np is None or not units:
+        return None
+    unit_sizes = count_tokens_batch(units)
+    total = sum(unit_sizes)
+    if total <= budget_tokens:
+        return None
+    passages, sizes = make_passages(units, unit_sizes, max(60, total // _MAX_PASSAGES + 1))
+    vectors = tfidf_matrix(np, passages)
+    similarity = vectors @ vectors.T
+
+    # Pertinence : rang TextRank parmi les passages de la même portion de la vidéo (environ deux passages
+    # retenus par portion)
+    relevance = np.zeros(len(passages), dtype=np.float32)
+    windows = max(1, min(len(passages), budget_tokens // (2 * max(1, sum(sizes) // len(sizes)))))
+    for window in np.array_split(np.arange(len(passages)), windows):
+        ranks = np.argsort(np.argsort(textrank(np, similarity[np.ix_(window, window)]), kind="stable"), kind="stable")
+        relevance[window] = (ranks + 1) / len(window)
+    # Sélection MMR : pertinence pénalisée par la similarité avec les passages déjà retenus
+    closest = np.zeros(len(passages), dtype=np.float32)
+    remaining = np.ones(len(passages), dtype=bool)
+    chosen: List[int] = []
+    used = 0
+    smallest = min(sizes)
+    while remaining.any() and budget_tokens - used >= smallest:
+        value = np.where(remaining, (1.0 - diversity) * relevance - diversity * closest, -np.inf)
+        index = int(np.argmax(value))
+        remaining[index] = False
+        if used + sizes[index] > budget_tokens:
+            continue
+        chosen.append(index)
+        used += sizes[index]
+        np.maximum(closest, similarity[index], out=closest)
+
+    excerpts: List[str] = []
+    previous = -1
+    for index in sorted(chosen):
+        if index != previous + 1:
+            excerpts.append(_GAP)
+        excerpts.append(passages[index])
+        previous = index
+    if previous != len(passages) - 1:
+        excerpts.append(_GAP)
+    return excerpts, total, used
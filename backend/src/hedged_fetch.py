@@ -0,0 +1,217 @@
+# /backend/src/hedged_fetch.py
+"""
+Récupération « couverte » (hedged) d'une ressource lente ou bloquée par moments, sur plusieurs routes
+(proxies, accès direct), dans des threads.
+
+- `HedgedFetcher` lance une tentative sur la première route ; si elle n'a pas répondu au bout d'un délai
+  tiré du p95 des tentatives réussies récentes, une deuxième part en parallèle sur la route suivante.
+  La première réussite l'emporte. Une erreur définitive (ex. vidéo sans transcription) arrête tout,
+  une erreur passagère (blocage, réseau) relance une tentative sur une autre route.
+- `CircuitBreaker` : après une série d'échecs passagers, plus aucune tentative pendant `reset_after`
+  secondes (vague de blocages), puis une seule tentative d'essai avant de reprendre normalement.
+
+Le moteur ne connaît ni YouTube ni HTTP : `attempt(key, route)` fait le travail (voir src/video_tools.py),
+ce qui permet de l'éprouver contre un faux serveur local.
+"""
+import collections
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from src.metrics import TRANSCRIPT_ATTEMPT_SECONDS
+
+
+class CircuitOpenError(Exception):
+    """Disjoncteur ouvert : aucune tentative avant `retry_in` secondes."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name}: too many failures, paused for {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class LatencyTracker:
+    """Durées des dernières tentatives réussies, pour en tirer un quantile (thread-safe)."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, fraction: float, default: float) -> float:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return default
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Disjoncteur fermé → ouvert (après `threshold` échecs d'affilée) → semi-ouvert (une tentative d'essai) (thread-safe)."""
+
+    def __init__(self, name: str, threshold: int = 5, reset_after: float = 60.0):
+        self.name = name
+        self.threshold = max(1, threshold)
+        self.reset_after = reset_after
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self._opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        """Une tentative peut-elle partir ? En semi-ouvert, une seule à la fois (l'essai)."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_after - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            # Échec de la tentative d'essai, ou seuil atteint : (ré)ouverture
+            if self._probing or (self._opened_at is None and self._failures >= self.threshold):
+                self.stats["opened"] += 1
+                print(f"🔌 [{self.name}] Circuit open after {self._failures} failures, pausing for {self.reset_after:.0f}s.")
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "state": self.state, "consecutive_failures": self._failures, "retry_in": round(self.retry_in(), 1)}
+
+
+class HedgedFetcher:
+    """
+    Tentatives couvertes sur plusieurs routes : `fetch(key, routes)` retourne le résultat de la première
+    tentative réussie, ou lève l'erreur définitive / la dernière erreur passagère.
+    Les tentatives perdantes finissent dans leur thread ; leur résultat est ignoré.
+    """
+
+    def __init__(self, name: str, attempt: Callable[[str, str], Any], is_final: Callable[[BaseException], bool],
+                 max_attempts: int = 4, max_parallel: int = 2, hedge_quantile: float = 0.95,
+                 hedge_delay: Tuple[float, float, float] = (3.0, 1.0, 10.0), workers: int = 16,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.attempt = attempt
+        self.is_final = is_final
+        self.max_attempts = max(1, max_attempts)
+        self.max_parallel = max(1, max_parallel)
+        self.hedge_quantile = hedge_quantile
+        # (délai par défaut tant qu'il y a trop peu de mesures, minimum, maximum)
+        self.default_delay, self.min_delay, self.max_delay = hedge_delay
+        self.breaker = breaker
+        self.latency = LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=name)
+        self.stats = {"fetches": 0, "attempts": 0, "hedges": 0, "hedge_wins": 0, "retries": 0, "failures": 0}
+        self._stats_lock = threading.Lock()  # `fetch` est appelé depuis plusieurs threads à la fois
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def hedge_delay(self) -> float:
+        delay = self.latency.quantile(self.hedge_quantile, self.default_delay)
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def _timed_attempt(self, key: str, route: str) -> Any:
+        started = time.perf_counter()
+        try:
+            result = self.attempt(key, route)
+        except BaseException as e:
+            outcome = "final" if self.is_final(e) else "failed"
+            TRANSCRIPT_ATTEMPT_SECONDS.labels(route, outcome).observe(time.perf_counter() - started)
+            raise
+        elapsed = time.perf_counter() - started
+        self.latency.record(elapsed)
+        TRANSCRIPT_ATTEMPT_SECONDS.labels(route, "success").observe(elapsed)
+        return result
+
+    def fetch(self, key: str, routes: List[str]) -> Tuple[Any, str]:
+        """Retourne (résultat, route gagnante). Lève CircuitOpenError si le disjoncteur bloque toute tentative."""
+        self._count("fetches")
+        running: Dict[Future, Tuple[int, str]] = {}
+        launched = 0
+        last_error: Optional[BaseException] = None
+
+        def launch() -> bool:
+            nonlocal launched
+            if self.breaker is not None and not self.breaker.allow():
+                return False
+            route = routes[launched % len(routes)]
+            running[self._executor.submit(self._timed_attempt, key, route)] = (launched, route)
+            launched += 1
+            self._count("attempts")
+            return True
+
+        if not launch():
+            raise CircuitOpenError(self.name, self.breaker.retry_in())
+        # Tentative couverte refusée par le disjoncteur : on attend les tentatives en cours sans la redemander
+        hedge_refused = False
+        while running:
+            can_hedge = not hedge_refused and launched < self.max_attempts and len(running) < self.max_parallel
+            done, _ = wait(list(running), timeout=self.hedge_delay() if can_hedge else None, return_when=FIRST_COMPLETED)
+            if not done:
+                # Pas de réponse dans le délai habituel : tentative couverte sur la route suivante
+                if launch():
+                    self._count("hedges")
+                else:
+                    hedge_refused = True
+                continue
+            for future in done:
+                index, route = running.pop(future)
+                error = future.exception()
+                if error is None:
+                    if self.breaker is not None:
+                        self.breaker.record_success()
+                    if any(other < index for other, _ in running.values()):
+                        self._count("hedge_wins")  # la tentative couverte a devancé celle qu'elle couvrait
+                    return future.result(), route
+                if self.is_final(error):
+                    # YouTube a répondu (ex. pas de transcription) : inutile d'insister, la route fonctionne
+                    if self.breaker is not None:
+                        self.breaker.record_success()
+                    raise error
+                last_error = error
+                self._count("failures")
+                if self.breaker is not None:
+                    self.breaker.record_failure()
+                print(f"⚠️ [{self.name}] Attempt {index + 1} via '{route}' failed: {type(error).__name__}.")
+            # Échec passager : on retente aussitôt sur une autre route, dans la limite des tentatives
+            if launched < self.max_attempts and len(running) < self.max_parallel and launch():
+                self._count("retries")
+        raise last_error
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            **stats,
+            "hedge_delay": round(self.hedge_delay(), 3),
+            "circuit": self.breaker.snapshot() if self.breaker is not None else None,
+        }
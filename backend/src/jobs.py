@@ -0,0 +1,430 @@
+# /backend/src/jobs.py
+"""
+File de jobs en arrière-plan pour les résumés.
+
+- POST enqueue une exécution du graphe et retourne immédiatement un identifiant de job.
+- Un pool borné de workers exécute les jobs : priorité d'abord, puis tourniquet entre clients
+  (un client qui envoie 50 vidéos ne bloque pas celui qui en envoie une).
+- Chaque événement reçoit un identifiant croissant (`id:` SSE) et les événements de nœud sont journalisés
+  dans SQLite : un client déconnecté reprend le flux avec `Last-Event-ID`, même après la fin du job.
+  Les fragments de texte sont numérotés à part (`<n° du dernier nœud>.<n>`), à partir d'un numéro réservé
+  à chaque exécution : une exécution reprise ne réutilise jamais un identifiant déjà envoyé.
+
+Les fragments de texte (`delta`) ne sont gardés qu'en mémoire pendant l'exécution : une fois le
+job terminé, le résumé complet est dans les événements de nœud journalisés.
+
+Plusieurs workers peuvent partager la même base : un job est « réclamé » atomiquement avant d'être
+exécuté, son worker donne régulièrement signe de vie, et un job dont le worker s'est arrêté est repris
+par un autre. Le flux SSE d'un job peut être servi par n'importe quel worker (journal SQLite).
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Set, Tuple
+from src.shared_state import PROCESS_ID
+
+JobRunner = Callable[[Dict[str, Any]], AsyncIterator[Dict[str, Any]]]
+
+FINISHED_STATUSES = ("done", "failed")
+_JOB_COLUMNS = "id, client_id, priority, status, request, result, error, created_at, started_at, finished_at"
+
+
+class JobQueueFull(Exception):
+    """La file de jobs a atteint sa taille maximale."""
+
+
+class JobStore:
+    """État durable des jobs et journal de leurs événements (SQLite, thread-safe)."""
+
+    def __init__(self, db_path: str):
+        # La base n'est ouverte (et créée) qu'au démarrage de la file, pas à l'import de l'API
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        """Ouvre la base et crée ou met à jour son schéma ; sans effet si elle est déjà ouverte."""
+        with self._lock:
+            if self._conn is not None:
+                return
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, client_id TEXT NOT NULL, priority INTEGER NOT NULL, status TEXT NOT NULL, "
+                "request TEXT NOT NULL, result TEXT, error TEXT, created_at REAL NOT NULL, "
+                "started_at REAL, finished_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_events ("
+                "job_id TEXT NOT NULL, seq INTEGER NOT NULL, event TEXT NOT NULL, PRIMARY KEY (job_id, seq))"
+            )
+            # Worker qui exécute le job et son dernier signe de vie (bases créées avant le multi-worker : ajout des colonnes)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            if "heartbeat" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat REAL")
+            # Plus grand numéro réservé par une exécution (les fragments émis ensuite ne sont pas journalisés)
+            if "seq_high" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN seq_high INTEGER")
+            conn.commit()
+            self._conn = conn
+
+    @staticmethod
+    def _row_to_job(row: Tuple) -> Dict[str, Any]:
+        job_id, client_id, priority, status, request, result, error, created_at, started_at, finished_at = row
+        return {
+            "job_id": job_id, "client_id": client_id, "priority": priority, "status": status,
+            "request": json.loads(request), "result": json.loads(result) if result else None, "error": error,
+            "created_at": created_at, "started_at": started_at, "finished_at": finished_at,
+        }
+
+    def create(self, request: Dict[str, Any], client_id: str, priority: int) -> Dict[str, Any]:
+        job = (uuid.uuid4().hex, client_id, priority, "queued", json.dumps(request), None, None, time.time(), None, None)
+        with self._lock:
+            self._conn.execute(f"INSERT INTO jobs ({_JOB_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", job)
+            self._conn.commit()
+        return self._row_to_job(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def set_status(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        now = time.time()
+        with self._lock:
+            if status == "running":
+                self._conn.execute("UPDATE jobs SET status = ?, started_at = ? WHERE id = ?", (status, now, job_id))
+            elif status in FINISHED_STATUSES:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                    (status, json.dumps(result) if result is not None else None, error, now, job_id),
+                )
+            else:
+                self._conn.execute("UPDATE jobs SET status = ? WHERE id = ?", (status, job_id))
+            self._conn.commit()
+
+    def claim(self, job_id: str, owner: str, stale_after: float) -> bool:
+        """
+        Passe le job à « running » pour `owner` s'il attend encore, ou si le worker qui l'exécutait
+        ne donne plus signe de vie. False si un autre worker l'a déjà pris (ou s'il est terminé).
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, heartbeat = ?, started_at = ? WHERE id = ? "
+                "AND (status = 'queued' OR (status = 'running' AND (heartbeat IS NULL OR heartbeat < ?)))",
+                (owner, now, now, job_id, now - stale_after),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def heartbeat(self, job_ids: List[str]) -> None:
+        with self._lock:
+            self._conn.executemany("UPDATE jobs SET heartbeat = ? WHERE id = ?", [(time.time(), job_id) for job_id in job_ids])
+            self._conn.commit()
+
+    def unfinished(self, stale_after: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Jobs en attente ou interrompus, dans l'ordre d'arrivée. Avec `stale_after`, les jobs « running »
+        ne sont retournés que si leur worker ne donne plus signe de vie depuis `stale_after` secondes.
+        """
+        query = f"SELECT {_JOB_COLUMNS} FROM jobs WHERE status = 'queued' OR (status = 'running'"
+        params: Tuple = ()
+        if stale_after is not None:
+            query += " AND (heartbeat IS NULL OR heartbeat < ?)"
+            params = (time.time() - stale_after,)
+        with self._lock:
+            rows = self._conn.execute(query + ") ORDER BY created_at", params).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def append_events(self, job_id: str, events: List[Tuple[int, str]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO job_events (job_id, seq, event) VALUES (?, ?, ?)",
+                [(job_id, seq, event) for seq, event in events],
+            )
+            self._conn.commit()
+
+    def events_after(self, job_id: str, after_seq: int) -> List[Tuple[int, str]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT seq, event FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq", (job_id, after_seq)
+            ).fetchall()
+
+    def reserve_seq(self, job_id: str) -> int:
+        """
+        Numéro de départ d'une exécution du job : au-delà de tout numéro déjà journalisé ou réservé,
+        donc des identifiants des fragments envoyés par une exécution précédente (interrompue).
+        """
+        with self._lock:
+            last = self._conn.execute("SELECT MAX(seq) FROM job_events WHERE job_id = ?", (job_id,)).fetchone()[0]
+            high = self._conn.execute("SELECT seq_high FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            reserved = max(last or 0, (high[0] if high else None) or 0) + 1
+            self._conn.execute("UPDATE jobs SET seq_high = ? WHERE id = ?", (reserved, job_id))
+            self._conn.commit()
+        return reserved
+
+    def purge(self, older_than: float) -> int:
+        """Supprime les jobs terminés avant `older_than` (timestamp) et leur journal."""
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (older_than,)
+            )]
+            self._conn.executemany("DELETE FROM job_events WHERE job_id = ?", [(job_id,) for job_id in ids])
+            self._conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in ids])
+            self._conn.commit()
+        return len(ids)
+
+
+EventId = Tuple[int, int]  # (numéro de nœud, numéro du fragment après ce nœud ; 0 pour le nœud lui-même)
+
+
+def parse_event_id(value: str) -> EventId:
+    """`Last-Event-ID` (« 12 » ou « 12.5 ») ; (0, 0) si absent ou invalide."""
+    seq, _, delta = value.strip().partition(".")
+    if not seq.isdigit() or (delta and not delta.isdigit()):
+        return 0, 0
+    return int(seq), int(delta or 0)
+
+
+def format_event_id(event_id: EventId) -> str:
+    seq, delta = event_id
+    return f"{seq}.{delta}" if delta else str(seq)
+
+
+class _LiveJob:
+    """Événements d'un job en cours d'exécution (y compris les deltas), pour les abonnés en direct."""
+
+    __slots__ = ("events", "done", "condition")
+
+    def __init__(self):
+        self.events: List[Tuple[EventId, str]] = []
+        self.done = False
+        self.condition = asyncio.Condition()
+
+
+class JobQueue:
+    """Pool borné de workers asynchrones, avec priorité et équité entre clients."""
+
+    def __init__(self, store: JobStore, runner: JobRunner, workers: int = 4, max_queued: int = 1000,
+                 heartbeat_interval: float = 10.0):
+        self.store = store
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        # Un job sans signe de vie depuis 3 intervalles est considéré comme abandonné par son worker
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = 3 * heartbeat_interval
+        self._pending_ids: Set[str] = set()
+        # priorité → tourniquet des clients → file FIFO des jobs de chaque client
+        self._pending: Dict[int, "Dict[str, Deque[str]]"] = {}
+        self._rotation: Dict[int, Deque[str]] = {}
+        self._queued = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._live: Dict[str, _LiveJob] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "resumed": 0, "running": 0, "claimed_elsewhere": 0}
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def _push(self, job_id: str, client_id: str, priority: int) -> None:
+        self._pending_ids.add(job_id)
+        clients = self._pending.setdefault(priority, {})
+        if client_id not in clients:
+            clients[client_id] = deque()
+            self._rotation.setdefault(priority, deque()).append(client_id)
+        clients[client_id].append(job_id)
+        self._queued += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _pop(self) -> Optional[str]:
+        """Job suivant : priorité la plus haute, puis le client suivant du tourniquet."""
+        for priority in sorted(self._pending, reverse=True):
+            clients, rotation = self._pending[priority], self._rotation[priority]
+            client_id = rotation.popleft()
+            job_id = clients[client_id].popleft()
+            if clients[client_id]:
+                rotation.append(client_id)
+            else:
+                del clients[client_id]
+            if not clients:
+                del self._pending[priority], self._rotation[priority]
+            self._queued -= 1
+            self._pending_ids.discard(job_id)
+            return job_id
+        return None
+
+    def position(self, job_id: str) -> Optional[int]:
+        """Position approximative dans la file (0 = prochain job), None si le job n'attend pas."""
+        position = 0
+        for priority in sorted(self._pending, reverse=True):
+            for jobs in self._pending[priority].values():
+                if job_id in jobs:
+                    return position + list(jobs).index(job_id)
+            position += sum(len(jobs) for jobs in self._pending[priority].values())
+        return None
+
+    async def start(self, retention: Optional[float] = None) -> None:
+        """Reprend les jobs non terminés (ex. après un redémarrage) et lance les workers."""
+        if self._tasks:
+            return
+        await asyncio.to_thread(self.store.open)
+        self._wakeup = asyncio.Event()
+        self._pending, self._rotation, self._queued, self._pending_ids = {}, {}, 0, set()
+        if retention:
+            self.store.purge(time.time() - retention)
+        resumed = self._recover()
+        if resumed:
+            print(f"♻️ Resuming {resumed} unfinished job(s).")
+        self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._watch()))
+
+    def _recover(self) -> int:
+        """
+        Met en file les jobs en attente ou abandonnés qui n'y sont pas encore : ceux d'un redémarrage,
+        d'un worker arrêté, ou soumis à un autre worker (la réclamation décide qui les exécute).
+        """
+        resumed = 0
+        for job in self.store.unfinished(self.stale_after):
+            if job["job_id"] not in self._pending_ids:
+                self._push(job["job_id"], job["client_id"], job["priority"])
+                resumed += 1
+        self.stats["resumed"] += resumed
+        return resumed
+
+    async def _watch(self) -> None:
+        """Signe de vie des jobs en cours, et reprise périodique des jobs abandonnés."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                if self._live:
+                    await asyncio.to_thread(self.store.heartbeat, list(self._live))
+                await asyncio.to_thread(self._recover)
+            except Exception as e:
+                print(f"⚠️ Job watcher error: {e}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, request: Dict[str, Any], client_id: str, priority: int = 0) -> Dict[str, Any]:
+        if self._queued >= self.max_queued:
+            raise JobQueueFull(f"Job queue is full ({self.max_queued} jobs waiting).")
+        job = self.store.create(request, client_id, priority)
+        self._push(job["job_id"], client_id, priority)
+        self.stats["submitted"] += 1
+        return job
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id = self._pop()
+            if job_id is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Réclamation atomique : un seul worker (ou processus) exécute chaque job
+            if not await asyncio.to_thread(self.store.claim, job_id, PROCESS_ID, self.stale_after):
+                self.stats["claimed_elsewhere"] += 1
+                continue
+            job = self.store.get(job_id)
+            if job is not None:
+                await self._execute(job)
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        job_id = job["job_id"]
+        live = self._live[job_id] = _LiveJob()
+        # Un job repris après un redémarrage continue au-delà de tout identifiant déjà envoyé
+        seq = await asyncio.to_thread(self.store.reserve_seq, job_id)
+        delta = 0
+        result: Dict[str, Any] = {}
+        error: Optional[str] = None
+        self.stats["running"] += 1
+        print(f"⚙️ Job {job_id} started (priority {job['priority']}, client {job['client_id']}).")
+        try:
+            async for event in self.runner(job["request"]):
+                payload = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+                if "delta" in event:
+                    delta += 1
+                else:
+                    seq, delta = seq + 1, 0
+                    for key in ("summary", "error_message", "video_id"):
+                        if event.get("data", {}).get(key) is not None:
+                            result[key] = event["data"][key]
+                    # Journal écrit à chaque événement de nœud (quelques-uns par job), avant sa diffusion :
+                    # un identifiant de nœud envoyé est toujours dans le journal
+                    await asyncio.to_thread(self.store.append_events, job_id, [(seq, payload)])
+                async with live.condition:
+                    live.events.append(((seq, delta), payload))
+                    live.condition.notify_all()
+        except asyncio.CancelledError:
+            # Arrêt du processus : le job retourne en file, repris au prochain démarrage ou par un autre worker
+            self.store.set_status(job_id, "queued")
+            self.stats["running"] -= 1
+            # Réveille les abonnés en direct : ils relisent le journal et voient le job revenu en file
+            await self._finish_live_async(job_id, live)
+            raise
+        except Exception as e:
+            error = str(e)
+            print(f"❌ Job {job_id} failed: {e}")
+        self.stats["running"] -= 1
+        error = error or result.get("error_message")
+        status = "failed" if error else "done"
+        self.store.set_status(job_id, status, result, error)
+        self.stats["failed" if error else "completed"] += 1
+        await self._finish_live_async(job_id, live)
+        print(f"✅ Job {job_id} finished with status '{status}'.")
+
+    async def _finish_live_async(self, job_id: str, live: _LiveJob) -> None:
+        async with live.condition:
+            live.done = True
+            live.condition.notify_all()
+        self._live.pop(job_id, None)
+
+    async def events(self, job_id: str, after: EventId = (0, 0)) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Événements (identifiant, JSON) du job après `after` : d'abord le journal, puis le direct
+        jusqu'à la fin du job. Attend si le job est encore dans la file.
+        """
+        while True:
+            live = self._live.get(job_id)
+            if live is None:
+                for seq, payload in self.store.events_after(job_id, after[0]):
+                    after = (seq, 0)
+                    yield format_event_id(after), payload
+                job = self.store.get(job_id)
+                if job is None or job["status"] in FINISHED_STATUSES:
+                    return
+                # En file d'attente (ou journal en cours d'écriture) : on repasse bientôt
+                await asyncio.sleep(0.5)
+                continue
+
+            index = 0
+            while True:
+                async with live.condition:
+                    await live.condition.wait_for(lambda: index < len(live.events) or live.done)
+                    batch = live.events[index:]
+                    index += len(batch)
+                    finished = live.done and index >= len(live.events)
+                for event_id, payload in batch:
+                    if event_id > after:
+                        after = event_id
+                        yield format_event_id(event_id), payload
+                if finished:
+                    break
+            # Fin du direct : le statut final est déjà enregistré, la boucle relit le journal puis s'arrête
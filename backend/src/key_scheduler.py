@@ -0,0 +1,274 @@
+# /backend/src/key_scheduler.py
+"""
+Ordonnanceur des clés API tenant compte des limites de débit.
+
+Chaque réponse de l'API met à jour le budget de sa clé (en-têtes `x-ratelimit-*`) ;
+une réponse 429 met la clé en pause (`retry-after`). On distribue toujours la clé qui a
+le plus de marge, et les appelants asynchrones peuvent attendre qu'une clé se libère.
+Une clé obtenue reste réservée jusqu'à `release()`, une fois l'appel terminé (réussi, en erreur ou annulé).
+Avec plusieurs workers, ce budget vit dans un registre partagé (voir src/shared_state.py) : les variantes
+`*_async` y accèdent depuis un thread, sans bloquer la boucle d'événements.
+"""
+import asyncio
+import contextlib
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Convertit une durée Groq/OpenAI ("7.66s", "2m59.56s", "250ms", "12") en secondes."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    factors = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(amount) * factors[unit] for amount, unit in parts)
+
+
+class KeyState:
+    """Budget connu d'une clé API."""
+
+    __slots__ = ("key", "limit_requests", "remaining_requests", "reset_requests_at",
+                 "limit_tokens", "remaining_tokens", "reset_tokens_at", "cooldown_until",
+                 "last_used", "in_flight", "rate_limited", "uses")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.limit_requests: Optional[int] = None
+        self.remaining_requests: Optional[int] = None
+        self.reset_requests_at = 0.0
+        self.limit_tokens: Optional[int] = None
+        self.remaining_tokens: Optional[int] = None
+        self.reset_tokens_at = 0.0
+        self.cooldown_until = 0.0
+        self.last_used = 0.0
+        self.in_flight = 0  # clés obtenues et pas encore rendues (`KeyScheduler.release`)
+        self.rate_limited = 0
+        self.uses = 0
+
+    def _refresh(self, now: float) -> None:
+        # Une fois la fenêtre écoulée, le budget est de nouveau plein
+        if self.remaining_requests is not None and now >= self.reset_requests_at:
+            self.remaining_requests = self.limit_requests
+        if self.remaining_tokens is not None and now >= self.reset_tokens_at:
+            self.remaining_tokens = self.limit_tokens
+
+    def _needed_tokens(self, estimated_tokens: int) -> int:
+        # Un appel plus gros que le budget d'une minute passe sur un budget plein : sinon il attendrait indéfiniment
+        needed = max(1, estimated_tokens)
+        return min(needed, self.limit_tokens) if self.limit_tokens else needed
+
+    def headroom(self, now: float, estimated_tokens: int = 0) -> float:
+        """Marge disponible entre 0 (inutilisable) et 1 (budget plein ou inconnu)."""
+        self._refresh(now)
+        if now < self.cooldown_until:
+            return 0.0
+        fractions = [1.0]
+        if self.remaining_requests is not None and self.limit_requests:
+            if self.remaining_requests <= 0:
+                return 0.0
+            fractions.append(self.remaining_requests / self.limit_requests)
+        if self.remaining_tokens is not None and self.limit_tokens:
+            if self.remaining_tokens < self._needed_tokens(estimated_tokens):
+                return 0.0
+            fractions.append(self.remaining_tokens / self.limit_tokens)
+        return min(fractions)
+
+    def available_at(self, now: float, estimated_tokens: int = 0) -> float:
+        """Instant à partir duquel la clé devrait de nouveau avoir de la marge."""
+        candidates = [self.cooldown_until]
+        if self.remaining_requests is not None and self.remaining_requests <= 0:
+            candidates.append(self.reset_requests_at)
+        if self.remaining_tokens is not None and self.remaining_tokens < self._needed_tokens(estimated_tokens):
+            candidates.append(self.reset_tokens_at)
+        return max(now, *candidates)
+
+    def snapshot(self, now: float) -> Dict[str, object]:
+        return {
+            "key": f"...{self.key[-4:]}" if self.key else "",
+            "headroom": round(self.headroom(now), 3),
+            "remaining_requests": self.remaining_requests,
+            "remaining_tokens": self.remaining_tokens,
+            "cooldown_seconds": round(max(0.0, self.cooldown_until - now), 2),
+            "in_flight": self.in_flight,
+            "uses": self.uses,
+            "rate_limited": self.rate_limited,
+        }
+
+
+class KeyScheduler:
+    """
+    Distribue les clés API selon leur marge de débit (thread-safe).
+    `ledger` (optionnel, ex. `SharedKeyLedger`) partage le budget des clés entre processus : il est relu
+    avant chaque décision et réécrit après, sous un verrou commun à tous les workers.
+    """
+
+    def __init__(self, keys: List[str], default_cooldown: float = 30.0, ledger: Optional[Any] = None):
+        self.default_cooldown = default_cooldown
+        self.ledger = ledger
+        self._states: Dict[str, KeyState] = {key: KeyState(key) for key in keys}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _synced(self, write: bool = True) -> Iterator[None]:
+        with self._lock:
+            if self.ledger is None:
+                yield
+            else:
+                with self.ledger.transaction(self._states, write):
+                    yield
+
+    async def _off_loop(self, fn: Callable[..., Any], *args) -> Any:
+        # Registre partagé : I/O SQLite (et attente de son verrou) dans un thread plutôt que sur la boucle
+        if self.ledger is None:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    @property
+    def keys(self) -> List[str]:
+        return list(self._states)
+
+    def _best(self, now: float, estimated_tokens: int) -> Optional[KeyState]:
+        best: Optional[KeyState] = None
+        best_score = 0.0
+        for state in self._states.values():
+            # Les requêtes en cours n'apparaissent pas encore dans les en-têtes : on les répartit
+            score = state.headroom(now, estimated_tokens) / (1 + state.in_flight)
+            # À marge égale, la clé utilisée le moins récemment
+            if score > best_score or (best is not None and score == best_score and state.last_used < best.last_used):
+                best, best_score = state, score
+        return best if best_score > 0 else None
+
+    def _reserve(self, state: KeyState, now: float, estimated_tokens: int) -> str:
+        state.last_used = now
+        state.uses += 1
+        state.in_flight += 1
+        # Réservation locale en attendant les en-têtes de la réponse
+        if state.remaining_requests is not None:
+            state.remaining_requests -= 1
+        if state.remaining_tokens is not None and estimated_tokens:
+            state.remaining_tokens -= estimated_tokens
+        return state.key
+
+    def token_limit(self) -> Optional[int]:
+        """
+        Plus grand budget de tokens par minute connu parmi les clés (en-têtes déjà reçus), None si inconnu.
+        Lu dans l'état local, rechargé du registre partagé à chaque réservation : pas d'I/O ici.
+        """
+        with self._lock:
+            limits = [state.limit_tokens for state in self._states.values() if state.limit_tokens]
+        return max(limits) if limits else None
+
+    def try_acquire(self, estimated_tokens: int = 0) -> Optional[str]:
+        """Retourne la clé ayant le plus de marge, ou None si aucune n'est utilisable maintenant."""
+        with self._synced():
+            now = time.time()
+            state = self._best(now, estimated_tokens)
+            return self._reserve(state, now, estimated_tokens) if state else None
+
+    def acquire(self, estimated_tokens: int = 0) -> str:
+        """Comme `try_acquire`, mais sans jamais échouer : à défaut, la clé qui se libère le plus tôt."""
+        if not self._states:
+            return ""
+        with self._synced():
+            now = time.time()
+            state = self._best(now, estimated_tokens)
+            if state is None:
+                state = min(self._states.values(), key=lambda s: s.available_at(now, estimated_tokens))
+            return self._reserve(state, now, estimated_tokens)
+
+    def next_available_in(self, estimated_tokens: int = 0) -> float:
+        if not self._states:
+            return 0.0
+        with self._synced(write=False):
+            now = time.time()
+            return min(state.available_at(now, estimated_tokens) for state in self._states.values()) - now
+
+    async def acquire_async(self, estimated_tokens: int = 0, timeout: Optional[float] = None) -> str:
+        """Attend (sans bloquer la boucle) qu'une clé ait la marge nécessaire ; TimeoutError après `timeout` secondes."""
+        deadline = time.time() + timeout if timeout is not None else None
+        waited = False
+        while True:
+            key = await self._off_loop(self.try_acquire, estimated_tokens)
+            if key is not None or not self._states:
+                return key or ""
+            wait = max(0.05, await self._off_loop(self.next_available_in, estimated_tokens))
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError("No API key has enough rate-limit headroom.")
+                wait = min(wait, remaining)
+            if not waited:
+                print(f"⏳ All API keys are rate limited, waiting up to {wait:.1f}s for capacity...")
+                waited = True
+            await asyncio.sleep(min(wait, 5.0))
+
+    def update_from_headers(self, key: str, headers: Mapping[str, str], status_code: int = 200) -> None:
+        """Met à jour le budget d'une clé à partir des en-têtes de réponse de l'API."""
+        state = self._states.get(key)
+        if state is None:
+            return
+        with self._synced():
+            now = time.time()
+
+            def as_int(name: str) -> Optional[int]:
+                value = headers.get(name)
+                try:
+                    return int(float(value)) if value is not None else None
+                except ValueError:
+                    return None
+
+            limit_requests, remaining_requests = as_int("x-ratelimit-limit-requests"), as_int("x-ratelimit-remaining-requests")
+            limit_tokens, remaining_tokens = as_int("x-ratelimit-limit-tokens"), as_int("x-ratelimit-remaining-tokens")
+            if limit_requests is not None:
+                state.limit_requests = limit_requests
+            if remaining_requests is not None:
+                state.remaining_requests = remaining_requests
+                state.reset_requests_at = now + (parse_reset_duration(headers.get("x-ratelimit-reset-requests")) or 60.0)
+            if limit_tokens is not None:
+                state.limit_tokens = limit_tokens
+            if remaining_tokens is not None:
+                state.remaining_tokens = remaining_tokens
+                state.reset_tokens_at = now + (parse_reset_duration(headers.get("x-ratelimit-reset-tokens")) or 60.0)
+
+            if status_code == 429:
+                retry_after = parse_reset_duration(headers.get("retry-after")) or self.default_cooldown
+                state.cooldown_until = max(state.cooldown_until, now + retry_after)
+                state.rate_limited += 1
+                print(f"🧊 API key ...{key[-4:]} rate limited, cooling down for {retry_after:.1f}s.")
+
+    async def update_from_headers_async(self, key: str, headers: Mapping[str, str], status_code: int = 200) -> None:
+        await self._off_loop(self.update_from_headers, key, headers, status_code)
+
+    def release(self, key: str) -> None:
+        """Rend la réservation d'une clé (`in_flight`) : une fois par clé obtenue, que l'appel ait réussi ou non."""
+        state = self._states.get(key)
+        if state is None:
+            return
+        with self._synced():
+            state.in_flight = max(0, state.in_flight - 1)
+
+    async def release_async(self, key: str) -> None:
+        await self._off_loop(self.release, key)
+
+    def report_rate_limited(self, key: str, retry_after: Optional[float] = None) -> None:
+        """Met une clé en pause après un 429 (quand les en-têtes ne sont pas disponibles)."""
+        self.update_from_headers(key, {"retry-after": str(retry_after or self.default_cooldown)}, 429)
+
+    async def report_rate_limited_async(self, key: str, retry_after: Optional[float] = None) -> None:
+        await self._off_loop(self.report_rate_limited, key, retry_after)
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        with self._synced(write=False):
+            now = time.time()
+            return [state.snapshot(now) for state in self._states.values()]
@@ -0,0 +1,117 @@
+# /backend/src/language_detection.py
+"""
+Identification locale et rapide de la langue d'un texte (quelques microsecondes à quelques
+millisecondes, sans appel réseau ni modèle).
+
+- Écritures non latines : la langue se déduit de l'écriture dominante (kana → japonais, hangul → coréen...).
+- Écriture latine : profil de mots-outils (les mots les plus fréquents de chaque langue).
+"""
+import re
+from typing import Dict, Optional, Tuple
+
+# Noms de langue acceptés (en plusieurs langues) → code ISO 639-1
+LANGUAGE_ALIASES: Dict[str, str] = {
+    "en": "en", "english": "en", "anglais": "en", "inglés": "en", "ingles": "en", "englisch": "en", "inglese": "en", "inglês": "en",
+    "fr": "fr", "french": "fr", "français": "fr", "francais": "fr", "francés": "fr", "frances": "fr", "französisch": "fr", "francese": "fr",
+    "es": "es", "spanish": "es", "español": "es", "espanol": "es", "espagnol": "es", "spanisch": "es", "spagnolo": "es", "espanhol": "es",
+    "de": "de", "german": "de", "deutsch": "de", "allemand": "de", "alemán": "de", "aleman": "de", "tedesco": "de", "alemão": "de",
+    "it": "it", "italian": "it", "italiano": "it", "italien": "it", "italienisch": "it",
+    "pt": "pt", "portuguese": "pt", "português": "pt", "portugues": "pt", "portugais": "pt", "portugués": "pt", "portugiesisch": "pt",
+    "nl": "nl", "dutch": "nl", "nederlands": "nl", "néerlandais": "nl", "neerlandais": "nl", "niederländisch": "nl",
+    "tr": "tr", "turkish": "tr", "türkçe": "tr", "turc": "tr",
+    "pl": "pl", "polish": "pl", "polski": "pl", "polonais": "pl",
+    "ru": "ru", "russian": "ru", "русский": "ru", "russe": "ru",
+    "uk": "uk", "ukrainian": "uk", "українська": "uk", "ukrainien": "uk",
+    "ar": "ar", "arabic": "ar", "العربية": "ar", "arabe": "ar",
+    "he": "he", "hebrew": "he", "עברית": "he", "hébreu": "he",
+    "hi": "hi", "hindi": "hi", "हिन्दी": "hi",
+    "el": "el", "greek": "el", "ελληνικά": "el", "grec": "el",
+    "zh": "zh", "chinese": "zh", "中文": "zh", "chinois": "zh", "mandarin": "zh",
+    "ja": "ja", "japanese": "ja", "日本語": "ja", "japonais": "ja",
+    "ko": "ko", "korean": "ko", "한국어": "ko", "coréen": "ko", "coreen": "ko",
+}
+
+# Mots-outils les plus fréquents des langues en écriture latine
+_STOPWORDS: Dict[str, frozenset] = {
+    "en": frozenset("the and of to is in that it for on with as are this be was by not or from at have an but they which you can".split()),
+    "fr": frozenset("le la les de des du et est un une en que qui dans pour pas sur au aux avec ce cette sont il elle se plus par ou".split()),
+    "es": frozenset("el la los las de del y que en un una es por con para no se su al lo como más pero sus le ya o este".split()),
+    "de": frozenset("der die das und ist nicht zu den von mit sich des auf für im dem ein eine als auch es an werden aus er sie".split()),
+    "it": frozenset("il lo la gli le di e che è un una per non con del della sono si da in al nel come più anche questo".split()),
+    "pt": frozenset("o a os as de do da dos das e que é um uma em para com não se por mais como mas ao na no seu são também isso pelo pela muito você".split()),
+    "nl": frozenset("de het een en van is dat die in te niet op met voor zijn er aan ook als bij om door maar dan wordt".split()),
+    "tr": frozenset("ve bir bu da de için ile çok daha gibi olarak olan ne ama en her kadar sonra değil mi var".split()),
+    "pl": frozenset("i w na nie z się do to że jest o jak co ale od po za tak przez są dla czy już tylko".split()),
+}
+
+# Poids de chaque mot-outil : un mot partagé par n langues ne compte que pour 1/n dans chacune
+_WEIGHTS: Dict[str, Dict[str, float]] = {}
+for _code, _words in _STOPWORDS.items():
+    for _word in _words:
+        _WEIGHTS.setdefault(_word, {})[_code] = 1.0
+for _word, _codes in _WEIGHTS.items():
+    for _code in _codes:
+        _codes[_code] = 1.0 / len(_codes)
+
+_WORD = re.compile(r"[^\W\d_]+", re.UNICODE)
+_MARKDOWN = re.compile(r"[#*_`>\[\]()|~-]+")
+
+# Plages Unicode des écritures non latines
+_SCRIPTS = (
+    ("kana", re.compile(r"[\u3040-\u30ff]")),
+    ("hangul", re.compile(r"[\uac00-\ud7af\u1100-\u11ff]")),
+    ("han", re.compile(r"[\u4e00-\u9fff\u3400-\u4dbf]")),
+    ("arabic", re.compile(r"[\u0600-\u06ff\u0750-\u077f]")),
+    ("hebrew", re.compile(r"[\u0590-\u05ff]")),
+    ("cyrillic", re.compile(r"[\u0400-\u04ff]")),
+    ("devanagari", re.compile(r"[\u0900-\u097f]")),
+    ("greek", re.compile(r"[\u0370-\u03ff]")),
+)
+_UKRAINIAN_LETTERS = re.compile(r"[іїєґІЇЄҐ]")
+
+
+def normalize_language(language: str) -> Optional[str]:
+    """Convertit un nom de langue libre ("français", "English", "es") en code ISO ; None si inconnu."""
+    return LANGUAGE_ALIASES.get(language.strip().lower()) if language else None
+
+
+def detect_language(text: str, sample_size: int = 4000) -> Tuple[Optional[str], float]:
+    """
+    Retourne (code ISO, confiance entre 0 et 1) pour le texte donné, ou (None, 0.0) si indéterminé.
+    Seuls les `sample_size` premiers caractères sont analysés.
+    """
+    sample = _MARKDOWN.sub(" ", text[:sample_size])
+    letters = sum(1 for char in sample if char.isalpha())
+    if not letters:
+        return None, 0.0
+
+    counts = {name: len(pattern.findall(sample)) for name, pattern in _SCRIPTS}
+    if counts["kana"] and counts["kana"] + counts["han"] > letters * 0.3:
+        return "ja", min(1.0, (counts["kana"] + counts["han"]) / letters)
+    if counts["hangul"] > letters * 0.3:
+        return "ko", counts["hangul"] / letters
+    if counts["han"] > letters * 0.3:
+        return "zh", counts["han"] / letters
+    for script, code in (("arabic", "ar"), ("hebrew", "he"), ("devanagari", "hi"), ("greek", "el")):
+        if counts[script] > letters * 0.5:
+            return code, counts[script] / letters
+    if counts["cyrillic"] > letters * 0.5:
+        code = "uk" if _UKRAINIAN_LETTERS.search(sample) else "ru"
+        return code, counts["cyrillic"] / letters
+
+    words = [word.lower() for word in _WORD.findall(sample)]
+    if not words:
+        return None, 0.0
+    scores = dict.fromkeys(_STOPWORDS, 0.0)
+    for word in words:
+        for code, weight in _WEIGHTS.get(word, {}).items():
+            scores[code] += weight
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    best, best_score = ranked[0]
+    runner_up = ranked[1][1]
+    if best_score == 0:
+        return None, 0.0
+    # Confiance : avance du meilleur profil sur le second, pondérée par la densité de mots-outils
+    margin = (best_score - runner_up) / best_score
+    density = min(1.0, best_score / (len(words) * 0.1))
+    return best, round(margin * density, 3)
@@ -0,0 +1,205 @@
+# /backend/src/metrics.py
+"""
+Instrumentation du pipeline : métriques Prometheus (exposées sur /metrics) et détail des temps par requête.
+
+- Chaque nœud LangGraph est enveloppé par `instrument_node` : latence par nœud et statut, et une entrée
+  dans `node_timings` (état du graphe) avec les appels LLM faits pendant ce nœud.
+- Chaque appel LLM passe par `LLMMetricsHandler` (callback LangChain) : latence par étape
+  (direct, map, collapse, combine, translation), tokens de prompt et de complétion, par clé API.
+- Les exécutions annulées faute de client (déconnexion) sont comptées, avec une estimation des tokens épargnés.
+
+prometheus_client est optionnel : sans lui, les métriques sont ignorées mais le détail par requête reste disponible.
+Avec plusieurs workers, définir PROMETHEUS_MULTIPROC_DIR (répertoire vide au démarrage) : /metrics agrège alors tous les processus.
+"""
+import asyncio
+import functools
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, multiprocess
+    from prometheus_client import generate_latest as _generate_latest
+
+    METRICS_ENABLED = True
+
+    def generate_latest() -> bytes:
+        """Métriques au format texte Prometheus, agrégées sur tous les workers en mode multi-processus."""
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return _generate_latest(registry)
+        return _generate_latest()
+except ImportError:  # prometheus_client est optionnel
+    METRICS_ENABLED = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+    class _NoopMetric:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def labels(self, *args, **kwargs) -> "_NoopMetric":
+            return self
+
+        def observe(self, *args, **kwargs) -> None:
+            pass
+
+        def inc(self, *args, **kwargs) -> None:
+            pass
+
+    Counter = Histogram = _NoopMetric
+
+    def generate_latest(*args, **kwargs) -> bytes:
+        return b"# prometheus_client is not installed\n"
+
+_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1800)
+_TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+
+NODE_SECONDS = Histogram(
+    "zenyth_node_duration_seconds", "Duration of one LangGraph node.", ["node", "status"], buckets=_LATENCY_BUCKETS
+)
+LLM_SECONDS = Histogram(
+    "zenyth_llm_call_duration_seconds", "Duration of one LLM call.", ["stage", "model", "status"], buckets=_LATENCY_BUCKETS
+)
+LLM_TOKENS = Histogram(
+    "zenyth_llm_call_tokens", "Tokens of one LLM call.", ["stage", "kind"], buckets=_TOKEN_BUCKETS
+)
+LLM_KEY_TOKENS = Counter("zenyth_llm_tokens_total", "Tokens used, per API key.", ["api_key", "kind"])
+LLM_RETRIES = Counter("zenyth_llm_retries_total", "LLM calls retried on another API key.", ["reason"])
+CACHE_LOOKUPS = Counter("zenyth_cache_lookups_total", "Cache lookups.", ["cache", "result"])
+SUMMARY_CHUNKS = Histogram(
+    "zenyth_summary_chunks", "Transcript chunks per summary.", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+TRANSCRIPT_FETCH_SECONDS = Histogram(
+    "zenyth_transcript_fetch_duration_seconds", "Transcript retrieval.", ["source", "status"], buckets=_LATENCY_BUCKETS
+)
+TRANSCRIPT_ATTEMPT_SECONDS = Histogram(
+    "zenyth_transcript_attempt_duration_seconds", "One transcript fetch attempt (hedged fetching).", ["route", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+PROXY_RETRIES = Counter("zenyth_proxy_retries_total", "HTTP retries through the YouTube proxy.")
+RUNS_CANCELLED = Counter("zenyth_runs_cancelled_total", "Graph runs cancelled because no client was listening anymore.", ["source"])
+CANCELLED_TOKENS = Counter(
+    "zenyth_cancelled_tokens_saved_total", "Estimated LLM tokens not spent because their run was cancelled.", ["stage"]
+)
+DEDUP_TOKENS = Counter(
+    "zenyth_dedup_tokens_total", "Transcript tokens (estimate) removed before the map phase.", ["kind"]
+)
+ADMISSIONS = Counter("zenyth_admissions_total", "Admission control decisions for /summarize.", ["result"])
+ADMISSION_WAIT_SECONDS = Histogram(
+    "zenyth_admission_wait_seconds", "Time spent in the admission queue.", buckets=(0.001, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+
+# Compteurs du processus (voir /stats) : exécutions annulées et tokens épargnés (estimation : travail non terminé)
+CANCELLATION_STATS = {"runs": 0, "tokens_saved": 0}
+
+# Étape courante des appels LLM (map, collapse...) et compteurs de la requête en cours (nœud courant)
+llm_stage: ContextVar[str] = ContextVar("llm_stage", default="llm")
+llm_usage: ContextVar[Optional[Dict[str, float]]] = ContextVar("llm_usage", default=None)
+
+
+def record_cancelled_run(source: str) -> None:
+    CANCELLATION_STATS["runs"] += 1
+    RUNS_CANCELLED.labels(source).inc()
+
+
+def record_cancelled_tokens(stage: str, tokens: int) -> None:
+    """Tokens (prompt + sortie estimée) des appels LLM abandonnés ou jamais lancés à cause d'une annulation."""
+    if tokens > 0:
+        CANCELLATION_STATS["tokens_saved"] += tokens
+        CANCELLED_TOKENS.labels(stage).inc(tokens)
+
+
+def mask_key(api_key: str) -> str:
+    return f"...{api_key[-4:]}" if api_key else "none"
+
+
+def _token_usage(response: LLMResult) -> Dict[str, int]:
+    """Tokens de prompt et de complétion d'une réponse (appel direct ou streamé)."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return {"prompt": usage.get("prompt_tokens") or 0, "completion": usage.get("completion_tokens") or 0}
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return {"prompt": metadata.get("input_tokens") or 0, "completion": metadata.get("output_tokens") or 0}
+    return {"prompt": 0, "completion": 0}
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """Callback attaché à chaque instance LLM : latence et tokens de chaque appel."""
+
+    run_inline = True  # exécuté dans la coroutine de l'appel (accès aux ContextVar, pas de thread)
+
+    def __init__(self, api_key: str = "", model: str = ""):
+        self.api_key = mask_key(api_key)
+        self.model = model
+        self._started: Dict[UUID, tuple] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = (time.perf_counter(), llm_stage.get())
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = (time.perf_counter(), llm_stage.get())
+
+    def _finish(self, run_id: UUID, status: str, tokens: Dict[str, int]) -> None:
+        started, stage = self._started.pop(run_id, (time.perf_counter(), llm_stage.get()))
+        elapsed = time.perf_counter() - started
+        LLM_SECONDS.labels(stage, self.model, status).observe(elapsed)
+        for kind, count in tokens.items():
+            if count:
+                LLM_TOKENS.labels(stage, kind).observe(count)
+                LLM_KEY_TOKENS.labels(self.api_key, kind).inc(count)
+        usage = llm_usage.get()
+        if usage is not None:
+            usage["llm_calls"] += 1
+            usage["llm_seconds"] += elapsed
+            usage["prompt_tokens"] += tokens.get("prompt", 0)
+            usage["completion_tokens"] += tokens.get("completion", 0)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "success", _token_usage(response))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "cancelled" if isinstance(error, asyncio.CancelledError) else "error", {})
+
+
+def instrument_node(name: str, node: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]):
+    """Enveloppe un nœud du graphe : histogramme de latence et entrée `node_timings` dans sa mise à jour."""
+
+    @functools.wraps(node)
+    async def wrapper(state: Dict[str, Any]) -> Dict[str, Any]:
+        usage = {"llm_calls": 0, "llm_seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+        usage_token = llm_usage.set(usage)
+        started = time.perf_counter()
+        try:
+            update = await node(state)
+        except Exception:
+            NODE_SECONDS.labels(name, "exception").observe(time.perf_counter() - started)
+            raise
+        finally:
+            llm_usage.reset(usage_token)
+        elapsed = time.perf_counter() - started
+        NODE_SECONDS.labels(name, "error" if update.get("error_message") else "success").observe(elapsed)
+        usage["llm_seconds"] = round(usage["llm_seconds"], 3)
+        timing = {"node": name, "seconds": round(elapsed, 3), **usage}
+        return {**update, "node_timings": [timing]}
+
+    return wrapper
+
+
+def timing_breakdown(node_timings: Any) -> Dict[str, Any]:
+    """Résumé des temps d'une requête, à partir des entrées `node_timings` de l'état."""
+    node_timings = list(node_timings or [])
+    return {
+        "total_seconds": round(sum(entry["seconds"] for entry in node_timings), 3),
+        "llm_calls": sum(entry["llm_calls"] for entry in node_timings),
+        "prompt_tokens": sum(entry["prompt_tokens"] for entry in node_timings),
+        "completion_tokens": sum(entry["completion_tokens"] for entry in node_timings),
+        "nodes": node_timings,
+    }
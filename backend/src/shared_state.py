@@ -0,0 +1,234 @@
+# /backend/src/shared_state.py
+"""
+État partagé entre les workers (processus uvicorn) et les réplicas d'une même machine, dans un fichier SQLite (WAL).
+
+- `SharedKeyLedger` : budget des clés API (en-têtes `x-ratelimit-*`, pauses après un 429, requêtes en cours),
+  chargé et réécrit par `KeyScheduler` sous un verrou exclusif entre processus : deux workers ne
+  consomment pas la même marge. Les lectures seules (états, délais d'attente) ne prennent pas ce verrou.
+- `SharedRunLog` : registre des exécutions du graphe en cours et journal de leurs événements. Un worker
+  qui reçoit une requête déjà en cours ailleurs suit ce journal au lieu de relancer le graphe, et y signale
+  sa présence : l'exécution n'est pas annulée tant qu'un client la suit depuis un autre worker.
+
+Les caches (résumés, sorties map, transcriptions) et les jobs sont déjà dans SQLite, donc déjà partagés.
+Un verrou SQLite ne vaut que pour une machine (ou un volume partagé) : au-delà, il faut un backend réseau.
+"""
+import contextlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Identifiant de ce processus (un par worker uvicorn)
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+LEDGER_FIELDS = (
+    "limit_requests", "remaining_requests", "reset_requests_at", "limit_tokens", "remaining_tokens",
+    "reset_tokens_at", "cooldown_until", "last_used", "in_flight",
+)
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Mode autocommit : les transactions sont ouvertes explicitement (BEGIN IMMEDIATE = verrou d'écriture)
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+class SharedKeyLedger:
+    """Budget des clés API partagé entre processus (thread-safe)."""
+
+    def __init__(self, db_path: str, in_flight_ttl: float = 1800.0):
+        # Requêtes « en cours » d'une clé inutilisée depuis `in_flight_ttl` : worker arrêté sans les rendre
+        self.in_flight_ttl = in_flight_ttl
+        self._lock = threading.Lock()
+        self._conn = _connect(db_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS key_ledger (key TEXT PRIMARY KEY, "
+            + ", ".join(f"{field} REAL" for field in LEDGER_FIELDS) + ", updated_at REAL NOT NULL)"
+        )
+
+    @contextlib.contextmanager
+    def transaction(self, states: Dict[str, Any], write: bool = True) -> Iterator[None]:
+        """
+        Charge l'état partagé dans `states` (KeyState par clé), puis enregistre leurs modifications.
+        Tout le bloc s'exécute sous un verrou exclusif entre processus. Avec `write=False`, simple lecture
+        d'un instantané cohérent (transaction différée, sans verrou d'écriture) : rien n'est réécrit.
+        """
+        columns = ", ".join(LEDGER_FIELDS)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                now = time.time()
+                for row in self._conn.execute(f"SELECT key, {columns} FROM key_ledger"):
+                    state = states.get(row[0])
+                    if state is None:
+                        continue
+                    values = dict(zip(LEDGER_FIELDS, row[1:]))
+                    for field in ("limit_requests", "remaining_requests", "limit_tokens", "remaining_tokens"):
+                        if values[field] is not None:
+                            values[field] = int(values[field])
+                    values["in_flight"] = int(values["in_flight"] or 0)
+                    if values["in_flight"] and now - (values["last_used"] or 0) > self.in_flight_ttl:
+                        values["in_flight"] = 0
+                    for field, value in values.items():
+                        # Budgets inconnus : None ; instants jamais atteints : 0
+                        if value is None and not field.startswith(("limit", "remaining")):
+                            value = 0.0
+                        setattr(state, field, value)
+                yield
+                if write:
+                    self._conn.executemany(
+                        f"INSERT OR REPLACE INTO key_ledger (key, {columns}, updated_at) "
+                        f"VALUES (?, {', '.join('?' for _ in LEDGER_FIELDS)}, ?)",
+                        [(state.key, *(getattr(state, field) for field in LEDGER_FIELDS), time.time()) for state in states.values()],
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+class SharedRunLog:
+    """
+    Exécutions du graphe en cours, tous workers confondus, et journal de leurs événements (thread-safe).
+    Une exécution dont le worker ne donne plus signe de vie depuis `stale_after` secondes peut être reprise.
+    """
+
+    def __init__(self, db_path: str, stale_after: float = 30.0, retention: float = 600.0):
+        self.stale_after = stale_after
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._conn = _connect(db_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs (run_key TEXT PRIMARY KEY, run_id TEXT NOT NULL, owner TEXT NOT NULL, "
+            "status TEXT NOT NULL, heartbeat REAL NOT NULL, finished_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS run_events ("
+            "run_id TEXT NOT NULL, seq INTEGER NOT NULL, event TEXT NOT NULL, PRIMARY KEY (run_id, seq))"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS finished_runs (run_id TEXT PRIMARY KEY, finished_at REAL NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS run_followers ("
+            "run_id TEXT NOT NULL, follower TEXT NOT NULL, heartbeat REAL NOT NULL, PRIMARY KEY (run_id, follower))"
+        )
+
+    def claim(self, run_key: str) -> Tuple[bool, str]:
+        """
+        Réserve l'exécution de `run_key` pour ce processus.
+        Retourne (True, nouvel identifiant) si on doit l'exécuter, (False, identifiant) si un autre worker l'exécute déjà.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT run_id, owner, status, heartbeat FROM runs WHERE run_key = ?", (run_key,)
+                ).fetchone()
+                if row is not None:
+                    run_id, owner, status, heartbeat = row
+                    if status == "running" and owner != PROCESS_ID and now - heartbeat < self.stale_after:
+                        self._conn.execute("COMMIT")
+                        return False, run_id
+                run_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO runs (run_key, run_id, owner, status, heartbeat, finished_at) VALUES (?, ?, ?, 'running', ?, NULL)",
+                    (run_key, run_id, PROCESS_ID, now),
+                )
+                # Ménage : journaux des exécutions terminées depuis longtemps
+                expired = [(old,) for (old,) in self._conn.execute(
+                    "SELECT run_id FROM finished_runs WHERE finished_at < ?", (now - self.retention,)
+                )]
+                self._conn.executemany("DELETE FROM run_events WHERE run_id = ?", expired)
+                self._conn.executemany("DELETE FROM finished_runs WHERE run_id = ?", expired)
+                self._conn.execute("DELETE FROM run_followers WHERE heartbeat < ?", (now - self.retention,))
+                # ... et des exécutions abandonnées (worker arrêté), remplacées depuis
+                self._conn.execute(
+                    "DELETE FROM run_events WHERE run_id NOT IN (SELECT run_id FROM runs) "
+                    "AND run_id NOT IN (SELECT run_id FROM finished_runs)"
+                )
+                self._conn.execute("COMMIT")
+                return True, run_id
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def append(self, run_key: str, run_id: str, events: List[Tuple[int, str]]) -> None:
+        """Ajoute des événements (seq, JSON) au journal ; vaut aussi signe de vie."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO run_events (run_id, seq, event) VALUES (?, ?, ?)",
+                [(run_id, seq, event) for seq, event in events],
+            )
+            self._conn.execute("UPDATE runs SET heartbeat = ? WHERE run_key = ? AND run_id = ?", (time.time(), run_key, run_id))
+            self._conn.execute("COMMIT")
+
+    def heartbeat(self, run_key: str, run_id: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE runs SET heartbeat = ? WHERE run_key = ? AND run_id = ?", (time.time(), run_key, run_id))
+
+    def finish(self, run_key: str, run_id: str, status: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                "UPDATE runs SET status = ?, finished_at = ? WHERE run_key = ? AND run_id = ?", (status, now, run_key, run_id)
+            )
+            self._conn.execute("INSERT OR REPLACE INTO finished_runs (run_id, finished_at) VALUES (?, ?)", (run_id, now))
+            self._conn.execute("COMMIT")
+
+    def touch_follower(self, run_id: str, follower: str) -> None:
+        """Signe de vie d'un client qui suit l'exécution depuis un autre worker."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO run_followers (run_id, follower, heartbeat) VALUES (?, ?, ?)",
+                (run_id, follower, time.time()),
+            )
+
+    def remove_follower(self, run_id: str, follower: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM run_followers WHERE run_id = ? AND follower = ?", (run_id, follower))
+
+    def has_followers(self, run_id: str) -> bool:
+        """Un client suit-il encore l'exécution depuis un autre worker (signe de vie depuis moins de `stale_after`) ?"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM run_followers WHERE run_id = ? AND heartbeat >= ? LIMIT 1",
+                (run_id, time.time() - self.stale_after),
+            ).fetchone()
+        return row is not None
+
+    def read(self, run_key: str, run_id: str, after_seq: int) -> Tuple[List[Tuple[int, str]], bool, bool]:
+        """
+        Événements de l'exécution après `after_seq`, si elle est terminée, et si elle est abandonnée
+        (worker arrêté, ou exécution annulée faute de client sur son worker).
+        Lus dans la même transaction : une exécution terminée a un journal complet.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                events = self._conn.execute(
+                    "SELECT seq, event FROM run_events WHERE run_id = ? AND seq > ? ORDER BY seq", (run_id, after_seq)
+                ).fetchall()
+                finished = self._conn.execute("SELECT 1 FROM finished_runs WHERE run_id = ?", (run_id,)).fetchone()
+                row = self._conn.execute(
+                    "SELECT run_id, status, heartbeat FROM runs WHERE run_key = ?", (run_key,)
+                ).fetchone()
+            finally:
+                self._conn.execute("COMMIT")
+        if row is not None and row[0] == run_id and row[1] == "cancelled":
+            # Ses clients sont partis, pas forcément ceux des autres workers : à reprendre
+            return events, False, True
+        if finished is not None:
+            return events, True, False
+        if row is None or row[0] != run_id:
+            # Remplacée par une nouvelle exécution sans avoir été terminée : le worker s'est arrêté
+            return events, False, True
+        return events, False, time.time() - row[2] > self.stale_after
@@ -0,0 +1,315 @@
+# /backend/src/singleflight.py
+"""
+Coalescence des travaux identiques en cours (« single-flight »).
+
+- `SingleFlight` : les appels concurrents (threads) avec la même clé partagent une seule exécution.
+- `AsyncSingleFlight` : même principe pour les coroutines concurrentes d'une même boucle d'événements.
+- `InFlightRegistry` : les flux asynchrones concurrents avec la même clé s'attachent à une seule
+  exécution et reçoivent tous ses événements, y compris ceux émis avant leur arrivée. Avec un journal
+  partagé (`SharedRunLog`), c'est aussi vrai d'un worker à l'autre. Une exécution que plus personne
+  ne suit (clients déconnectés) peut être annulée.
+"""
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+from src.metrics import record_cancelled_run
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Exécute `fn` une seule fois par clé parmi les appels concurrents (thread-safe)."""
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.stats = {"executions": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.stats["executions"] += 1
+                leader = True
+
+        if not leader:
+            print(f"🔗 [{self.name}] Joining in-flight call for '{key}'.")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+
+class AsyncSingleFlight:
+    """Exécute la coroutine produite par `fn` une seule fois par clé parmi les appels concurrents."""
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"executions": 0, "coalesced": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._futures.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            print(f"🔗 [{self.name}] Joining in-flight call for '{key}'.")
+            # shield : l'annulation d'un appelant n'annule pas le travail partagé
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(fn())
+        self._futures[key] = future
+        self.stats["executions"] += 1
+        future.add_done_callback(lambda _: self._futures.pop(key, None))
+        return await asyncio.shield(future)
+
+
+def _event_identity(event: Any) -> str:
+    return json.dumps(event, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _is_final_event(event: Any) -> bool:
+    """Événement qui porte le résultat (résumé ou erreur) : toujours transmis, même après une reprise."""
+    data = event.get("data") if isinstance(event, dict) else None
+    return isinstance(data, dict) and any(data.get(key) is not None for key in ("summary", "error_message"))
+
+
+class _RemoteRunAbandoned(Exception):
+    """Le worker qui menait une exécution suivie s'est arrêté avant de la terminer."""
+
+
+class _Run:
+    __slots__ = ("events", "done", "error", "condition", "task", "subscribers", "run_id", "cancel_handle")
+
+    def __init__(self):
+        self.events: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.condition = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+        self.subscribers = 0
+        self.run_id: Optional[str] = None  # identifiant dans le journal partagé
+        self.cancel_handle: Optional[asyncio.Task] = None  # annulation prévue faute d'abonnés
+
+
+class InFlightRegistry:
+    """
+    Registre des exécutions asynchrones en cours.
+    La première requête pour une clé lance le producteur dans une tâche indépendante ;
+    les suivantes s'y attachent et rejouent le journal d'événements depuis le début.
+
+    Avec `shared` (un `SharedRunLog`), les exécutions sont aussi enregistrées entre processus : une
+    requête arrivée sur un autre worker suit le journal partagé, et reprend l'exécution si son worker s'arrête.
+
+    Avec `cancel_after` (secondes), une exécution sans abonné pendant ce délai est annulée : le dernier client
+    s'est déconnecté et personne ne lira le résultat. Le délai laisse à un client qui recharge la page le
+    temps de se rattacher. Une exécution suivie depuis un autre worker (journal partagé) n'est pas annulée.
+    """
+
+    # Fragments de texte regroupés avant écriture dans le journal partagé
+    SHARED_DELTA_BATCH = 32
+    SHARED_POLL_SECONDS = 0.2
+
+    def __init__(self, name: str = "inflight", shared: Optional[Any] = None, cancel_after: Optional[float] = None):
+        self.name = name
+        self.shared = shared
+        self.cancel_after = cancel_after
+        self._runs: Dict[Hashable, _Run] = {}
+        self.stats = {"executions": 0, "coalesced": 0, "coalesced_remote": 0, "taken_over": 0, "cancelled": 0}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._runs
+
+    @staticmethod
+    def _shared_key(key: Hashable) -> str:
+        return json.dumps(key, default=str)
+
+    async def _pump(self, key: Hashable, run: _Run, events: AsyncIterator[Any]) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(key, run)) if run.run_id else None
+        pending: List = []
+        try:
+            async for event in events:
+                async with run.condition:
+                    run.events.append(event)
+                    run.condition.notify_all()
+                if run.run_id:
+                    pending.append((len(run.events), json.dumps(event, ensure_ascii=False)))
+                    if "delta" not in event or len(pending) >= self.SHARED_DELTA_BATCH:
+                        await asyncio.to_thread(self.shared.append, self._shared_key(key), run.run_id, pending)
+                        pending = []
+        except BaseException as e:
+            run.error = e
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            if run.run_id:
+                status = "cancelled" if isinstance(run.error, asyncio.CancelledError) else "failed" if run.error else "done"
+                try:
+                    await asyncio.to_thread(self._close_shared, key, run.run_id, pending, status)
+                except asyncio.CancelledError:
+                    pass  # l'écriture se termine dans son thread ; l'exécution doit quand même être marquée finie
+                except Exception as e:
+                    print(f"⚠️ [{self.name}] Shared run log write failed: {e}")
+            async with run.condition:
+                run.done = True
+                run.condition.notify_all()
+            if self._runs.get(key) is run:
+                del self._runs[key]
+
+    def _close_shared(self, key: Hashable, run_id: str, pending: List, status: str) -> None:
+        if pending:
+            self.shared.append(self._shared_key(key), run_id, pending)
+        self.shared.finish(self._shared_key(key), run_id, status)
+
+    async def _cancel_unobserved(self, key: Hashable, run: _Run) -> None:
+        while True:
+            await asyncio.sleep(self.cancel_after)
+            if run.subscribers or run.done or run.task is None:
+                return
+            if run.run_id and await asyncio.to_thread(self.shared.has_followers, run.run_id):
+                continue  # des clients la suivent depuis d'autres workers : on revérifie plus tard
+            break
+        run.cancel_handle = None
+        self.stats["cancelled"] += 1
+        record_cancelled_run(self.name)
+        print(f"🛑 [{self.name}] No client left for {key}, cancelling the run.")
+        if self._runs.get(key) is run:
+            del self._runs[key]  # une nouvelle requête relance une exécution (les caches gardent le travail fait)
+        run.task.cancel()
+
+    async def _heartbeat(self, key: Hashable, run: _Run) -> None:
+        """Signe de vie pendant les longues étapes sans événement (Map-Reduce)."""
+        while True:
+            await asyncio.sleep(self.shared.stale_after / 3)
+            await asyncio.to_thread(self.shared.heartbeat, self._shared_key(key), run.run_id)
+
+    async def _follow(self, key: Hashable, run_id: str) -> AsyncIterator[Any]:
+        """Suit le journal d'une exécution menée par un autre worker ; s'arrête à sa fin ou si ce worker s'arrête."""
+        after_seq = 0
+        # Signe de vie de ce client dans le journal : le worker qui mène l'exécution ne l'annule pas
+        follower, touched = uuid.uuid4().hex, 0.0
+        try:
+            while True:
+                if time.monotonic() - touched >= self.shared.stale_after / 3:
+                    await asyncio.to_thread(self.shared.touch_follower, run_id, follower)
+                    touched = time.monotonic()
+                events, finished, abandoned = await asyncio.to_thread(self.shared.read, self._shared_key(key), run_id, after_seq)
+                for seq, payload in events:
+                    after_seq = seq
+                    yield json.loads(payload)
+                if finished or abandoned:
+                    if abandoned:
+                        raise _RemoteRunAbandoned(run_id)
+                    return
+                await asyncio.sleep(self.SHARED_POLL_SECONDS)
+        finally:
+            try:
+                await asyncio.to_thread(self.shared.remove_follower, run_id, follower)
+            except Exception as e:
+                print(f"⚠️ [{self.name}] Shared run log write failed: {e}")
+
+    def _start(self, key: Hashable, producer: Callable[[], AsyncIterator[Any]], run_id: Optional[str] = None) -> _Run:
+        run = _Run()
+        run.run_id = run_id
+        self._runs[key] = run
+        self.stats["executions"] += 1
+        run.task = asyncio.create_task(self._pump(key, run, producer()))
+        return run
+
+    async def stream(self, key: Hashable, producer: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Itère sur les événements de l'exécution associée à `key`, en la lançant si besoin."""
+        run = self._runs.get(key)
+        started = False
+        # Déjà reçus d'un autre worker avant une reprise : événements de nœud (par contenu), fragments par étape
+        sent_nodes: Counter = Counter()
+        sent_deltas: Counter = Counter()
+        while run is None and self.shared is not None:
+            claimed, run_id = self.shared.claim(self._shared_key(key))
+            if claimed:
+                run, started = self._start(key, producer, run_id), True
+                break
+            self.stats["coalesced_remote"] += 1
+            print(f"🔗 [{self.name}] Following the run for {key} on another worker.")
+            try:
+                async for event in self._follow(key, run_id):
+                    if "delta" in event:
+                        sent_deltas[event.get("stage")] += 1
+                    else:
+                        sent_nodes[_event_identity(event)] += 1
+                    yield event
+                return
+            except _RemoteRunAbandoned:
+                # Le worker qui l'exécutait s'est arrêté (ou l'a annulée) : on reprend l'exécution ici (depuis le début),
+                # sans renvoyer au client ce qu'il a déjà reçu
+                self.stats["taken_over"] += 1
+                print(f"♻️ [{self.name}] The run for {key} stopped on its worker, taking it over.")
+                run = self._runs.get(key)
+        if run is None:
+            run, started = self._start(key, producer), True
+        if not started:
+            self.stats["coalesced"] += 1
+            print(f"🔗 [{self.name}] Attaching to in-flight run for {key}.")
+
+        run.subscribers += 1
+        if run.cancel_handle is not None:
+            run.cancel_handle.cancel()
+            run.cancel_handle = None
+        index = 0
+        try:
+            while True:
+                async with run.condition:
+                    await run.condition.wait_for(lambda: index < len(run.events) or run.done)
+                    batch = run.events[index:]
+                    index += len(batch)
+                    finished = run.done and index >= len(run.events)
+                for event in batch:
+                    # Reprise : la nouvelle exécution peut suivre un autre chemin (caches remplis entre-temps),
+                    # on ne saute que ce que le client a déjà reçu, et jamais le résultat
+                    if "delta" in event:
+                        stage = event.get("stage")
+                        if sent_deltas[stage]:
+                            sent_deltas[stage] -= 1
+                            continue
+                    elif not _is_final_event(event):
+                        identity = _event_identity(event)
+                        if sent_nodes[identity]:
+                            sent_nodes[identity] -= 1
+                            continue
+                    yield event
+                if finished:
+                    break
+            if run.error is not None and not isinstance(run.error, asyncio.CancelledError):
+                raise run.error
+        finally:
+            run.subscribers -= 1
+            if not run.subscribers and not run.done and self.cancel_after is not None:
+                run.cancel_handle = asyncio.create_task(self._cancel_unobserved(key, run))
@@ -0,0 +1,27 @@
+# /backend/src/streaming.py
+"""
+Streaming token par token des étapes finales (résumé, traduction) vers le client.
+
+L'appelant (un nœud du graphe) définit un « puits » pour la requête en cours via `token_sink` ;
+les fonctions de `src/` y envoient les fragments de texte au fur et à mesure de la génération.
+Sans puits, la chaîne est simplement invoquée en une fois.
+"""
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+from langchain_core.runnables import Runnable
+
+# sink(stage, delta) : stage vaut "summary" ou "translation"
+token_sink: ContextVar[Optional[Callable[[str, str], None]]] = ContextVar("token_sink", default=None)
+
+
+async def ainvoke_streaming(chain: Runnable, inputs: Dict[str, Any], stage: str) -> str:
+    """Exécute `chain` (qui produit du texte) en transmettant chaque fragment au puits courant, s'il existe."""
+    sink = token_sink.get()
+    if sink is None:
+        return await chain.ainvoke(inputs)
+    parts: List[str] = []
+    async for delta in chain.astream(inputs):
+        if delta:
+            parts.append(delta)
+            sink(stage, delta)
+    return "".join(parts)
@@ -1,12 +1,22 @@
 # /zenyth/backend/src/summarize.py
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain.chains.summarize import load_summarize_chain
-from langchain.prompts import PromptTemplate, ChatPromptTemplate
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+import asyncio
 import time
-from typing import Optional, Tuple
-from config import Config, create_llm_instance
+import hashlib
+from functools import lru_cache
+from typing import Awaitable, Dict, List, Optional, Tuple
+from config import Config, acreate_llm_instance, key_scheduler
 from src.exceptions import SummarizationError
+from src.concurrency import get_loop_semaphore
+from src.tokens import count_tokens, estimate_tokens, pack_units, split_sentences, truncate_to_tokens
+from src.streaming import ainvoke_streaming
+from src.metrics import CACHE_LOOKUPS, DEDUP_TOKENS, LLM_RETRIES, SUMMARY_CHUNKS, llm_stage, record_cancelled_tokens
+from src.cache import get_map_cache, make_map_key
+from src.dedup import clean_units, dedup_report, drop_near_duplicate_chunks
+from src.extractive import compress_units
+from src.translation import TRANSLATION_PROMPT_TEMPLATE
+from src.video_tools import get_video_segments
 
 def get_direct_summary_prompt(summary_length: str) -> str:
     """Returns the appropriate prompt template for direct summarization based on the summary length."""
@@ -95,10 +105,281 @@ Summaries to combine:
 ---
 A single, {summary_length}, combined summary in {language}:"""
 
-def summarize_text(transcript: str, language: str = "english", summary_length: str = "standard") -> Tuple[Optional[str], Optional[str]]:
+@lru_cache(maxsize=1)
+def get_prompt_version() -> str:
+    """
+    Empreinte courte de tous les prompts utilisés par le pipeline.
+    Toute modification d'un prompt change cette version et invalide les résumés en cache.
+    """
+    templates = [
+        get_direct_summary_prompt(""),
+        get_map_prompt_template(""),
+        get_combine_prompt_template(""),
+        get_collapse_prompt_template(""),
+        TRANSLATION_PROMPT_TEMPLATE,
+    ]
+    return hashlib.sha256("\n\x1e".join(templates).encode("utf-8")).hexdigest()[:16]
+
+def get_richer_lengths(summary_length: str) -> List[str]:
+    """Longueurs au moins aussi détaillées que `summary_length`, de la plus proche à la plus complète."""
+    if summary_length not in Config.SUMMARY_LENGTHS:
+        return [summary_length]
+    return list(Config.SUMMARY_LENGTHS[Config.SUMMARY_LENGTHS.index(summary_length):])
+
+# --- Moteur Map-Reduce ---
+
+def _get_llm_semaphore() -> asyncio.Semaphore:
+    """Limite globale des appels LLM simultanés du Map-Reduce : MAP_CONCURRENCY_PER_KEY par clé API."""
+    return get_loop_semaphore("summarize_llm", Config.MAP_CONCURRENCY_PER_KEY * max(1, len(Config.GROQ_API_KEYS)))
+
+def _is_retryable(error: Exception) -> bool:
+    """Erreurs qui justifient de réessayer sur une autre clé : 429, erreurs serveur, réseau."""
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code == 429 or status_code >= 500
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Délai `retry-after` d'une erreur 429, s'il est disponible."""
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after")) if response is not None else None
+    except (TypeError, ValueError):
+        return None
+
+class MapReduceSummarizer:
+    """
+    Map-Reduce engine for long transcripts.
+
+    - Map: every chunk is summarized concurrently, bounded by MAP_CONCURRENCY_PER_KEY per API key;
+      each call goes to the key with the most rate-limit headroom for its token estimate.
+    - Reduce: map results are consumed in transcript order as soon as they are available and packed
+      into collapse batches sized from the model's context window; each batch is collapsed without
+      waiting for the rest of the map phase. Levels repeat until everything fits in one combine call.
+    - Map outputs are cached per chunk (hash), language and length: another length of the same video
+      reuses the map outputs of the same or a more detailed length and only reruns collapse/combine.
+    """
+
+    def __init__(self, language: str, summary_length: str, model: Optional[str] = None, video_id: Optional[str] = None):
+        self.language = language
+        self.summary_length = summary_length
+        self.model = model or Config.DEFAULT_MODEL_NAME
+        self.video_id = video_id or ""
+        self.map_prompt = ChatPromptTemplate.from_template(get_map_prompt_template(summary_length))
+        self.collapse_prompt = ChatPromptTemplate.from_template(get_collapse_prompt_template(summary_length))
+        self.combine_prompt = ChatPromptTemplate.from_template(get_combine_prompt_template(summary_length))
+        self.stats: Dict[str, float] = {"map_calls": 0, "map_cache_hits": 0, "collapse_calls": 0, "depth": 0, "map_seconds": 0.0}
+        self._tasks: List[asyncio.Task] = []
+        self._task_tokens: Dict[asyncio.Task, int] = {}  # estimation (prompt + sortie) de chaque appel planifié
+
+    @property
+    def reduce_token_budget(self) -> int:
+        """Input tokens available for one collapse/combine call: context window (or learned per-minute token limit) minus prompt and output budget."""
+        prompt_tokens = count_tokens(get_combine_prompt_template(self.summary_length))
+        window = Config.get_context_window(self.model)
+        token_limit = key_scheduler.token_limit()
+        if token_limit:
+            window = min(window, token_limit)  # même contrainte de TPM que les appels map
+        return max(1024, window - prompt_tokens - Config.REDUCE_OUTPUT_TOKENS)
+
+    async def _call(self, prompt: ChatPromptTemplate, text: str, output_tokens: int, stage: str) -> str:
+        """
+        One LLM call on the key with the most rate-limit headroom for this request's token estimate.
+        Rate-limited and transient failures are retried on another key instead of waiting on the same one.
+        """
+        estimated_tokens = count_tokens(text) + output_tokens
+        inputs = {"text": text, "language": self.language, "summary_length": self.summary_length}
+        llm_stage.set(stage)  # chaque appel tourne dans sa propre tâche : pas besoin de reset
+        async with _get_llm_semaphore():
+            for attempt in range(Config.KEY_SWITCH_RETRIES + 1):
+                llm, api_key = await acreate_llm_instance(estimated_tokens, model=self.model, max_retries=0)
+                chain = prompt | llm | StrOutputParser()
+                try:
+                    return await chain.ainvoke(inputs)
+                except Exception as e:
+                    if attempt >= Config.KEY_SWITCH_RETRIES or not _is_retryable(e):
+                        raise
+                    rate_limited = getattr(e, "status_code", None) == 429
+                    LLM_RETRIES.labels("rate_limited" if rate_limited else "error").inc()
+                    if rate_limited:
+                        await key_scheduler.report_rate_limited_async(api_key, _retry_after(e))
+                    print(f"🔁 LLM call failed on key ...{api_key[-4:]} ({type(e).__name__}), retrying on another key.")
+                finally:
+                    # Réponse, erreur réseau, timeout ou annulation : la réservation est rendue une seule fois
+                    await key_scheduler.release_async(api_key)
+
+    def _map_key(self, chunk_hash: str, summary_length: str) -> str:
+        return make_map_key(self.video_id, chunk_hash, self.language, summary_length, self.model, get_prompt_version())
+
+    async def _map(self, chunk: str) -> str:
+        cache = get_map_cache()
+        chunk_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+        if cache is not None:
+            # Une sortie map plus détaillée convient aussi : collapse/combine la ramènent à la longueur demandée
+            for summary_length in get_richer_lengths(self.summary_length):
+                cached = cache.get(self._map_key(chunk_hash, summary_length))
+                if cached:
+                    CACHE_LOOKUPS.labels("map", "hit").inc()
+                    self.stats["map_cache_hits"] += 1
+                    return cached["summary"]
+            CACHE_LOOKUPS.labels("map", "miss").inc()
+
+        started = time.time()
+        summary = await self._call(self.map_prompt, chunk, Config.MAP_OUTPUT_TOKENS, "map")
+        self.stats["map_calls"] += 1
+        self.stats["map_seconds"] += time.time() - started
+        if cache is not None:
+            cache.set(self._map_key(chunk_hash, self.summary_length), {"summary": summary})
+        return summary
+
+    async def _collapse(self, summaries: List[str]) -> str:
+        if len(summaries) == 1 and count_tokens(summaries[0]) <= self.reduce_token_budget:
+            return summaries[0]
+        self.stats["collapse_calls"] += 1
+        return await self._call(self.collapse_prompt, "\n\n".join(summaries), Config.REDUCE_OUTPUT_TOKENS, "collapse")
+
+    def _spawn(self, coroutine: Awaitable[str], estimated_tokens: int = 0) -> asyncio.Task:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.append(task)
+        self._task_tokens[task] = estimated_tokens
+        return task
+
+    async def _reduce(self, parts: List[Awaitable[str]], depth: int) -> List[str]:
+        """
+        Packs ordered partial summaries into batches of at most `reduce_token_budget` tokens.
+        Returns the texts directly when they all fit in one batch, otherwise recurses one level up.
+        """
+        self.stats["depth"] = max(self.stats["depth"], depth)
+        budget = self.reduce_token_budget
+        collapsed: List[asyncio.Task] = []
+        batch: List[str] = []
+        batch_tokens = 0
+        for part in parts:
+            text = await part
+            tokens = count_tokens(text)
+            if batch and batch_tokens + tokens > budget:
+                collapsed.append(self._spawn(self._collapse(batch), batch_tokens + Config.REDUCE_OUTPUT_TOKENS))
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+
+        if not collapsed or depth >= Config.MAP_REDUCE_MAX_DEPTH:
+            if not collapsed:
+                return batch
+            texts = [await task for task in collapsed] + batch
+            if sum(count_tokens(text) for text in texts) <= budget:
+                return texts
+            # Plus de niveau possible : chaque partie est tronquée à sa part du budget plutôt que d'envoyer
+            # un appel final plus long que la fenêtre de contexte
+            share = max(1, budget // len(texts) - count_tokens("\n\n"))
+            print(f"⚠️ Map-Reduce reached max depth {depth}, truncating {len(texts)} summaries to ~{share} tokens each.")
+            return [truncate_to_tokens(text, share) for text in texts]
+        collapsed.append(self._spawn(self._collapse(batch), batch_tokens + Config.REDUCE_OUTPUT_TOKENS))
+        return await self._reduce(collapsed, depth + 1)
+
+    async def run(self, chunks: List[str]) -> str:
+        try:
+            mapped = [self._spawn(self._map(chunk), count_tokens(chunk) + Config.MAP_OUTPUT_TOKENS) for chunk in chunks]
+            summaries = await self._reduce(mapped, 1)
+            text = "\n\n".join(summaries)
+            stage_token = llm_stage.set("combine")
+            try:
+                async with _get_llm_semaphore():
+                    llm, api_key = await acreate_llm_instance(count_tokens(text) + Config.REDUCE_OUTPUT_TOKENS, model=self.model)
+                    chain = self.combine_prompt | llm | StrOutputParser()
+                    # Étape finale : streamée token par token si l'appelant l'a demandé
+                    try:
+                        return await ainvoke_streaming(
+                            chain,
+                            {"text": text, "language": self.language, "summary_length": self.summary_length},
+                            "summary",
+                        )
+                    finally:
+                        await key_scheduler.release_async(api_key)
+            finally:
+                llm_stage.reset(stage_token)
+        except asyncio.CancelledError:
+            # Plus personne n'attend ce résumé (client déconnecté) : les sorties map déjà obtenues restent en cache
+            record_cancelled_tokens("map_reduce", sum(
+                tokens for task, tokens in self._task_tokens.items() if not task.done()
+            ))
+            raise
+        finally:
+            # En cas d'erreur ou d'annulation, on abandonne le travail encore en attente
+            for task in self._tasks:
+                if not task.done():
+                    task.cancel()
+
+def get_chunk_token_budget(summary_length: str, model: Optional[str] = None) -> int:
+    """
+    Transcript tokens allowed in one map call: the model's context window minus the
+    map prompt and the output budget (with a safety margin, the tokenizer being approximate),
+    capped by MAX_CHUNK_TOKENS and by the per-minute token limit learned from the API keys.
+    """
+    model = model or Config.DEFAULT_MODEL_NAME
+    prompt_tokens = count_tokens(get_map_prompt_template(summary_length))
+    budget = int((Config.get_context_window(model) - prompt_tokens - Config.MAP_OUTPUT_TOKENS) * Config.TOKEN_SAFETY_MARGIN)
+    if Config.MAX_CHUNK_TOKENS:
+        budget = min(budget, Config.MAX_CHUNK_TOKENS)
+    # Une fois les limites des clés connues (en-têtes x-ratelimit-*), un appel map doit tenir dans le TPM d'une clé
+    token_limit = key_scheduler.token_limit()
+    if token_limit:
+        budget = min(budget, int((token_limit - prompt_tokens - Config.MAP_OUTPUT_TOKENS) * Config.TOKEN_SAFETY_MARGIN))
+    return max(512, budget)
+
+def split_transcript(transcript: str, video_id: Optional[str] = None, summary_length: str = "standard",
+                     report: Optional[Dict[str, int]] = None) -> List[str]:
+    """
+    Splits a transcript into chunks packed up to the token budget of one LLM call.
+    Chunks follow transcript segment boundaries when the segments of this video are in the
+    local store, sentence boundaries otherwise.
+    With DEDUP_ENABLED, boilerplate and repeated units are removed before packing and
+    near-duplicate chunks after it. For the EXTRACTIVE_LENGTHS, a transcript that would need
+    more than one chunk is reduced locally to its most representative passages, up to one
+    chunk (or EXTRACTIVE_TOKEN_BUDGET if lower).
+    The counts are added to `report` if given.
+    """
+    stored = get_video_segments(video_id) if video_id else None
+    if stored is not None and stored.text == transcript:
+        units = stored.segment_texts()
+    else:
+        units = split_sentences(transcript)
+    budget = get_chunk_token_budget(summary_length)
+    counts: Dict[str, int] = {}
+    if Config.DEDUP_ENABLED:
+        units, counts = clean_units(units, Config.DEDUP_MIN_REPEAT_CHARS)
+    chunks = pack_units(units, budget, Config.CHUNK_OVERLAP_TOKENS)
+    if len(chunks) > 1 and summary_length in Config.EXTRACTIVE_LENGTHS:
+        # Marge pour les séparateurs « [...] » : les extraits doivent tenir dans un seul appel direct
+        extractive_budget = int(budget * 0.9)
+        if Config.EXTRACTIVE_TOKEN_BUDGET > 0:
+            extractive_budget = min(extractive_budget, Config.EXTRACTIVE_TOKEN_BUDGET)
+        compressed = compress_units(units, extractive_budget)
+        if compressed is not None:
+            units, counts["extractive_tokens_in"], counts["extractive_tokens_out"] = compressed
+            DEDUP_TOKENS.labels("extractive").inc(counts["extractive_tokens_in"] - counts["extractive_tokens_out"])
+            chunks = pack_units(units, budget, Config.CHUNK_OVERLAP_TOKENS)
+    if Config.DEDUP_ENABLED:
+        chunks, skipped = drop_near_duplicate_chunks(chunks, Config.DEDUP_CHUNK_SIMILARITY)
+        counts["skipped_chunks"] = len(skipped)
+        counts["tokens_saved"] += sum(estimate_tokens(chunk) for chunk in skipped)
+    if report is not None:
+        for name, value in counts.items():
+            report[name] = report.get(name, 0) + value
+    return chunks
+
+def summarize_text(transcript: str, language: str = "english", summary_length: str = "standard", video_id: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Synchronous wrapper around `asummarize_text`, for callers without a running event loop.
+    """
+    return asyncio.run(asummarize_text(transcript, language, summary_length, video_id))
+
+async def asummarize_text(transcript: str, language: str = "english", summary_length: str = "standard", video_id: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
     """
     Generates a summary of a given text using a Map-Reduce strategy for long texts.
     The summary_length parameter controls the level of detail in the summary.
+    If video_id is given, chunking follows the stored transcript segments.
+    All LLM calls are awaited natively (no worker thread is held during generation).
     """
     start_time = time.time()
     print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Starting summarization for a {summary_length} summary.")
@@ -106,55 +387,57 @@ def summarize_text(transcript: str, language: str = "english", summary_length: s
         if not transcript or not transcript.strip():
             return None, "The text to summarize is empty or contains only spaces."
         
-        llm = create_llm_instance()
-
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=Config.CHUNK_SIZE,
-            chunk_overlap=Config.CHUNK_OVERLAP
-        )
-        docs = text_splitter.create_documents([transcript])
+        report = dedup_report.get()
+        if report is None:
+            report = {}
+        chunks = split_transcript(transcript, video_id, summary_length, report)
+        SUMMARY_CHUNKS.observe(len(chunks))
+        if report.get("tokens_saved"):
+            print(
+                f"✂️ Removed ~{report['tokens_saved']:,} repeated tokens before the map phase "
+                f"({report['skipped_chunks']} duplicate chunks, {report['repeated_units']} repeated and "
+                f"{report['boilerplate_units']} boilerplate lines)."
+            )
+        if report.get("extractive_tokens_in"):
+            print(
+                f"🧮 Extractive pre-compression: ~{report['extractive_tokens_in']:,} → "
+                f"~{report['extractive_tokens_out']:,} tokens before any LLM call."
+            )
+        if len(chunks) == 1 and (report.get("tokens_saved") or report.get("extractive_tokens_in")):
+            transcript = chunks[0]  # le résumé direct porte sur le texte nettoyé ou les extraits retenus
+        if not chunks:
+            return None, "The text to summarize is empty or contains only spaces."
         
         # --- PROMPT FOR SHORT TEXT ---
-        if len(docs) == 1:
+        if len(chunks) == 1:
             print(f"--- Short text, direct {summary_length} summary ---")
+            llm, api_key = await acreate_llm_instance(count_tokens(transcript) + Config.REDUCE_OUTPUT_TOKENS)
             prompt_template = ChatPromptTemplate.from_template(
                 get_direct_summary_prompt(summary_length)
             )
             chain = prompt_template | llm | StrOutputParser()
-            summary = chain.invoke({"transcript": transcript, "language": language, "summary_length": summary_length})
+            stage_token = llm_stage.set("direct")
+            try:
+                summary = await ainvoke_streaming(
+                    chain, {"transcript": transcript, "language": language, "summary_length": summary_length}, "summary"
+                )
+            finally:
+                llm_stage.reset(stage_token)
+                await key_scheduler.release_async(api_key)
             end_time = time.time()
             print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Direct summarization finished in {end_time - start_time:.2f} seconds.")
             return summary, None
 
-        # --- PROMPTS FOR MAP-REDUCE ---
-        print(f"--- Long text, Map-Reduce strategy on {len(docs)} chunks with {summary_length} detail level ---")
-        
-        map_prompt = PromptTemplate.from_template(
-            get_map_prompt_template(summary_length)
-        )
-        
-        combine_prompt = PromptTemplate.from_template(
-            get_combine_prompt_template(summary_length)
-        )
-        
-        collapse_prompt = PromptTemplate.from_template(
-            get_collapse_prompt_template(summary_length)
-        )
-
-        chain = load_summarize_chain(
-            llm,
-            chain_type="map_reduce",
-            map_prompt=map_prompt,
-            combine_prompt=combine_prompt,
-            collapse_prompt=collapse_prompt,
-            verbose=True,
-            token_max=4096
-        )
-        
-        result = chain.invoke({"input_documents": docs, "language": language, "summary_length": summary_length})
+        # --- MAP-REDUCE ---
+        print(f"--- Long text, Map-Reduce strategy on {len(chunks)} chunks with {summary_length} detail level ---")
+        engine = MapReduceSummarizer(language, summary_length, video_id=video_id)
+        summary = await engine.run(chunks)
         end_time = time.time()
-        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Map-Reduce summarization finished in {end_time - start_time:.2f} seconds.")
-        return str(result['output_text']), None
+        print(
+            f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Map-Reduce summarization finished in {end_time - start_time:.2f} seconds "
+            f"({engine.stats['map_calls']} map calls, {engine.stats['map_cache_hits']} cached map outputs, {engine.stats['collapse_calls']} collapse calls, depth {engine.stats['depth']})."
+        )
+        return summary, None
 
     except ValueError as e: # Catch specific config errors
         print(f"Configuration error: {e}")
@@ -163,4 +446,34 @@ def summarize_text(transcript: str, language: str = "english", summary_length: s
         end_time = time.time()
         print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Error during summary generation after {end_time - start_time:.2f} seconds: {e}")
         # On peut utiliser nos exceptions custom ici
-        return None, str(SummarizationError(f"An unexpected error occurred: {e}"))
\ No newline at end of file
+        return None, str(SummarizationError(f"An unexpected error occurred: {e}"))
+
+
+def derive_summary(source_summary: str, language: str = "english", summary_length: str = "brief") -> Tuple[Optional[str], Optional[str]]:
+    """
+    Synchronous wrapper around `aderive_summary`, for callers without a running event loop.
+    """
+    return asyncio.run(aderive_summary(source_summary, language, summary_length))
+
+async def aderive_summary(source_summary: str, language: str = "english", summary_length: str = "brief") -> Tuple[Optional[str], Optional[str]]:
+    """
+    Condenses an existing, more detailed summary of the same video into a shorter `summary_length`.
+    A single combine call on the summary alone: no transcript, no map phase.
+    """
+    start_time = time.time()
+    try:
+        llm, api_key = await acreate_llm_instance(count_tokens(source_summary) + Config.REDUCE_OUTPUT_TOKENS)
+        chain = ChatPromptTemplate.from_template(get_combine_prompt_template(summary_length)) | llm | StrOutputParser()
+        stage_token = llm_stage.set("derive")
+        try:
+            summary = await ainvoke_streaming(
+                chain, {"text": source_summary, "language": language, "summary_length": summary_length}, "summary"
+            )
+        finally:
+            llm_stage.reset(stage_token)
+            await key_scheduler.release_async(api_key)
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Derived {summary_length} summary in {time.time() - start_time:.2f} seconds.")
+        return summary, None
+    except Exception as e:
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Error while deriving a {summary_length} summary: {e}")
+        return None, str(SummarizationError(f"An unexpected error occurred: {e}"))
@@ -0,0 +1,140 @@
+# /backend/src/tokens.py
+"""
+Comptage de tokens et découpage par budget de tokens.
+
+Le tokenizer tiktoken est chargé une seule fois par processus. S'il est indisponible
+(pas d'accès réseau pour télécharger l'encodage, par exemple), on se rabat sur une
+estimation qui tient compte de l'écriture (CJK, non-latin, ASCII).
+"""
+import re
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional
+from config import Config
+
+# Fin de phrase : ponctuation latine, CJK (。！？) et arabe (؟ ۔)
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？؟۔])\s+|(?<=[。！？])")
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    """Charge (une fois) l'encodage tiktoken configuré ; None si indisponible ou désactivé (TOKENIZER_ENCODING=none)."""
+    if Config.TOKENIZER_ENCODING.lower() in ("", "none"):
+        return None
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(Config.TOKENIZER_ENCODING)
+    except Exception as e:
+        print(f"⚠️ Tokenizer '{Config.TOKENIZER_ENCODING}' unavailable ({e}), using a character-based estimate.")
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation sans tokenizer : ~4 caractères ASCII, ~2 caractères non-latins ou 1 idéogramme par token."""
+    cjk = len(_CJK.findall(text))
+    non_ascii = sum(1 for char in text if ord(char) > 127) - cjk
+    ascii_chars = len(text) - cjk - non_ascii
+    return cjk + (non_ascii + 1) // 2 + (ascii_chars + 3) // 4
+
+
+def count_tokens(text: str) -> int:
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return estimate_tokens(text)
+    return len(tokenizer.encode_ordinary(text))
+
+
+def count_tokens_batch(texts: List[str]) -> List[int]:
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return [estimate_tokens(text) for text in texts]
+    return [len(tokens) for tokens in tokenizer.encode_ordinary_batch(texts)]
+
+
+def split_sentences(text: str) -> List[str]:
+    """Découpe un texte en phrases (ponctuation latine, CJK et arabe)."""
+    return [sentence for sentence in _SENTENCE_END.split(text) if sentence and not sentence.isspace()]
+
+
+def _sizes(units: List[str], count: Callable[[str], int]) -> List[int]:
+    return count_tokens_batch(units) if count is count_tokens else [count(unit) for unit in units]
+
+
+def _split_oversized(unit: str, max_tokens: int, count: Callable[[str], int]) -> List[str]:
+    """Découpe une unité trop longue (ex. sous-titres automatiques sans ponctuation) par mots, puis par caractères."""
+    words = unit.split(" ")
+    if len(words) == 1:
+        tokens = max(1, count(unit))
+        step = max(1, len(unit) * max_tokens // tokens)
+        return [unit[i:i + step] for i in range(0, len(unit), step)]
+    pieces: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for word, tokens in zip(words, _sizes(words, count)):
+        tokens += 1  # espace
+        if tokens > max_tokens:
+            if current:
+                pieces.append(" ".join(current))
+                current, current_tokens = [], 0
+            pieces.extend(_split_oversized(word, max_tokens, count))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def pack_units(units: Iterable[str], max_tokens: int, overlap_tokens: int = 0,
+               separator: str = " ", count: Optional[Callable[[str], int]] = None) -> List[str]:
+    """
+    Regroupe des unités (phrases, segments de transcription) en morceaux d'au plus `max_tokens` tokens,
+    sans couper une unité. Chaque morceau reprend les dernières unités du précédent, dans la limite
+    de `overlap_tokens`.
+    """
+    count = count or count_tokens
+    units = [unit for unit in units if unit]
+    # Chaque unité est comptée avec son séparateur, pour que le morceau assemblé tienne dans le budget
+    sizes = _sizes([unit + separator for unit in units], count)
+
+    flat_units: List[str] = []
+    flat_sizes: List[int] = []
+    for unit, size in zip(units, sizes):
+        if size > max_tokens:
+            for piece in _split_oversized(unit, max_tokens, count):
+                flat_units.append(piece)
+                flat_sizes.append(count(piece + separator))
+        else:
+            flat_units.append(unit)
+            flat_sizes.append(size)
+
+    chunks: List[str] = []
+    first = 0
+    total = len(flat_units)
+    while first < total:
+        last = first
+        used = 0
+        while last < total and (last == first or used + flat_sizes[last] <= max_tokens):
+            used += flat_sizes[last]
+            last += 1
+        chunks.append(separator.join(flat_units[first:last]))
+        if last >= total:
+            break
+        next_first = last
+        carried = 0
+        while next_first - 1 > first and carried + flat_sizes[next_first - 1] <= overlap_tokens:
+            next_first -= 1
+            carried += flat_sizes[next_first]
+        first = next_first
+    return chunks
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Début du texte tenant dans `max_tokens` tokens, coupé entre deux phrases quand c'est possible."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    chunks = pack_units(split_sentences(text), max(1, max_tokens))
+    return chunks[0] if chunks else ""
@@ -0,0 +1,169 @@
+# /backend/src/transcript_store.py
+"""
+Stockage local des transcriptions YouTube, indexé par (video_id, language_code).
+
+Les segments sont conservés en colonnes compactes : débuts et durées (float64)
+et offsets (uint32) dans un unique buffer de texte. Les bornes de segments
+restent donc disponibles pour le découpage en aval.
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from config import Config
+from src.cache import MemoryLRUCache
+
+SEGMENT_SEPARATOR = " "
+
+
+def _to_blob(values: array) -> bytes:
+    """Sérialise un array en little-endian, quel que soit l'hôte."""
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_blob(typecode: str, blob: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(blob)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+class StoredTranscript:
+    """Transcription en colonnes : starts[i], durations[i] et texte du segment i = text[offsets[i]:offsets[i+1]-1]."""
+
+    __slots__ = ("video_id", "language_code", "is_generated", "starts", "durations", "offsets", "text")
+
+    def __init__(self, video_id: str, language_code: str, starts: array, durations: array,
+                 offsets: array, text: str, is_generated: bool = False):
+        self.video_id = video_id
+        self.language_code = language_code
+        self.is_generated = is_generated
+        self.starts = starts
+        self.durations = durations
+        self.offsets = offsets
+        self.text = text
+
+    @classmethod
+    def from_segments(cls, video_id: str, language_code: str,
+                      segments: Iterable[Tuple[float, float, str]], is_generated: bool = False) -> "StoredTranscript":
+        """Construit le stockage colonnes à partir de tuples (start, duration, text)."""
+        starts, durations, offsets = array("d"), array("d"), array("I")
+        parts: List[str] = []
+        position = 0
+        for start, duration, text in segments:
+            text = " ".join(text.split())
+            starts.append(float(start))
+            durations.append(float(duration))
+            offsets.append(position)
+            parts.append(text)
+            position += len(text) + len(SEGMENT_SEPARATOR)
+        offsets.append(position)
+        return cls(video_id, language_code, starts, durations, offsets, SEGMENT_SEPARATOR.join(parts), is_generated)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def segment_text(self, index: int) -> str:
+        return self.text[self.offsets[index]:self.offsets[index + 1] - len(SEGMENT_SEPARATOR)]
+
+    def segments(self) -> Iterator[Tuple[float, float, str]]:
+        """Itère sur les segments (start, duration, text)."""
+        for index in range(len(self)):
+            yield self.starts[index], self.durations[index], self.segment_text(index)
+
+    def segment_texts(self) -> List[str]:
+        """Textes des segments, dans l'ordre (unités de découpage pour le résumé)."""
+        return [self.segment_text(index) for index in range(len(self))]
+
+
+class TranscriptStore:
+    """Stockage persistant (SQLite) des transcriptions, avec un LRU en mémoire devant."""
+
+    def __init__(self, db_path: str, memory_entries: int = 64):
+        self.db_path = db_path
+        self._memory = MemoryLRUCache(memory_entries)
+        self._lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS transcripts ("
+            "video_id TEXT NOT NULL, language_code TEXT NOT NULL, is_generated INTEGER NOT NULL, "
+            "starts BLOB NOT NULL, durations BLOB NOT NULL, offsets BLOB NOT NULL, text TEXT NOT NULL, "
+            "fetched_at REAL NOT NULL, PRIMARY KEY (video_id, language_code))"
+        )
+        self._conn.commit()
+
+    def languages(self, video_id: str) -> List[str]:
+        """Codes de langue déjà stockés pour cette vidéo."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT language_code FROM transcripts WHERE video_id = ? ORDER BY fetched_at", (video_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get(self, video_id: str, preferred_languages: Optional[Sequence[str]] = None) -> Optional[StoredTranscript]:
+        """Retourne la variante stockée dans la première langue préférée disponible, sinon la première stockée."""
+        available = self.languages(video_id)
+        if not available:
+            return None
+        language_code = next((code for code in (preferred_languages or []) if code in available), available[0])
+        memory_key = f"{video_id}:{language_code}"
+        stored = self._memory.get(memory_key)
+        if stored is not None:
+            return stored
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT is_generated, starts, durations, offsets, text FROM transcripts "
+                "WHERE video_id = ? AND language_code = ?", (video_id, language_code)
+            ).fetchone()
+        if row is None:
+            return None
+        is_generated, starts, durations, offsets, text = row
+        stored = StoredTranscript(
+            video_id, language_code, _from_blob("d", starts), _from_blob("d", durations),
+            _from_blob("I", offsets), text, bool(is_generated),
+        )
+        self._memory.set(memory_key, stored)
+        return stored
+
+    def put(self, transcript: StoredTranscript) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts "
+                "(video_id, language_code, is_generated, starts, durations, offsets, text, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (transcript.video_id, transcript.language_code, int(transcript.is_generated),
+                 _to_blob(transcript.starts), _to_blob(transcript.durations), _to_blob(transcript.offsets),
+                 transcript.text, time.time()),
+            )
+            self._conn.commit()
+        self._memory.set(f"{transcript.video_id}:{transcript.language_code}", transcript)
+
+
+_store: Optional[TranscriptStore] = None
+_store_lock = threading.Lock()
+
+
+def get_transcript_store() -> Optional[TranscriptStore]:
+    """Retourne le stockage partagé des transcriptions (None si désactivé ou indisponible)."""
+    global _store
+    if not Config.TRANSCRIPT_STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = TranscriptStore(Config.CACHE_DB_PATH, Config.TRANSCRIPT_MEMORY_ENTRIES)
+            except sqlite3.Error as e:
+                print(f"⚠️ Transcript store unavailable: {e}")
+                return None
+        return _store
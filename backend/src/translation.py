@@ -1,15 +1,126 @@
 # /backend/src/translation.py
+import asyncio
+import hashlib
 import os
-from typing import Optional, Tuple
+import re
+from typing import Dict, List, Optional, Tuple
 
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from pydantic import SecretStr
-from config import create_llm_instance
+from config import Config, acreate_llm_instance, key_scheduler
+from src.cache import MemoryLRUCache, make_cache_key
+from src.concurrency import get_loop_semaphore
+from src.streaming import ainvoke_streaming, token_sink
+from src.tokens import count_tokens, pack_units
+from src.metrics import CACHE_LOOKUPS, llm_stage, record_cancelled_tokens
+
+TRANSLATION_PROMPT_TEMPLATE = (
+    "You are a high-quality, professional translator. "
+    "Your task is to translate the following text into **{target_language}**. "
+    "Keep the Markdown formatting (headings, lists, **strong** text) exactly as it is. "
+    "Do not add any comments, notes, or introductions. "
+    "Your output must be ONLY the direct translation of the text provided.\n\n"
+    "Text to translate:\n---\n{text}\n---\n\n"
+    "Direct translation in {target_language}:"
+)
+
+# Compteurs du processus : combien de vérifications de langue ont évité un appel LLM de traduction
+TRANSLATION_STATS = {"checked": 0, "skipped": 0, "translated": 0, "sections": 0, "sections_memoized": 0}
+
+# Sections déjà traduites (une même section revient d'une longueur ou d'une requête à l'autre)
+_section_memo = MemoryLRUCache(Config.TRANSLATION_MEMO_ENTRIES)
+_PROMPT_VERSION = hashlib.sha256(TRANSLATION_PROMPT_TEMPLATE.encode("utf-8")).hexdigest()[:16]
+_HEADING = re.compile(r"^#{1,6}\s", re.MULTILINE)
+
+def record_translation_check(skipped: bool) -> None:
+    """Enregistre le résultat d'une vérification de langue avant traduction."""
+    TRANSLATION_STATS["checked"] += 1
+    TRANSLATION_STATS["skipped" if skipped else "translated"] += 1
+
+def split_markdown_sections(text: str, max_tokens: int) -> List[str]:
+    """
+    Découpe un texte Markdown à chaque titre ; une section trop longue est redécoupée entre ses paragraphes.
+    Les morceaux, recollés avec une ligne vide, redonnent la structure d'origine.
+    """
+    starts = [match.start() for match in _HEADING.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts = [0] + starts
+    sections: List[str] = []
+    for start, end in zip(starts, starts[1:] + [len(text)]):
+        section = text[start:end].strip("\n")
+        if not section.strip():
+            continue
+        if count_tokens(section) > max_tokens:
+            sections.extend(pack_units(section.split("\n\n"), max_tokens, separator="\n\n"))
+        else:
+            sections.append(section)
+    return sections
 
 def translate_text(text: str, target_language: str) -> Tuple[Optional[str], Optional[str]]:
+    """Version synchrone de `atranslate_text`, pour les appelants sans boucle d'événements."""
+    return asyncio.run(atranslate_text(text, target_language))
+
+async def _translate_section(section: str, target_language: str) -> str:
+    """Traduit une section (mémoïsée), sur la clé API qui a le plus de marge."""
+    memo_key = make_cache_key("translation", hashlib.sha256(section.encode("utf-8")).hexdigest(),
+                              target_language, Config.DEFAULT_MODEL_NAME, _PROMPT_VERSION)
+    memoized = _section_memo.get(memo_key)
+    CACHE_LOOKUPS.labels("translation", "hit" if memoized is not None else "miss").inc()
+    if memoized is not None:
+        TRANSLATION_STATS["sections_memoized"] += 1
+        return memoized
+
+    async with get_loop_semaphore("translation_llm", Config.MAP_CONCURRENCY_PER_KEY * max(1, len(Config.GROQ_API_KEYS))):
+        llm, api_key = await acreate_llm_instance(2 * count_tokens(section))
+        chain = ChatPromptTemplate.from_template(TRANSLATION_PROMPT_TEMPLATE) | llm | StrOutputParser()
+        try:
+            translated = (await chain.ainvoke({"text": section, "target_language": target_language})).strip()
+        finally:
+            await key_scheduler.release_async(api_key)
+    TRANSLATION_STATS["sections"] += 1
+    _section_memo.set(memo_key, translated)
+    return translated
+
+async def _atranslate_sections(sections: List[str], target_language: str) -> str:
+    """
+    Traduit les sections en parallèle (réparties sur les clés API) et les recolle dans l'ordre.
+    La latence est celle de la section la plus lente ; les sections identiques ne sont traduites qu'une fois.
+    Avec un puits de streaming, chaque section est envoyée dès que celles qui la précèdent sont prêtes.
+    """
+    sink = token_sink.get()
+    sink_token = token_sink.set(None)  # pas de fragments entremêlés : les sections sont envoyées entières
+    try:
+        tasks: Dict[str, asyncio.Task] = {}
+        for section in sections:
+            if section not in tasks:
+                tasks[section] = asyncio.ensure_future(_translate_section(section, target_language))
+    finally:
+        token_sink.reset(sink_token)
+
+    translated: List[str] = []
+    try:
+        for index, section in enumerate(sections):
+            text = await tasks[section]
+            translated.append(text)
+            if sink is not None:
+                sink("translation", ("\n\n" if index else "") + text)
+    except asyncio.CancelledError:
+        # Client déconnecté : les sections déjà traduites restent mémoïsées
+        record_cancelled_tokens("translation", sum(
+            2 * count_tokens(section) for section, task in tasks.items() if not task.done()
+        ))
+        raise
+    finally:
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+    return "\n\n".join(translated)
+
+async def atranslate_text(text: str, target_language: str) -> Tuple[Optional[str], Optional[str]]:
     """
     Traduit un texte donné dans une langue cible en utilisant un LLM.
+    Un texte long (au-delà de TRANSLATION_SECTION_TOKENS) est traduit section par section, en parallèle.
 
     Args:
         text (str): Le texte à traduire.
@@ -22,25 +133,32 @@ def translate_text(text: str, target_language: str) -> Tuple[Optional[str], Opti
         if not text or not text.strip():
             return None, "The text to translate is empty."
 
-        llm = create_llm_instance()
+        stage_token = llm_stage.set("translation")
+        try:
+            if count_tokens(text) > Config.TRANSLATION_SECTION_TOKENS:
+                sections = split_markdown_sections(text, Config.TRANSLATION_SECTION_TOKENS)
+                if len(sections) > 1:
+                    print(f"🌍 Translating {len(sections)} sections in parallel into '{target_language}'.")
+                    return await _atranslate_sections(sections, target_language), None
+
+            # Traduction : environ autant de tokens en sortie qu'en entrée
+            llm, api_key = await acreate_llm_instance(2 * count_tokens(text))
 
-        prompt = ChatPromptTemplate.from_template(
-            "You are a high-quality, professional translator. "
-            "Your task is to translate the following text into **{target_language}**. "
-            "Do not add any comments, notes, or introductions. "
-            "Your output must be ONLY the direct translation of the text provided.\n\n"
-            "Text to translate:\n---\n{text}\n---\n\n"
-            "Direct translation in {target_language}:"
-        )
+            prompt = ChatPromptTemplate.from_template(TRANSLATION_PROMPT_TEMPLATE)
 
-        chain = prompt | llm | StrOutputParser()
+            chain = prompt | llm | StrOutputParser()
 
-        translated_text = chain.invoke({
-            "text": text,
-            "target_language": target_language
-        })
+            try:
+                translated_text = await ainvoke_streaming(chain, {
+                    "text": text,
+                    "target_language": target_language
+                }, "translation")
+            finally:
+                await key_scheduler.release_async(api_key)
+        finally:
+            llm_stage.reset(stage_token)
 
         return translated_text, None
 
     except Exception as e:
-        return None, f"Error during translation: {e}"
\ No newline at end of file
+        return None, f"Error during translation: {e}"
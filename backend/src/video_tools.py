@@ -1,75 +1,247 @@
 # /backend/src/video_tools.py
+import asyncio
 import time
 import random
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound, RequestBlocked, TranscriptList
-from youtube_transcript_api.proxies import WebshareProxyConfig
-from typing import Optional, Tuple
+import threading
+from typing import TYPE_CHECKING, List, Optional, Tuple
 from config import Config
+from src.transcript_store import StoredTranscript, get_transcript_store
+from src.singleflight import AsyncSingleFlight, SingleFlight
+from src.concurrency import get_loop_semaphore
+from src.client_pool import ClientPool
+from src.cache import MemoryLRUCache
+from src.hedged_fetch import CircuitBreaker, CircuitOpenError, HedgedFetcher
+from src.metrics import CACHE_LOOKUPS, PROXY_RETRIES, TRANSCRIPT_FETCH_SECONDS
+
+if TYPE_CHECKING:  # youtube_transcript_api (et requests) n'est importé qu'à la première récupération réseau
+    from youtube_transcript_api import YouTubeTranscriptApi
+
+# Les récupérations concurrentes d'une même vidéo (toutes langues et longueurs confondues) sont fusionnées.
+_transcript_flight = SingleFlight("transcript")
+_async_transcript_flight = AsyncSingleFlight("transcript")
+
+# Clients YouTube réutilisés. YouTubeTranscriptApi (requests.Session) n'est pas thread-safe :
+# un client par thread et par route, les tentatives tournant dans les threads réutilisés du moteur de récupération.
+transcript_client_pool = ClientPool("youtube", Config.TRANSCRIPT_CLIENT_POOL_SIZE)
+
+# Vidéos obtenues sans proxy : l'accès direct est tenté en premier pour elles (TRANSCRIPT_DIRECT_FAST_PATH)
+_direct_videos = MemoryLRUCache(1024)
+
+def _transcript_routes(video_id: str) -> List[str]:
+    """
+    Routes des tentatives, dans l'ordre : Webshare, les autres proxies, puis l'accès direct
+    (seule route sans proxy configuré ; en premier pour une vidéo déjà obtenue ainsi).
+    """
+    routes = ["webshare"] if Config.WEBSHARE_PROXY_USERNAME and Config.WEBSHARE_PROXY_PASSWORD else []
+    routes += [f"proxy{index}" for index in range(len(Config.TRANSCRIPT_PROXY_URLS))]
+    if not routes:
+        return ["direct"]
+    if Config.TRANSCRIPT_DIRECT_FAST_PATH:
+        if _direct_videos.get(video_id):
+            return ["direct"] + routes
+        routes.append("direct")
+    return routes
+
+def _create_api_client(route: str = "direct") -> "YouTubeTranscriptApi":
+    """Crée une instance cliente de l'API avec la configuration du proxy de la route."""
+    import requests
+    from youtube_transcript_api import YouTubeTranscriptApi
+    from youtube_transcript_api.proxies import GenericProxyConfig, WebshareProxyConfig
 
-def _get_api_client() -> YouTubeTranscriptApi:
-    """Crée une instance cliente de l'API avec la configuration du proxy."""
     proxy_config = None
-    if Config.WEBSHARE_PROXY_USERNAME and Config.WEBSHARE_PROXY_PASSWORD:
+    if route == "webshare":
+        # Note : le proxy rotatif Webshare ferme volontairement les connexions (« Connection: close »)
+        # pour changer d'IP à chaque requête ; la session réutilise alors ses adaptateurs, pas les sockets.
         proxy_config = WebshareProxyConfig(
             proxy_username=Config.WEBSHARE_PROXY_USERNAME,
             proxy_password=Config.WEBSHARE_PROXY_PASSWORD,
             retries_when_blocked=Config.WEBSHARE_RETRIES
         )
-    return YouTubeTranscriptApi(proxy_config=proxy_config)
+    elif route.startswith("proxy"):
+        proxy_url = Config.TRANSCRIPT_PROXY_URLS[int(route[len("proxy"):])]
+        proxy_config = GenericProxyConfig(http_url=proxy_url, https_url=proxy_url)
+    session = requests.Session()
+    session.hooks["response"].append(_count_proxy_retries)
+    return YouTubeTranscriptApi(proxy_config=proxy_config, http_client=session)
+
+def _count_proxy_retries(response, *args, **kwargs) -> None:
+    """Les nouvelles tentatives (429 via le proxy) se font dans urllib3 : on les lit dans l'historique de la réponse."""
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    if retries is not None and retries.history:
+        PROXY_RETRIES.inc(len(retries.history))
+
+def _get_api_client(route: str = "direct") -> "YouTubeTranscriptApi":
+    """Retourne le client de l'API (et sa session proxifiée) du thread courant pour cette route, créé au premier appel."""
+    return transcript_client_pool.get((threading.get_ident(), route), lambda: _create_api_client(route))
+
+def _attempt_transcript(video_id: str, route: str) -> StoredTranscript:
+    """
+    Une tentative de récupération via `route`.
+    Cherche une transcription en français ou anglais ; à défaut, se rabat sur la première trouvée.
+    """
+    from youtube_transcript_api import NoTranscriptFound
+
+    transcript_list = _get_api_client(route).list(video_id)
+    try:
+        transcript_to_fetch = transcript_list.find_transcript(Config.TRANSCRIPT_PREFERRED_LANGUAGES)
+    except NoTranscriptFound:
+        print("No transcript in preferred languages (fr, en). Falling back to the first available.")
+        try:
+            transcript_to_fetch = next(iter(transcript_list))
+        except StopIteration:
+            raise NoTranscriptFound(video_id, ['any'], transcript_list)
+
+    print(f"Fetching transcript in '{transcript_to_fetch.language_code}' via {route}...")
+    fetched_transcript = transcript_to_fetch.fetch()
+    # On conserve les segments (début, durée, texte) plutôt que le seul texte concaténé
+    return StoredTranscript.from_segments(
+        video_id,
+        transcript_to_fetch.language_code,
+        ((segment.start, segment.duration, segment.text) for segment in fetched_transcript),
+        is_generated=transcript_to_fetch.is_generated,
+    )
+
+def _is_final_transcript_error(error: BaseException) -> bool:
+    """YouTube a répondu que la transcription n'existe pas (ou pas pour nous) : une autre route n'y changerait rien."""
+    from youtube_transcript_api import (
+        CouldNotRetrieveTranscript, FailedToCreateConsentCookie, RequestBlocked, YouTubeRequestFailed,
+    )
+
+    return isinstance(error, CouldNotRetrieveTranscript) and not isinstance(
+        error, (RequestBlocked, YouTubeRequestFailed, FailedToCreateConsentCookie)
+    )
+
+# Tentatives couvertes et disjoncteur, partagés par toutes les récupérations du processus
+transcript_fetcher = HedgedFetcher(
+    "transcript",
+    _attempt_transcript,
+    _is_final_transcript_error,
+    max_attempts=Config.TRANSCRIPT_MAX_ATTEMPTS,
+    max_parallel=Config.TRANSCRIPT_HEDGE_PARALLEL,
+    hedge_delay=(Config.TRANSCRIPT_HEDGE_DELAY, Config.TRANSCRIPT_HEDGE_MIN_DELAY, Config.TRANSCRIPT_HEDGE_MAX_DELAY),
+    workers=Config.TRANSCRIPT_FETCH_CONCURRENCY * Config.TRANSCRIPT_HEDGE_PARALLEL,
+    breaker=CircuitBreaker("youtube", Config.TRANSCRIPT_BREAKER_THRESHOLD, Config.TRANSCRIPT_BREAKER_RESET_SECONDS),
+)
 
 def get_video_transcript(video_id: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Récupère la transcription d'une vidéo (voir `_fetch_video_transcript`).
+    Les appels concurrents pour le même `video_id` partagent une seule récupération.
+    """
+    return _transcript_flight.do(video_id, _fetch_video_transcript, video_id)
+
+async def aget_video_transcript(video_id: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Version asynchrone de `get_video_transcript`.
+    youtube-transcript-api n'existe qu'en synchrone (requests) : l'appel réseau part dans un thread,
+    une seule fois par vidéo en cours, et au plus TRANSCRIPT_FETCH_CONCURRENCY à la fois.
+    """
+    async def fetch() -> Tuple[Optional[str], Optional[str]]:
+        async with get_loop_semaphore("transcript_fetch", Config.TRANSCRIPT_FETCH_CONCURRENCY):
+            return await asyncio.to_thread(_fetch_video_transcript, video_id)
+
+    return await _async_transcript_flight.do(video_id, fetch)
+
+def _fetch_video_transcript(video_id: str) -> Tuple[Optional[str], Optional[str]]:
     """
     Récupère la transcription d'une vidéo.
-    Tente d'abord de trouver une transcription en français ou anglais.
-    Si non disponible, se rabat sur la première transcription trouvée.
+    Consulte d'abord le stockage local : une vidéo déjà récupérée ne repasse jamais par le réseau.
+    Sinon, tentatives couvertes sur les routes configurées (voir `_attempt_transcript`).
     
     Retourne:
         Tuple[Optional[str], Optional[str]]: (texte de la transcription, message d'erreur)
     """
+    from youtube_transcript_api import TranscriptsDisabled, NoTranscriptFound, RequestBlocked, YouTubeRequestFailed
+
+    started = time.perf_counter()
     try:
-        api_client = _get_api_client()
-        
-        transcript_list = api_client.list(video_id)
-        transcript_to_fetch = None
-        
-        try:
-            transcript_to_fetch = transcript_list.find_transcript(['fr', 'en'])
-        except NoTranscriptFound:
-            print("No transcript in preferred languages (fr, en). Falling back to the first available.")
-            try:
-                transcript_to_fetch = next(iter(transcript_list))
-            except StopIteration:
-                raise NoTranscriptFound(video_id, ['any'], transcript_list)
-
-        print(f"Fetching transcript in '{transcript_to_fetch.language_code}'...")
-        fetched_transcript = transcript_to_fetch.fetch()
-        
-        # --- CORRECTION DE LA LIGNE POSANT PROBLÈME ---
-        # On utilise segment.text au lieu de segment['text']
-        transcript_text = " ".join(segment.text for segment in fetched_transcript)
+        store = get_transcript_store()
+        if store is not None:
+            stored = store.get(video_id, Config.TRANSCRIPT_PREFERRED_LANGUAGES)
+            CACHE_LOOKUPS.labels("transcript", "hit" if stored is not None else "miss").inc()
+            if stored is not None:
+                print(f"Transcript for '{video_id}' ({stored.language_code}) loaded from the local store.")
+                TRANSCRIPT_FETCH_SECONDS.labels("store", "success").observe(time.perf_counter() - started)
+                return stored.text, None
+
+        stored, route = transcript_fetcher.fetch(video_id, _transcript_routes(video_id))
+        if route == "direct":
+            _direct_videos.set(video_id, True)
+        if store is not None:
+            store.put(stored)
+        transcript_text = stored.text
         
-        print("Transcript successfully retrieved!")
+        print(f"Transcript successfully retrieved via {route}!")
+        TRANSCRIPT_FETCH_SECONDS.labels("network", "success").observe(time.perf_counter() - started)
         return transcript_text, None
 
-    except RequestBlocked as rb:
-        error_message = f"Failed to retrieve after {Config.WEBSHARE_RETRIES} proxy attempts. Error: {rb}"
+    except CircuitOpenError as co:
+        error_message = f"YouTube is blocking our requests right now. Please retry in about {max(1, round(co.retry_in))} seconds."
+        print(error_message)
+        TRANSCRIPT_FETCH_SECONDS.labels("network", "error").observe(time.perf_counter() - started)
+        return None, error_message
+
+    except (RequestBlocked, YouTubeRequestFailed) as rb:
+        error_message = f"Failed to retrieve after {Config.TRANSCRIPT_MAX_ATTEMPTS} attempts. Error: {rb}"
         print(error_message)
+        TRANSCRIPT_FETCH_SECONDS.labels("network", "error").observe(time.perf_counter() - started)
         return None, error_message
         
     except TranscriptsDisabled:
         error_message = "Transcripts are disabled for this video. Unfortunately, we cannot summarize that for you."
         print(error_message)
+        TRANSCRIPT_FETCH_SECONDS.labels("network", "error").observe(time.perf_counter() - started)
         return None, error_message
         
     except NoTranscriptFound:
         error_message = "No transcript could be found for this video in any language."
         print(error_message)
+        TRANSCRIPT_FETCH_SECONDS.labels("network", "error").observe(time.perf_counter() - started)
         return None, error_message
         
     except Exception as e:
         error_message = f"Unexpected error while retrieving transcript: {e}"
         print(f"Unexpected error: {e}")
+        TRANSCRIPT_FETCH_SECONDS.labels("network", "error").observe(time.perf_counter() - started)
+        return None, error_message
+
+def get_video_segments(video_id: str) -> Optional[StoredTranscript]:
+    """Retourne la transcription stockée localement (avec ses segments), sans accès réseau."""
+    store = get_transcript_store()
+    if store is None:
+        return None
+    return store.get(video_id, Config.TRANSCRIPT_PREFERRED_LANGUAGES)
+
+def extract_playlist_id(playlist: str) -> Optional[str]:
+    """Identifiant d'une playlist, à partir de son URL (paramètre `list=`) ou de l'identifiant lui-même."""
+    if "list=" in playlist:
+        return playlist.split("list=")[1].split('&')[0] or None
+    if "/" not in playlist and "?" not in playlist:
+        return playlist.strip() or None
+    return None
+
+def get_playlist_video_ids(playlist_id: str) -> Tuple[Optional[List[str]], Optional[str]]:
+    """
+    Liste les vidéos d'une playlist YouTube (via pytube, importé au premier appel).
+
+    Retourne:
+        Tuple[Optional[List[str]], Optional[str]]: (identifiants des vidéos, dans l'ordre de la playlist ; message d'erreur)
+    """
+    try:
+        from pytube import Playlist
+    except ImportError:
+        return None, "Playlist support requires the 'pytube' package."
+    try:
+        playlist = Playlist(f"https://www.youtube.com/playlist?list={playlist_id}")
+        video_ids = [video_id for video_id in map(extract_video_id, playlist.video_urls) if video_id]
+    except Exception as e:
+        error_message = f"Unable to read playlist '{playlist_id}': {e}"
+        print(error_message)
         return None, error_message
+    if not video_ids:
+        return None, f"Playlist '{playlist_id}' is empty or private."
+    print(f"Playlist '{playlist_id}': {len(video_ids)} videos found.")
+    return video_ids, None
 
 def extract_video_id(youtube_url: str) -> Optional[str]:
     if "v=" in youtube_url:
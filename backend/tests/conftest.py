@@ -0,0 +1,19 @@
+# /backend/tests/conftest.py
+"""
+Environnement des tests, fixé avant le premier import de `config` : données dans un répertoire
+temporaire, fausses clés API, estimation locale des tokens (pas de téléchargement tiktoken).
+Aucun test n'appelle le réseau.
+
+    cd backend && python -m pytest
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ["ZENYTH_DATA_DIR"] = tempfile.mkdtemp(prefix="zenyth-tests-")
+os.environ["GROQ_API_KEYS"] = "test-key-0,test-key-1"
+os.environ["TOKENIZER_ENCODING"] = "none"
+os.environ["SHARED_STATE_ENABLED"] = "false"
+sys.path.insert(0, BACKEND_DIR)
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+import pytest
+from src.admission import AdmissionController, AdmissionRejected
+
+
+def test_queued_request_times_out_and_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController(capacity=1, max_queue=1)
+        running = controller.enter("a", 1)
+        waiting = controller.enter("b", 1)
+        assert running.admitted and controller.position(waiting) == 1
+        assert not await controller.wait(waiting, 0.05)
+        controller.time_out(waiting)
+        assert controller.snapshot()["waiting"] == 0
+        # La place libérée dans la file sert à la requête suivante, admise dès que la capacité se libère
+        following = controller.enter("c", 1)
+        controller.release(running)
+        assert await controller.wait(following, 0.05)
+        return controller.stats
+
+    stats = asyncio.run(scenario())
+    assert stats["timed_out"] == 1 and stats["admitted"] == 2
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def scenario():
+        controller = AdmissionController(capacity=1, max_queue=1, service_seconds=12)
+        controller.enter("a", 1)
+        controller.enter("b", 1)
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.enter("c", 1)
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.status_code == 503 and rejected.retry_after >= 12
+
+
+def test_client_over_its_rate_is_rejected():
+    async def scenario():
+        controller = AdmissionController(capacity=10, max_queue=10, rate_per_minute=1, burst=1)
+        controller.enter("a", 1)
+        controller.enter("b", 1)
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.enter("a", 1)
+        return rejected.value
+
+    assert asyncio.run(scenario()).status_code == 429
+
+
+def test_admission_units_reads_the_transcript_store_off_the_loop(monkeypatch):
+    import api
+
+    threads = []
+
+    def stored_segments(video_id):
+        threads.append(threading.current_thread())
+        return SimpleNamespace(text="x" * 10_000)
+
+    monkeypatch.setattr(api, "get_video_segments", stored_segments)
+    monkeypatch.setattr(api.Config, "ADMISSION_UNIT_CHARS", 1000)
+    units = asyncio.run(api.admission_units({"youtube_url": "https://youtu.be/dQw4w9WgXcQ"}))
+    assert units == 10
+    assert threads and threads[0] is not threading.main_thread()
@@ -0,0 +1,27 @@
+# /backend/tests/test_cache.py
+import pytest
+from src.cache import CacheBackend, MemoryLRUCache, SQLiteCache, TieredCache
+
+
+def test_incomplete_backend_fails_at_instantiation():
+    class NoClear(CacheBackend):
+        def get(self, key):
+            return None
+
+        def set(self, key, value, ttl=None):
+            pass
+
+        def delete(self, key):
+            pass
+
+    with pytest.raises(TypeError):
+        NoClear()
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+    memory = MemoryLRUCache(max_entries=4)
+    disk = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    disk.set("key", {"summary": "text"})
+    cache = TieredCache([memory, disk])
+    assert cache.get("key") == {"summary": "text"}
+    assert memory.get("key") == {"summary": "text"}
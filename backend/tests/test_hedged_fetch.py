@@ -0,0 +1,39 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.hedged_fetch import CircuitBreaker, HedgedFetcher
+
+
+def never_final(error: BaseException) -> bool:
+    return False
+
+
+def test_hedge_refused_by_the_breaker_is_asked_once():
+    breaker = CircuitBreaker("test", threshold=1, reset_after=0.0)
+    breaker.record_failure()  # ouvert, aussitôt semi-ouvert : seule la tentative d'essai passe
+
+    def slow_attempt(key, route):
+        time.sleep(0.3)
+        return route
+
+    fetcher = HedgedFetcher("test", slow_attempt, never_final, max_attempts=2, hedge_delay=(0.01, 0.01, 0.01),
+                            breaker=breaker)
+    assert fetcher.fetch("video", ["a", "b"]) == ("a", "a")
+    assert breaker.stats["rejected"] == 1
+    assert fetcher.stats["attempts"] == 1 and fetcher.stats["hedges"] == 0
+
+
+def test_stats_are_counted_across_threads():
+    fetcher = HedgedFetcher("test", lambda key, route: route, never_final, workers=8)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda index: fetcher.fetch(str(index), ["a"]), range(800)))
+    assert fetcher.snapshot()["fetches"] == 800
+    assert fetcher.stats["attempts"] == 800
+
+
+def test_transcript_errors_are_classified_with_public_exceptions():
+    from youtube_transcript_api import RequestBlocked, TranscriptsDisabled
+    from src.video_tools import _is_final_transcript_error
+
+    assert _is_final_transcript_error(TranscriptsDisabled("video"))
+    assert not _is_final_transcript_error(RequestBlocked("video"))
+    assert not _is_final_transcript_error(TimeoutError())
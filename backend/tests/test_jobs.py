@@ -0,0 +1,68 @@
+import asyncio
+import json
+from src.jobs import JobQueue, JobStore, format_event_id, parse_event_id
+
+
+def test_parse_event_id():
+    assert parse_event_id("12") == (12, 0)
+    assert parse_event_id("12.5") == (12, 5)
+    assert parse_event_id("") == (0, 0)
+    assert parse_event_id("abc") == (0, 0)
+    assert format_event_id((12, 0)) == "12"
+    assert format_event_id((12, 5)) == "12.5"
+
+
+async def collect(queue: JobQueue, job_id: str, after: str = "", until: int = 0):
+    """Événements (identifiant, événement) du job ; s'arrête après `until` événements si indiqué."""
+    received = []
+    async for event_id, payload in queue.events(job_id, parse_event_id(after)):
+        received.append((event_id, json.loads(payload)))
+        if until and len(received) >= until:
+            break
+    return received
+
+
+def test_last_event_id_resume_after_a_restart_does_not_skip_new_events(tmp_path):
+    hang = asyncio.Event()
+
+    async def interrupted_runner(request):
+        yield {"node": "fetch", "data": {"video_id": "v"}}
+        yield {"delta": "Lorem ", "stage": "summary"}
+        yield {"delta": "ipsum ", "stage": "summary"}
+        yield {"delta": "dolor ", "stage": "summary"}
+        await hang.wait()
+
+    async def restarted_runner(request):
+        # Laisse au client le temps de se réabonner : les fragments ne sont diffusés qu'en direct
+        await asyncio.sleep(1.0)
+        yield {"node": "fetch", "data": {"video_id": "v"}}
+        yield {"delta": "Lorem", "stage": "summary"}
+        yield {"node": "summarize", "data": {"summary": "Lorem"}}
+
+    async def scenario():
+        path = str(tmp_path / "jobs.sqlite3")
+        first = JobQueue(JobStore(path), interrupted_runner, workers=1, heartbeat_interval=60)
+        await first.start()
+        job = first.submit({"url": "v"}, "client")
+        seen = await asyncio.wait_for(collect(first, job["job_id"], until=4), 5)
+        await first.stop()
+
+        second = JobQueue(JobStore(path), restarted_runner, workers=1, heartbeat_interval=60)
+        await second.start()
+        resumed = await asyncio.wait_for(collect(second, job["job_id"], after=seen[-1][0]), 5)
+        replay = await collect(second, job["job_id"], after=resumed[0][0])
+        await second.stop()
+        return seen, resumed, replay
+
+    seen, resumed, replay = asyncio.run(scenario())
+    assert [event_id for event_id, _ in seen] == ["2", "2.1", "2.2", "2.3"]
+    # Le nouveau départ est réservé au-delà des fragments envoyés : rien de la reprise n'est sauté
+    assert [event for _, event in resumed] == [
+        {"node": "fetch", "data": {"video_id": "v"}},
+        {"delta": "Lorem", "stage": "summary"},
+        {"node": "summarize", "data": {"summary": "Lorem"}},
+    ]
+    ids = [event_id for event_id, _ in seen + resumed]
+    assert len(set(ids)) == len(ids)
+    # Job terminé : la reprise relit le journal (événements de nœud) après l'identifiant donné
+    assert replay == [resumed[-1]]
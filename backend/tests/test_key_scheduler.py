@@ -0,0 +1,71 @@
+# /backend/tests/test_key_scheduler.py
+import asyncio
+import pytest
+import config
+from src.key_scheduler import KeyScheduler
+
+
+def in_flight(scheduler: KeyScheduler):
+    return [state["in_flight"] for state in scheduler.snapshot()]
+
+
+def test_acquire_spreads_keys_and_release_returns_them():
+    scheduler = KeyScheduler(["a", "b"])
+    keys = [scheduler.acquire(100), scheduler.acquire(100)]
+    assert sorted(keys) == ["a", "b"]
+    assert in_flight(scheduler) == [1, 1]
+    for key in keys:
+        scheduler.release(key)
+    assert in_flight(scheduler) == [0, 0]
+    # Une libération de trop ne rend pas le compteur négatif
+    scheduler.release("a")
+    assert in_flight(scheduler) == [0, 0]
+
+
+def test_rate_limit_headers_do_not_release_the_reservation():
+    scheduler = KeyScheduler(["a"], default_cooldown=1.0)
+    key = scheduler.acquire()
+    scheduler.update_from_headers(key, {"x-ratelimit-remaining-tokens": "10"}, 200)
+    scheduler.report_rate_limited(key, 1.0)
+    assert in_flight(scheduler) == [1]
+    scheduler.release(key)
+    assert in_flight(scheduler) == [0]
+
+
+def test_oversized_call_runs_on_a_key_with_a_full_budget():
+    scheduler = KeyScheduler(["a"])
+    scheduler.update_from_headers("a", {"x-ratelimit-limit-tokens": "6000", "x-ratelimit-remaining-tokens": "6000"})
+    assert scheduler.try_acquire(50_000) == "a"
+
+
+def test_acquire_async_times_out_when_every_key_cools_down():
+    scheduler = KeyScheduler(["a"])
+    scheduler.report_rate_limited("a", 30.0)
+    with pytest.raises(TimeoutError):
+        asyncio.run(scheduler.acquire_async(timeout=0.1))
+    assert in_flight(scheduler) == [0]
+
+
+def test_failed_llm_construction_releases_the_key(monkeypatch):
+    def broken(**kwargs):
+        raise RuntimeError("client construction failed")
+
+    monkeypatch.setattr(config, "create_llm_instance", broken)
+    before = in_flight(config.key_scheduler)
+    with pytest.raises(RuntimeError):
+        asyncio.run(config.acreate_llm_instance(100))
+    assert in_flight(config.key_scheduler) == before
+
+
+def test_ledger_reads_do_not_write_back(tmp_path):
+    from src.shared_state import SharedKeyLedger
+
+    ledger = SharedKeyLedger(str(tmp_path / "ledger.sqlite3"))
+    scheduler = KeyScheduler(["a", "b"], ledger=ledger)
+    scheduler.snapshot()
+    scheduler.next_available_in()
+    assert ledger._conn.execute("SELECT COUNT(*) FROM key_ledger").fetchone()[0] == 0
+    # Une réservation (depuis un thread) est bien enregistrée, et vue par un autre processus
+    key = asyncio.run(scheduler.acquire_async(100))
+    other = KeyScheduler(["a", "b"], ledger=SharedKeyLedger(str(tmp_path / "ledger.sqlite3")))
+    assert {state["key"]: state["in_flight"] for state in other.snapshot()}[f"...{key[-4:]}"] == 1
@@ -0,0 +1,98 @@
+import asyncio
+import src.shared_state as shared_state
+from src.shared_state import SharedRunLog
+from src.singleflight import InFlightRegistry
+
+
+def leader_producer():
+    async def events():
+        yield {"node": "fetch", "data": {"step_progress": ["fetch"]}}
+        for text in "abc":
+            yield {"delta": text, "stage": "map"}
+        yield {"node": "map", "data": {"step_progress": ["map"]}}
+        yield {"delta": "X", "stage": "summary"}
+        yield {"delta": "Y", "stage": "summary"}
+        await asyncio.sleep(100)  # le worker s'arrête ici
+    return events
+
+
+def follow_then_take_over(tmp_path, monkeypatch, producer):
+    """Un client suit sur le worker B l'exécution menée par A, puis A s'arrête : B la reprend."""
+    log = SharedRunLog(str(tmp_path / "runs.sqlite3"), stale_after=3)
+    worker_a, worker_b = InFlightRegistry("A", shared=log), InFlightRegistry("B", shared=log)
+
+    async def scenario():
+        async def lead():
+            async for _ in worker_a.stream("k", leader_producer()):
+                pass
+
+        leader = asyncio.create_task(lead())
+        await asyncio.sleep(0.3)
+        monkeypatch.setattr(shared_state, "PROCESS_ID", "other-worker")
+        received = []
+
+        async def follow():
+            async for event in worker_b.stream("k", producer):
+                received.append(event.get("node") or event["delta"])
+
+        follower = asyncio.create_task(follow())
+        await asyncio.sleep(0.8)
+        for run in worker_a._runs.values():
+            run.task.cancel()
+        await asyncio.wait_for(follower, 10)
+        await asyncio.gather(leader, return_exceptions=True)
+        return received
+
+    received = asyncio.run(scenario())
+    assert worker_b.stats["taken_over"] == 1
+    return received
+
+
+def test_takeover_sends_only_what_the_client_has_not_received(tmp_path, monkeypatch):
+    async def same_path():
+        yield {"node": "fetch", "data": {"step_progress": ["fetch"]}}
+        for text in "abc":
+            yield {"delta": text, "stage": "map"}
+        yield {"node": "map", "data": {"step_progress": ["map"]}}
+        for text in "XYZ":
+            yield {"delta": text, "stage": "summary"}
+        yield {"node": "final", "data": {"summary": "XYZ"}}
+
+    received = follow_then_take_over(tmp_path, monkeypatch, same_path)
+    assert received == ["fetch", "a", "b", "c", "map", "X", "Y", "Z", "final"]
+
+
+def test_takeover_on_a_shorter_path_still_delivers_the_summary(tmp_path, monkeypatch):
+    # Entre-temps, les sorties map sont en cache : la reprise saute l'étape et ses fragments
+    async def shorter_path():
+        yield {"node": "fetch", "data": {"step_progress": ["fetch"]}}
+        yield {"node": "cached", "data": {"step_progress": ["cache hit"]}}
+        yield {"node": "final", "data": {"summary": "XYZ"}}
+
+    received = follow_then_take_over(tmp_path, monkeypatch, shorter_path)
+    assert received == ["fetch", "a", "b", "c", "map", "X", "Y", "cached", "final"]
+
+
+def test_run_followed_from_another_worker_is_not_cancelled(tmp_path, monkeypatch):
+    log = SharedRunLog(str(tmp_path / "runs.sqlite3"), stale_after=3)
+    worker_a = InFlightRegistry("A", shared=log, cancel_after=0.2)
+    worker_b = InFlightRegistry("B", shared=log)
+
+    async def slow_run():
+        yield {"node": "fetch", "data": {"step_progress": ["fetch"]}}
+        await asyncio.sleep(1.0)
+        yield {"node": "final", "data": {"summary": "done"}}
+
+    async def scenario():
+        async def disconnecting_client():
+            async for _ in worker_a.stream("k", slow_run):
+                break  # le client de A se déconnecte après le premier événement
+
+        await disconnecting_client()
+        monkeypatch.setattr(shared_state, "PROCESS_ID", "other-worker")
+        return [event async for event in worker_b.stream("k", slow_run)]
+
+    received = asyncio.run(scenario())
+    assert received[-1] == {"node": "final", "data": {"summary": "done"}}
+    assert worker_a.stats["cancelled"] == 0
+    assert worker_b.stats["taken_over"] == 0
@@ -0,0 +1,46 @@
+# /backend/tests/test_summarize.py
+import asyncio
+from config import Config
+from src.summarize import MapReduceSummarizer
+from src.tokens import count_tokens, truncate_to_tokens
+
+
+class BoundedSummarizer(MapReduceSummarizer):
+    """Petit budget de reduce, et des collapses qui ne réduisent presque rien (pire cas)."""
+
+    @property
+    def reduce_token_budget(self) -> int:
+        return 200
+
+    async def _collapse(self, summaries):
+        self.stats["collapse_calls"] += 1
+        return "\n\n".join(summaries)[: 4 * 150]
+
+
+def sentences(count: int) -> str:
+    return " ".join(f"Sentence number {index} of a partial summary." for index in range(count))
+
+
+def test_truncate_keeps_whole_sentences_within_budget():
+    text = sentences(50)
+    truncated = truncate_to_tokens(text, 40)
+    assert count_tokens(truncated) <= 40
+    assert truncated.endswith(".") and text.startswith(truncated)
+    assert truncate_to_tokens("short.", 40) == "short."
+
+
+def test_reduce_fits_the_combine_budget_when_the_depth_cap_is_reached(monkeypatch):
+    monkeypatch.setattr(Config, "MAP_REDUCE_MAX_DEPTH", 1)
+
+    async def run():
+        summarizer = BoundedSummarizer("english", "standard")
+
+        async def part(text):
+            return text
+
+        texts = await summarizer._reduce([part(sentences(10)) for _ in range(12)], 1)
+        return summarizer, texts
+
+    summarizer, texts = asyncio.run(run())
+    assert summarizer.stats["collapse_calls"] > 1
+    assert count_tokens("\n\n".join(texts)) <= summarizer.reduce_token_budget
@@ -1,32 +1,63 @@
 # tools.py
-from langchain_core.tools import tool
+from langchain_core.tools import tool, StructuredTool
 from typing import Optional, Tuple
-from src.video_tools import extract_video_id, get_video_transcript
-from src.summarize import summarize_text
-from src.translation import translate_text
+from src.video_tools import extract_video_id, get_video_transcript, aget_video_transcript
+from src.summarize import summarize_text, asummarize_text, derive_summary, aderive_summary
+from src.translation import translate_text, atranslate_text
 
 # Le décorateur @tool transforme automatiquement tes fonctions en outils LangChain
 # Il utilise les annotations de type et la docstring pour la description.
+# Les outils faisant des entrées/sorties sont construits avec StructuredTool.from_function
+# pour exposer à la fois une version synchrone (invoke) et une version native asynchrone (ainvoke).
 
 @tool
 def extract_id_tool(youtube_url: str) -> Optional[str]:
     """Prend une URL YouTube complète et extrait l'identifiant unique de la vidéo."""
     return extract_video_id(youtube_url)
 
-@tool
-def get_transcript_tool(video_id: str) -> Tuple[Optional[str], Optional[str]]:
+def _get_transcript(video_id: str) -> Tuple[Optional[str], Optional[str]]:
     """Récupère la transcription textuelle d'une vidéo à partir de son ID. Gère les cas où la transcription est absente ou désactivée."""
     return get_video_transcript(video_id)
 
-@tool
-def summarize_text_tool(transcript: str, language: str = "english", summary_length: str = "standard") -> Tuple[Optional[str], Optional[str]]:
+async def _aget_transcript(video_id: str) -> Tuple[Optional[str], Optional[str]]:
+    return await aget_video_transcript(video_id)
+
+get_transcript_tool = StructuredTool.from_function(
+    func=_get_transcript, coroutine=_aget_transcript, name="get_transcript_tool"
+)
+
+def _summarize_text(transcript: str, language: str = "english", summary_length: str = "standard", video_id: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
     """Takes a long text (like a transcript) and summarizes it concisely with the specified level of detail."""
-    return summarize_text(transcript, language, summary_length)
+    return summarize_text(transcript, language, summary_length, video_id)
 
-@tool
-def translate_text_tool(text: str, target_language: str) -> Tuple[Optional[str], Optional[str]]:
+async def _asummarize_text(transcript: str, language: str = "english", summary_length: str = "standard", video_id: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+    return await asummarize_text(transcript, language, summary_length, video_id)
+
+summarize_text_tool = StructuredTool.from_function(
+    func=_summarize_text, coroutine=_asummarize_text, name="summarize_text_tool"
+)
+
+def _derive_summary(source_summary: str, language: str = "english", summary_length: str = "brief") -> Tuple[Optional[str], Optional[str]]:
+    """Condenses an existing, more detailed summary into a shorter summary of the requested length."""
+    return derive_summary(source_summary, language, summary_length)
+
+async def _aderive_summary(source_summary: str, language: str = "english", summary_length: str = "brief") -> Tuple[Optional[str], Optional[str]]:
+    return await aderive_summary(source_summary, language, summary_length)
+
+derive_summary_tool = StructuredTool.from_function(
+    func=_derive_summary, coroutine=_aderive_summary, name="derive_summary_tool"
+)
+
+def _translate_text(text: str, target_language: str) -> Tuple[Optional[str], Optional[str]]:
     """
     Translates a given text into the specified target language.
     This is a final quality check to ensure the output is in the correct language.
     """
-    return translate_text(text=text, target_language=target_language)
\ No newline at end of file
+    return translate_text(text=text, target_language=target_language)
+
+async def _atranslate_text(text: str, target_language: str) -> Tuple[Optional[str], Optional[str]]:
+    return await atranslate_text(text=text, target_language=target_language)
+
+translate_text_tool = StructuredTool.from_function(
+    func=_translate_text, coroutine=_atranslate_text, name="translate_text_tool"
+)
@@ -14,6 +14,7 @@ export default function Home() {
   const [loading, setLoading] = useState(false);
   const [summary, setSummary] = useState("");
   const [transcript, setTranscript] = useState("");
+  const [videoId, setVideoId] = useState("");
   const [error, setError] = useState("");
 
   const [steps, setSteps] = useState([]);
@@ -32,6 +33,7 @@ export default function Home() {
     setLoading(true);
     setSummary("");
     setTranscript("");
+    setVideoId("");
     setError("");
     setSteps([]);
     setCurrentStep("Initializing process...");
@@ -50,17 +52,23 @@ export default function Home() {
 
       if (!res.ok) {
         const errorData = await res.json();
-        throw new Error(errorData.detail || "An error occurred during the request.");
+        // 429 / 503 (serveur saturé) : message du backend, à réessayer après l'en-tête Retry-After
+        throw new Error(errorData.error || errorData.detail || "An error occurred during the request.");
       }
 
       const reader = res.body.getReader();
       const decoder = new TextDecoder();
       let buffer = "";
+      // Texte reçu token par token (événements "delta") pour l'étape en cours
+      let streamedStage = null;
+      let streamedText = "";
+      // Erreur signalée dans le flux (file d'attente expirée, vidéo introuvable...) : le flux se termine normalement
+      let failed = false;
 
       while (true) {
         const { done, value } = await reader.read();
         if (done) {
-          setCurrentStep("Process finished!");
+          setCurrentStep(failed ? "Process stopped." : "Process finished!");
           break;
         }
 
@@ -74,10 +82,23 @@ export default function Home() {
             if (jsonString) {
               try {
                 const parsedData = JSON.parse(jsonString);
+
+                if (parsedData.delta !== undefined) {
+                  // Une nouvelle étape (ex : traduction) remplace le texte streamé précédent
+                  if (parsedData.stage !== streamedStage) {
+                    streamedStage = parsedData.stage;
+                    streamedText = "";
+                  }
+                  streamedText += parsedData.delta;
+                  setSummary(streamedText);
+                  continue;
+                }
+
                 const { node, data } = parsedData;
 
                 if (data.step_progress) {
-                  setSteps(data.step_progress);
+                  // Le serveur n'envoie que les nouvelles étapes de chaque nœud
+                  setSteps((previous) => [...previous, ...data.step_progress]);
                 }
                 if (data.status_message) {
                   setCurrentStep(data.status_message);
@@ -85,9 +106,16 @@ export default function Home() {
                 if (data.summary) {
                   setSummary(data.summary);
                 }
+                if (data.video_id) {
+                  setVideoId(data.video_id);
+                }
                 if (data.transcript) {
                   setTranscript(data.transcript);
                 }
+                if (data.error_message) {
+                  failed = true;
+                  setError(data.error_message);
+                }
               } catch (e) {
                 console.error("Failed to parse JSON:", jsonString, e);
                 setError(`Failed to parse an update from the server. The content was: "${jsonString}"`);
@@ -105,6 +133,20 @@ export default function Home() {
     }
   };
 
+  // La transcription n'est plus envoyée dans le flux SSE : on la charge à l'ouverture du panneau
+  const handleTranscriptToggle = async (e) => {
+    if (!e.target.checked || transcript || !videoId) return;
+    try {
+      const res = await fetch(`/api/transcript/${videoId}`);
+      if (res.ok) {
+        const data = await res.json();
+        setTranscript(data.transcript);
+      }
+    } catch (err) {
+      console.error("Failed to load transcript:", err);
+    }
+  };
+
   // Configuration des composants pour ReactMarkdown
   const markdownComponents = {
     h1: ({ children, ...props }) => (
@@ -323,10 +365,10 @@ export default function Home() {
                   </div>
                 </div>
               </div>
-              {transcript && (
+              {videoId && (
                 <div className="mt-4">
                   <div className="collapse collapse-arrow bg-base-100 shadow">
-                    <input type="checkbox" />
+                    <input type="checkbox" onChange={handleTranscriptToggle} />
                     <div className="collapse-title text-xl font-medium flex items-center gap-2">
                       <span role="img" aria-label="Transcript">📜</span> Transcript
                     </div>